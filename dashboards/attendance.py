@@ -0,0 +1,142 @@
+from datetime import timedelta
+from django.db.models import Count, OuterRef, Subquery
+from django.utils import timezone
+from .models import Attendance, Enrollment, Lesson, LessonDay
+from .recurrence import iter_sessions
+
+# Toplu (çevrimdışı kiosk) yüklemede okutma bazında dönen red nedenleri
+NOT_ENROLLED = 'not_enrolled'
+NO_SESSION = 'no_session'
+INVALID = 'invalid'
+
+
+class AttendanceError(Exception):
+    """Yoklama kaydedilemediğinde fırlatılır."""
+
+
+class NotEnrolledError(AttendanceError):
+    """Öğrencinin derste onaylı kaydı yoksa fırlatılır."""
+
+
+class NoSessionError(AttendanceError):
+    """Dersin o gün (iptal edilmemiş) bir oturumu yoksa fırlatılır."""
+
+
+def find_session_enrollment(lesson_id, student_id, day):
+    """Onaylı kaydı, dersi ve dersin o günkü ``LessonDay`` satırını tek sorguda okur.
+
+    Kayıt ``(lesson, student)`` tekil index'inden, ders birincil anahtarından,
+    o günün satırı ``lessonday_lesson_date_idx`` index'inden bulunur.
+    """
+    lesson_day = LessonDay.objects.filter(lesson=OuterRef('lesson_id'), date=day)
+    return (
+        Enrollment.objects.filter(lesson_id=lesson_id, student_id=student_id, status='approved')
+        .select_related('lesson')
+        .annotate(
+            lesson_day_id=Subquery(lesson_day.values('id')[:1]),
+            lesson_day_cancelled=Subquery(lesson_day.values('cancelled')[:1]),
+        )
+        .first()
+    )
+
+
+def has_session(lesson, day, lesson_day_id, cancelled):
+    # Materialize derslerde oturum satırı vardır; kurallı derslerde satır sadece istisnadır
+    if lesson_day_id is not None:
+        return not cancelled
+    if lesson.schedule_mode == Lesson.RECURRING:
+        return next(lesson.expand_schedule(day, day + timedelta(days=1)), None) is not None
+    return False
+
+
+def check_in(lesson_id, student_id, checked_in_at=None):
+    """Öğrenciyi dersin bugünkü oturumuna kaydeder; (attendance, created) döner.
+
+    Doğrulama tek bir sorgudur. Aynı kart tekrar okutulursa
+    ``attendance_once_per_session`` kısıtı sayesinde mevcut kayıt döner;
+    eşzamanlı okutmalar da tek satır oluşturur.
+    """
+    checked_in_at = checked_in_at or timezone.now()
+    day = timezone.localdate(checked_in_at)
+    enrollment = find_session_enrollment(lesson_id, student_id, day)
+    if enrollment is None:
+        raise NotEnrolledError("No approved enrollment for this lesson.")
+    if not has_session(enrollment.lesson, day, enrollment.lesson_day_id, enrollment.lesson_day_cancelled):
+        raise NoSessionError(f"The lesson has no session on {day}.")
+    return Attendance.objects.get_or_create(
+        lesson_id=lesson_id, student_id=student_id, session_date=day,
+        defaults={'checked_in_at': checked_in_at, 'source': 'door'},
+    )
+
+
+def record_scans(scans, batch_size=500):
+    """Çevrimdışı çalışan bir kioskun biriktirdiği okutmaları yazar.
+
+    ``scans`` (lesson_id, student_id, scanned_at) üçlüleridir. Onaylı kayıtlar
+    ve oturumlar okutma sayısından bağımsız olarak iki sorguda okunur,
+    geçerli okutmalar ``bulk_create(ignore_conflicts=True)`` ile yazılır;
+    daha önce kaydedilmiş yoklamalar sessizce atlanır. Kabul edilen okutma
+    sayısı ve {sıra: neden} biçiminde reddedilenler döner.
+    """
+    rejected = {}
+    scans = [
+        (index, lesson_id, student_id, scanned_at, timezone.localdate(scanned_at))
+        for index, (lesson_id, student_id, scanned_at) in enumerate(scans)
+    ]
+    if not scans:
+        return 0, rejected
+    lesson_ids = {scan[1] for scan in scans}
+
+    # lesson_id ve student_id kümelerinin kesişimi okunur; çiftler Python'da eşlenir
+    enrolled = set(
+        Enrollment.objects.filter(
+            lesson_id__in=lesson_ids, student_id__in={scan[2] for scan in scans}, status='approved',
+        ).values_list('lesson_id', 'student_id')
+    )
+    sessions = {
+        (session.lesson_id, session.date)
+        for session in iter_sessions(dates={scan[4] for scan in scans}, id__in=lesson_ids)
+    }
+
+    attendances = {}
+    for index, lesson_id, student_id, scanned_at, day in scans:
+        if (lesson_id, student_id) not in enrolled:
+            rejected[index] = NOT_ENROLLED
+        elif (lesson_id, day) not in sessions:
+            rejected[index] = NO_SESSION
+        else:
+            # Aynı oturumun tekrar okutmalarından ilki tutulur
+            key = (lesson_id, day, student_id)
+            if key not in attendances or scanned_at < attendances[key].checked_in_at:
+                attendances[key] = Attendance(
+                    lesson_id=lesson_id, student_id=student_id, session_date=day,
+                    checked_in_at=scanned_at, source='kiosk',
+                )
+    Attendance.objects.bulk_create(attendances.values(), batch_size=batch_size, ignore_conflicts=True)
+    return len(scans) - len(rejected), rejected
+
+
+def session_summaries(lesson, window_start=None, window_end=None):
+    """Dersin oturumlarını katılan sayılarıyla birlikte tarih sırasıyla döndürür.
+
+    Katılım sayıları tek bir gruplanmış sorguyla ``attendance_once_per_session``
+    index'inden okunur; beklenen sayı dersin onaylı öğrenci sayacıdır.
+    """
+    attendances = Attendance.objects.filter(lesson=lesson)
+    if window_start is not None:
+        attendances = attendances.filter(session_date__gte=window_start)
+    if window_end is not None:
+        attendances = attendances.filter(session_date__lt=window_end)
+    attended = dict(
+        attendances.values('session_date').annotate(total=Count('id')).order_by().values_list('session_date', 'total')
+    )
+    return [
+        {
+            'date': session.date,
+            'start_time': session.start_time,
+            'end_time': session.end_time,
+            'attended': attended.get(session.date, 0),
+            'expected': lesson.approved_count,
+        }
+        for session in lesson.iter_sessions(window_start, window_end)
+    ]
@@ -0,0 +1,360 @@
+"""URL yapılandırmasındaki her görünüm için gecikme, sorgu sayısı ve bellek ölçümü.
+
+Görünümler test istemcisiyle, ``SCENARIOS`` tablosunda tanımlanan rolle ve
+örnek verilerle (ör. öğrencinin kayıtlı olduğu bir ders) çağrılır. Her
+görünüm için p50/p95/p99 gecikme, istek başına sorgu sayısı ve
+``tracemalloc`` ile ölçülen en yüksek bellek kullanımı raporlanır. Sonuçlar
+JSON olarak kaydedilip sonraki çalıştırmalarla karşılaştırılabilir.
+
+``benchmark_session_modes`` aynı akışları her oturum/mesaj saklama modunda
+çalıştırıp oturum tablosuna giden sorguları sayar (bkz. users.sessions).
+"""
+import json
+import platform
+import tracemalloc
+from datetime import timedelta
+from time import perf_counter
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone
+from sales.models import Order, Product
+from . import ics
+from .models import Enrollment, Lesson
+from .querybudget import QueryRecorder
+
+ANONYMOUS = 'anonymous'
+# URL adı -> (rol, sorgu parametreleri); parametrelerdeki {token} örnek öğrencinin besleme token'ıdır
+SCENARIOS = {
+    'home': (ANONYMOUS, {}),
+    'register': (ANONYMOUS, {}),
+    'login': (ANONYMOUS, {}),
+    'test_page': (ANONYMOUS, {}),
+    'user_calendar_feed': (ANONYMOUS, {'token': '{token}'}),
+    'user_management': ('manager', {}),
+    'export_users': ('manager', {}),
+    'export_enrollments': ('manager', {}),
+    'export_orders': ('manager', {}),
+    'create_user': ('manager', {}),
+    'edit_user': ('manager', {}),
+    'create_skill': ('manager', {}),
+    'edit_skill': ('manager', {}),
+    'view_teacher_lessons': ('manager', {}),
+    'view_specific_teacher_lessons': ('manager', {}),
+    'user_detail': ('manager', {}),
+    'find_teachers': ('student', {'skills': '{skill}', 'weekday': 1, 'start_time': '18:00', 'end_time': '21:00'}),
+    'catalogue_cache_stats': ('manager', {}),
+    'manager_reports': ('manager', {}),
+    'add_product': ('manager', {}),
+    'teacher_dashboard': ('teacher', {}),
+    'create_lesson': ('teacher', {}),
+    'lesson_schedule_conflicts': ('teacher', {
+        'start_date': '{start_date}', 'duration_weeks': 8, 'duration_hours': 1,
+    }),
+    'lesson_calendar_feed': ('teacher', {'start': '{window_start}', 'end': '{window_end}'}),
+    'lesson_attendance': ('teacher', {}),
+    'manage_enrollment': ('teacher', {}),
+    'lesson_list': ('student', {}),
+    'lesson_detail': ('student', {}),
+    'lesson_calendar_ics': ('student', {}),
+    'student_dashboard': ('student', {}),
+    'all_lessons': ('student', {'query': 'yoga'}),
+    'available_lessons': ('student', {}),
+    'enroll_in_lesson': ('student', {}),
+    'request_enrollment': ('student', {}),
+    'join_waitlist': ('student', {}),
+    'product_list': ('student', {}),
+    'product_detail': ('student', {}),
+    'cart_detail': ('student', {}),
+    'checkout': ('student', {}),
+    'add_to_cart': ('student', {}),
+}
+# Ölçülmeyen görünümler ve nedenleri
+SKIPPED = {
+    'logout': "ends the benchmark session",
+    'bulk_manage_enrollments': "POST only",
+    'leave_lesson': "POST only",
+    'check_in': "POST only",
+    'upload_attendance_scans': "POST only",
+    'reset_calendar_feed': "POST only",
+    'remove_from_cart': "deletes the cart item it is given",
+}
+# Admin paneli Django'ya aittir ve ölçülmez
+SKIPPED_NAMESPACES = ('admin',)
+# Oturum modu karşılaştırması (benchmark_session_modes)
+SESSION_TABLE = '"django_session"'
+WRITE_PREFIXES = ('INSERT', 'UPDATE', 'DELETE')
+# Karşılaştırılan (oturum, mesaj) modları; ilki projenin önceki varsayılanıdır
+SESSION_BENCHMARK_MODES = (('db', 'session'), ('db', 'cookie'), ('cached_db', 'session'), ('cached_db', 'cookie'))
+SESSION_BENCHMARK_PASSWORD = 'session-benchmark'
+
+
+def iter_endpoints(patterns=None, prefix='', namespace=None):
+    """URL yapılandırmasını gezip (ad, yol kalıbı, parametre adları) üçlülerini üretir."""
+    for pattern in get_resolver().url_patterns if patterns is None else patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace in SKIPPED_NAMESPACES:
+                continue
+            yield from iter_endpoints(pattern.url_patterns, prefix + str(pattern.pattern), pattern.namespace)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield pattern.name, prefix + str(pattern.pattern), list(pattern.pattern.converters)
+
+
+def find_samples():
+    """Görünümlerin anlamlı sayfalar döndürmesi için örnek kullanıcı ve nesneleri seçer.
+
+    En çok kaydı olan ders, öğretmeni ve onaylı bir öğrencisi seçilir;
+    böylece panolar ve ders sayfaları boş veriyle ölçülmez.
+    """
+    User = get_user_model()
+    lesson = (
+        Lesson.objects.filter(enrollments__status='approved').select_related('teacher')
+        .order_by('-approved_count', 'id').first()
+    ) or Lesson.objects.select_related('teacher').order_by('id').first()
+    if lesson is None:
+        return None
+    student = (
+        User.objects.filter(enrollments__lesson=lesson, enrollments__status='approved').order_by('id').first()
+        or User.objects.filter(role='student').order_by('id').first()
+    )
+    manager = User.objects.filter(role='manager').order_by('id').first()
+    if student is None or manager is None:
+        return None
+    enrollment = (
+        Enrollment.objects.filter(lesson=lesson).exclude(student=student).order_by('id').first()
+        or Enrollment.objects.filter(lesson=lesson).order_by('id').first()
+    )
+    product = Product.objects.order_by('id').first()
+    skill = lesson.teacher.skills.order_by('id').first()
+    today = timezone.localdate()
+    return {
+        'users': {'manager': manager, 'teacher': lesson.teacher, 'student': student, ANONYMOUS: None},
+        'kwargs': {
+            'lesson_id': lesson.id,
+            'teacher_id': lesson.teacher_id,
+            'user_id': student.id,
+            'enrollment_id': enrollment.id if enrollment else None,
+            'action': 'approve',
+            'skill_id': skill.id if skill else None,
+            'product_id': product.id if product else None,
+        },
+        'params': {
+            'token': ics.feed_token(student),
+            'skill': skill.id if skill else '',
+            'start_date': f'{timezone.now() + timedelta(days=400):%Y-%m-%dT%H:%M}',
+            'window_start': today.isoformat(),
+            'window_end': (today + timedelta(days=31)).isoformat(),
+        },
+        'rows': {
+            'users': User.objects.count(),
+            'lessons': Lesson.objects.count(),
+            'enrollments': Enrollment.objects.count(),
+            'orders': Order.objects.count(),
+        },
+    }
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def build_url(route, converters, kwargs):
+    url = '/' + route
+    for name in converters:
+        if kwargs.get(name) is None:
+            return None
+        url = url.replace(f'<int:{name}>', str(kwargs[name])).replace(f'<str:{name}>', str(kwargs[name]))
+    return url
+
+
+def get_host():
+    # ALLOWED_HOSTS boşken (DEBUG) sadece localhost kabul edilir; kalıp dışı ilk adres tercih edilir
+    hosts = [host for host in settings.ALLOWED_HOSTS if host != '*' and not host.startswith('.')]
+    return hosts[0] if hosts else 'localhost'
+
+
+def measure(client, url, params, repeat):
+    """Bir URL'yi ısınma isteğinden sonra ``repeat`` kez çağırıp ölçümleri döndürür."""
+    def request():
+        response = client.get(url, params)
+        if response.streaming:
+            # Akışlı yanıtlarda iş gövde okunurken yapılır
+            b''.join(response.streaming_content)
+        return response
+
+    response = request()
+    latencies, queries = [], []
+    for _ in range(repeat):
+        with QueryRecorder() as recorder:
+            started = perf_counter()
+            request()
+            latencies.append((perf_counter() - started) * 1000)
+        queries.append(len(recorder))
+
+    tracemalloc.start()
+    try:
+        request()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        'status': response.status_code,
+        'p50_ms': round(percentile(latencies, 0.5), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+        'queries': max(queries),
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+def run_benchmarks(repeat=20, only=None):
+    """Tüm görünümleri ölçüp JSON'a yazılabilir bir sözlük döndürür.
+
+    Görünümler veri yazabileceği için çağıran taraf bu fonksiyonu geri
+    alınan (rollback) bir transaction içinde çalıştırmalıdır.
+    """
+    samples = find_samples()
+    if samples is None:
+        raise ValueError("The database needs at least one lesson, student and manager; run generate_data first.")
+    clients = {}
+    for role, user in samples['users'].items():
+        # Hata veren görünümler ölçümü durdurmaz, durum koduyla raporlanır
+        clients[role] = Client(HTTP_HOST=get_host(), raise_request_exception=False)
+        if user is not None:
+            clients[role].force_login(user)
+
+    results, skipped = {}, {}
+    for name, route, converters in iter_endpoints():
+        if only and name not in only:
+            continue
+        if name in SKIPPED:
+            skipped[name] = SKIPPED[name]
+            continue
+        if name not in SCENARIOS:
+            skipped[name] = "no benchmark scenario"
+            continue
+        url = build_url(route, converters, samples['kwargs'])
+        if url is None:
+            skipped[name] = "no sample object for the URL parameters"
+            continue
+        role, params = SCENARIOS[name]
+        params = {key: str(value).format(**samples['params']) for key, value in params.items()}
+        results[name] = {'url': url, 'role': role, **measure(clients[role], url, params, repeat)}
+
+    return {
+        'meta': {
+            'created_at': timezone.now().isoformat(),
+            'repeat': repeat,
+            'rows': samples['rows'],
+            'database': connection.vendor,
+            'django': django.get_version(),
+            'python': platform.python_version(),
+        },
+        'views': results,
+        'skipped': skipped,
+    }
+
+
+def compare(baseline, current, threshold=0.2):
+    """İki çalıştırmayı karşılaştırıp gerileyen görünümlerin listesini döndürür.
+
+    p95 gecikmesi ``threshold`` oranından fazla artan veya sorgu sayısı
+    artan görünümler gerilemiş sayılır.
+    """
+    regressions = []
+    for name, result in current['views'].items():
+        before = baseline.get('views', {}).get(name)
+        if before is None:
+            continue
+        if result['queries'] > before['queries']:
+            regressions.append((name, f"queries {before['queries']} -> {result['queries']}"))
+        if before['p95_ms'] and result['p95_ms'] > before['p95_ms'] * (1 + threshold):
+            regressions.append((name, f"p95 {before['p95_ms']} ms -> {result['p95_ms']} ms"))
+    return regressions
+
+
+def load(path):
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle)
+
+
+def save(path, result):
+    with open(path, 'w', encoding='utf-8') as handle:
+        json.dump(result, handle, indent=2, sort_keys=True)
+        handle.write('\n')
+
+
+def session_queries(recorder):
+    # Sadece oturum tablosuna giden sorgular; (yazma, okuma) sayısı döner
+    statements = [sql.lstrip().upper() for sql in recorder.queries if SESSION_TABLE in sql]
+    writes = sum(1 for sql in statements if sql.startswith(WRITE_PREFIXES))
+    return writes, len(statements) - writes
+
+
+def create_session_benchmark_data():
+    User = get_user_model()
+    teacher = User.objects.create_user(
+        username='session-bench-teacher', password=SESSION_BENCHMARK_PASSWORD, role='teacher',
+    )
+    lesson = Lesson.objects.create(
+        title='Session benchmark', description='Session benchmark', lesson_type='group', teacher=teacher,
+        max_students=len(SESSION_BENCHMARK_MODES), duration_weeks=1, duration_hours=1,
+        start_date=timezone.now() + timedelta(days=800),
+    )
+    students = [
+        User.objects.create_user(username=f'session-bench-{index}', password=SESSION_BENCHMARK_PASSWORD, role='student')
+        for index in range(len(SESSION_BENCHMARK_MODES))
+    ]
+    return teacher, lesson, students
+
+
+def run_session_flows(teacher, lesson, student):
+    """Ana akışları (giriş, pano, kayıt, onay, mesajlı yönlendirme, çıkış) çalıştırır.
+
+    Her adım için (adım adı, oturum yazma sayısı, oturum okuma sayısı) üretir.
+    Yeni bir istemci, ayarlar değiştikten sonra middleware'i yeniden yükler.
+    """
+    client = Client(HTTP_HOST=get_host())
+    steps = [
+        ('login (student)', 'post', lambda: reverse('login'),
+         {'username': student.username, 'password': SESSION_BENCHMARK_PASSWORD}),
+        ('student_dashboard', 'get', lambda: reverse('student_dashboard'), {}),
+        ('enroll_in_lesson', 'post', lambda: reverse('enroll_in_lesson', args=[lesson.id]), {}),
+        ('all_lessons (message)', 'get', lambda: reverse('all_lessons'), {}),
+        ('logout (student)', 'get', lambda: reverse('logout'), {}),
+        ('login (teacher)', 'post', lambda: reverse('login'),
+         {'username': teacher.username, 'password': SESSION_BENCHMARK_PASSWORD}),
+        ('manage_enrollment', 'get', lambda: reverse('manage_enrollment', args=[
+            Enrollment.objects.get(lesson=lesson, student=student).id, 'approve',
+        ]), {}),
+        ('teacher_dashboard (message)', 'get', lambda: reverse('teacher_dashboard'), {}),
+        ('logout (teacher)', 'get', lambda: reverse('logout'), {}),
+    ]
+    for name, method, url, data in steps:
+        url = url()
+        with QueryRecorder() as recorder:
+            getattr(client, method)(url, data)
+        yield (name, *session_queries(recorder))
+
+
+def benchmark_session_modes():
+    """Her (oturum, mesaj) modu için akış adımlarının oturum tablosu sorgularını ölçer.
+
+    Veri yazıldığı için çağıran taraf bu fonksiyonu geri alınan bir
+    transaction içinde çalıştırmalıdır (bkz. benchmark_sessions).
+    """
+    teacher, lesson, students = create_session_benchmark_data()
+    results = {}
+    for (session_mode, message_mode), student in zip(SESSION_BENCHMARK_MODES, students):
+        with override_settings(
+            SESSION_ENGINE=settings.SESSION_ENGINES[session_mode],
+            MESSAGE_STORAGE=settings.MESSAGE_STORAGES[message_mode],
+        ):
+            results[f'{session_mode}+{message_mode}'] = {
+                name: {'writes': writes, 'reads': reads} for name, writes, reads in run_session_flows(teacher, lesson, student)
+            }
+    return results
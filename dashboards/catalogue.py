@@ -0,0 +1,135 @@
+"""Ders kataloğu (all_lessons, available_lessons, lesson_detail) önbelleği.
+
+Anahtarlar sürümlüdür: her ders için bir sürüm ve tüm katalog için genel bir
+sürüm tutulur. Bir ders, ders günü veya kayıt yazıldığında ilgili sürümler
+yeni ve daha önce kullanılmamış bir değere çekilir; eski girdiler silinmez,
+bir daha okunmaz ve zaman aşımıyla düşer.
+
+Sürüm, veritabanı okunmadan önce alınır ve sonuç o sürümle yazılır. Sürümler
+hem yazma anında hem de transaction commit edildikten sonra yenilendiği için
+commit'ten önce okunmuş eski bir sonuç hiçbir zaman güncel sürümle saklanmaz.
+"""
+import hashlib
+import uuid
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+KEY_PREFIX = 'catalogue'
+GLOBAL_VERSION_KEY = f'{KEY_PREFIX}:version'
+STATS_KEYS = {'hits': f'{KEY_PREFIX}:stats:hits', 'misses': f'{KEY_PREFIX}:stats:misses'}
+
+
+def get_cache():
+    # Geliştirmede yerel bellek; birden fazla worker süreci için dosya veya DB önbelleği (bkz. settings)
+    return caches[getattr(settings, 'CATALOGUE_CACHE_ALIAS', 'default')]
+
+
+def get_timeout():
+    return getattr(settings, 'CATALOGUE_CACHE_TIMEOUT', 60 * 60)
+
+
+def lesson_version_key(lesson_id):
+    return f'{KEY_PREFIX}:lesson:{lesson_id}:version'
+
+
+def new_version():
+    # Sayaç yerine rastgele değer: önbellekten düşen bir sürüm sıfırdan başlayıp eski girdileri diriltmez
+    return uuid.uuid4().hex[:16]
+
+
+def get_versions(lesson_ids=()):
+    """{None: genel sürüm, ders id: ders sürümü} sözlüğünü tek bir ``get_many`` ile döndürür."""
+    cache = get_cache()
+    keys = {None: GLOBAL_VERSION_KEY, **{lesson_id: lesson_version_key(lesson_id) for lesson_id in lesson_ids}}
+    found = cache.get_many(keys.values())
+    versions = {}
+    for lesson_id, key in keys.items():
+        if key not in found:
+            # Eşzamanlı okuyucular add() ile ilk yazılan sürümde buluşur
+            version = new_version()
+            found[key] = version if cache.add(key, version, None) else cache.get(key, version)
+        versions[lesson_id] = found[key]
+    return versions
+
+
+def attach_versions(lessons):
+    # Satır parçaları için her derse catalogue_version eklenir; sayfa başına tek önbellek okuması
+    lessons = list(lessons)
+    versions = get_versions({lesson.id for lesson in lessons})
+    for lesson in lessons:
+        lesson.catalogue_version = versions[lesson.id]
+    return lessons
+
+
+def bump_versions(lesson_ids):
+    keys = [GLOBAL_VERSION_KEY, *(lesson_version_key(lesson_id) for lesson_id in lesson_ids)]
+    get_cache().set_many({key: new_version() for key in keys}, None)
+
+
+def invalidate_lessons(lesson_ids=()):
+    """Verilen derslerin ve tüm katalog listelerinin önbelleğini geçersiz kılar.
+
+    Sürümler hemen ve transaction commit edildikten sonra tekrar yenilenir.
+    Araya giren bir okuyucu, commit'ten önceki veriyi artık okunmayacak bir
+    sürümle saklamış olur.
+    """
+    lesson_ids = set(lesson_ids)
+    bump_versions(lesson_ids)
+    transaction.on_commit(lambda: bump_versions(lesson_ids))
+
+
+def make_key(*parts):
+    digest = hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+    return f'{KEY_PREFIX}:{parts[0]}:{digest}'
+
+
+def record(hits=0, misses=0):
+    if not getattr(settings, 'CATALOGUE_CACHE_STATS', True):
+        return
+    cache = get_cache()
+    for name, count in (('hits', hits), ('misses', misses)):
+        if count:
+            # add() sayacı ilk kez oluşturur; incr sadece var olan anahtarda çalışır
+            cache.add(STATS_KEYS[name], 0, None)
+            try:
+                cache.incr(STATS_KEYS[name], count)
+            except ValueError:
+                cache.set(STATS_KEYS[name], count, None)
+
+
+def get_stats():
+    values = get_cache().get_many(STATS_KEYS.values())
+    stats = {name: values.get(key, 0) for name, key in STATS_KEYS.items()}
+    total = stats['hits'] + stats['misses']
+    stats['hit_rate'] = round(stats['hits'] / total, 4) if total else None
+    return stats
+
+
+def cached(key, build, timeout=None):
+    """Anahtar önbellekte yoksa ``build()`` sonucunu saklayıp döndürür."""
+    cache = get_cache()
+    value = cache.get(key)
+    if value is not None:
+        record(hits=1)
+        return value
+    record(misses=1)
+    value = build()
+    cache.set(key, value, get_timeout() if timeout is None else timeout)
+    return value
+
+
+def cached_lesson(lesson_id, name, build):
+    # Sadece tek bir dersin verisine bağlı sonuçlar ders sürümüyle saklanır
+    version = get_versions([lesson_id])[lesson_id]
+    return cached(make_key(name, lesson_id, version), build)
+
+
+def cached_listing(name, params, build):
+    # Hangi derslerin listeleneceği her yazmada değişebilir, bu yüzden genel sürüm kullanılır
+    version = get_versions()[None]
+    return cached(make_key(name, version, *params), build)
+
+
+def clear():
+    get_cache().clear()
@@ -0,0 +1,229 @@
+from collections import Counter, defaultdict
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.utils import timezone
+from users.profiles import invalidate_profiles
+from . import catalogue
+from .models import Enrollment, Lesson
+
+# Toplu işlemde kayıt bazında dönen sonuçlar
+CHANGED = 'changed'
+UNCHANGED = 'unchanged'
+FULL = 'full'
+NOT_FOUND = 'not_found'
+# Toplu değiştirilebilen durumlar; bekleme listesine sadece join_waitlist sıra zamanıyla ekler
+BULK_STATUSES = ('requested', 'approved', 'rejected')
+
+
+class EnrollmentError(Exception):
+    """Kayıt durumu değiştirilemediğinde fırlatılır."""
+
+
+class LessonFullError(EnrollmentError):
+    """Onay, dersin kapasitesini aşacağı için reddedildiğinde fırlatılır."""
+
+
+def request_enrollment(lesson, student):
+    """Öğrenci için katılım isteği oluşturur; (enrollment, created) döner.
+
+    Aynı anda gelen istekler ``unique_together`` kısıtı sayesinde tek kayıt
+    oluşturur, ``get_or_create`` çakışan INSERT'ü mevcut kaydı okuyarak çözer.
+    """
+    return Enrollment.objects.get_or_create(lesson=lesson, student=student)
+
+
+def change_enrollment_status(enrollment, status):
+    """Kaydın durumunu tek bir transaction içinde değiştirir.
+
+    Kayıt ve ders satırları ``select_for_update`` ile kilitlenir; kilidi
+    desteklemeyen SQLite'ta yazma sırası ``transaction_mode = IMMEDIATE``
+    ile sağlanır (bkz. gym_management.settings_loadtest). Onaylarda yer, ``approved_count < max_students`` koşullu
+    UPDATE'iyle ayrılır ve koşul sağlanmazsa ``LessonFullError`` fırlatılır.
+    Durum zaten ``status`` ise hiçbir şey yazılmaz ve False döner.
+    """
+    if status not in dict(Enrollment.STATUS_CHOICES):
+        raise EnrollmentError(f"Unknown enrollment status '{status}'.")
+
+    with transaction.atomic():
+        locked = Enrollment.objects.select_for_update().only('id', 'lesson_id', 'student_id', 'status').get(id=enrollment.id)
+        old_status = locked.status
+        if old_status != status:
+            # Aynı derse ait onaylar ders satırı üzerinde sıraya girer
+            Lesson.objects.select_for_update().filter(id=locked.lesson_id).values_list('id', flat=True).first()
+            updated = Enrollment.update_lesson_counters(locked.lesson_id, old_status, status, check_capacity=True)
+            if status == 'approved' and not updated:
+                raise LessonFullError("This lesson has no free seats left.")
+            now = timezone.now()
+            waitlisted_at = now if status == 'waitlisted' else None
+            Enrollment.objects.filter(id=locked.id).update(
+                status=status, waitlisted_at=waitlisted_at, status_changed_at=now,
+            )
+            # QuerySet.update() sinyal göndermez, katalog ve profil önbellekleri burada geçersiz kılınır
+            catalogue.invalidate_lessons([locked.lesson_id])
+            invalidate_profiles([locked.student_id])
+            enrollment.waitlisted_at = waitlisted_at
+            enrollment.status_changed_at = now
+            # Onaylı bir öğrencinin çıkarılması bekleme listesindeki sıradaki öğrenciye yer açar
+            if old_status == 'approved':
+                promote_from_waitlist(locked.lesson_id)
+
+    enrollment.status = enrollment._loaded_status = status
+    return old_status != status
+
+
+def approve_enrollment(enrollment):
+    return change_enrollment_status(enrollment, 'approved')
+
+
+def reject_enrollment(enrollment):
+    return change_enrollment_status(enrollment, 'rejected')
+
+
+def bulk_change_enrollment_status(teacher, enrollment_ids, status):
+    """Öğretmenin birden fazla kaydının durumunu sabit sayıda sorguyla değiştirir.
+
+    Sahiplik ve kapasite tüm parti için tek bir kilitli sorguyla kontrol
+    edilir, durumlar tek bir ``bulk_update`` ile, ders sayaçları tek bir
+    UPDATE ile yazılır. Onaylar id sırasıyla boş yer kalana kadar uygulanır.
+    {enrollment_id: sonuç} sözlüğü döner; öğretmene ait olmayan kayıtlar
+    ``NOT_FOUND`` olarak raporlanır.
+    """
+    if status not in BULK_STATUSES:
+        raise EnrollmentError(f"Enrollments cannot be bulk changed to '{status}'.")
+    enrollment_ids = sorted(set(enrollment_ids))
+    results = dict.fromkeys(enrollment_ids, NOT_FOUND)
+    if not enrollment_ids:
+        return results
+
+    with transaction.atomic():
+        rows = (
+            Enrollment.objects.select_for_update()
+            .filter(id__in=enrollment_ids, lesson__teacher=teacher)
+            .select_related('lesson')
+            .only('id', 'status', 'student_id', 'lesson__id', 'lesson__max_students', 'lesson__approved_count')
+            .order_by('id')
+        )
+        changed = []
+        deltas = defaultdict(Counter)
+        seats_left = {}
+        now = timezone.now()
+        for enrollment in rows:
+            if enrollment.status == status:
+                results[enrollment.id] = UNCHANGED
+                continue
+            lesson = enrollment.lesson
+            seats_left.setdefault(lesson.id, lesson.max_students - lesson.approved_count)
+            if status == 'approved':
+                if seats_left[lesson.id] <= 0:
+                    results[enrollment.id] = FULL
+                    continue
+                seats_left[lesson.id] -= 1
+            for counted_status, step in ((enrollment.status, -1), (status, 1)):
+                if counted_status in Enrollment.COUNTER_FIELDS:
+                    deltas[Enrollment.COUNTER_FIELDS[counted_status]][lesson.id] += step
+            enrollment.status = status
+            # Bekleme listesinden çıkan kaydın sıra zamanı temizlenir
+            enrollment.waitlisted_at = None
+            enrollment.status_changed_at = now
+            changed.append(enrollment)
+            results[enrollment.id] = CHANGED
+
+        if changed:
+            Enrollment.objects.bulk_update(changed, ['status', 'waitlisted_at', 'status_changed_at'])
+            catalogue.invalidate_lessons({enrollment.lesson_id for enrollment in changed})
+            invalidate_profiles({enrollment.student_id for enrollment in changed})
+            # Her sayaç, derse göre değişen bir CASE ifadesiyle tek UPDATE'te güncellenir
+            Lesson.objects.filter(id__in={enrollment.lesson_id for enrollment in changed}).update(**{
+                field: F(field) + Case(
+                    *(When(id=lesson_id, then=Value(delta)) for lesson_id, delta in per_lesson.items()),
+                    default=Value(0), output_field=IntegerField(),
+                )
+                for field, per_lesson in deltas.items()
+            })
+            # Reddedilen onaylı kayıtların boşalttığı yerler bekleme listesinden doldurulur
+            for lesson_id, delta in deltas['approved_count'].items():
+                if delta < 0:
+                    promote_from_waitlist(lesson_id)
+    return results
+
+
+def join_waitlist(lesson, student):
+    """Öğrenciyi dersin bekleme listesinin sonuna ekler; (enrollment, created) döner.
+
+    Öğrencinin derste zaten bir kaydı varsa kayıt değiştirilmez.
+    """
+    return Enrollment.objects.get_or_create(
+        lesson=lesson, student=student, defaults={'status': 'waitlisted', 'waitlisted_at': timezone.now()},
+    )
+
+
+def leave_lesson(enrollment):
+    """Öğrencinin dersteki kaydını siler; boşalan yer bekleme listesine verilir."""
+    with transaction.atomic():
+        locked = Enrollment.objects.select_for_update().filter(id=enrollment.id).first()
+        if locked is None:
+            return False
+        Lesson.objects.select_for_update().filter(id=locked.lesson_id).values_list('id', flat=True).first()
+        locked.delete()
+        if locked.status == 'approved':
+            promote_from_waitlist(locked.lesson_id)
+    return True
+
+
+def promote_from_waitlist(lesson_id):
+    """Boş yerleri bekleme listesinin başındaki öğrencilerle doldurur.
+
+    Ders satırı kilitliyken, çağıran transaction içinde çalıştırılır. Boş yer
+    sayısı kadar kayıt kısmi ``enrollment_waitlist_idx`` index'inden sırayla
+    okunur ve terfi edilen kayıt sayısından bağımsız olarak dört sorguda onaylanır.
+    Onaylanan kayıtların id listesi döner.
+    """
+    free_seats = (
+        Lesson.objects.filter(id=lesson_id)
+        .annotate(free_seats=F('max_students') - F('approved_count'))
+        .values_list('free_seats', flat=True)
+        .first()
+    )
+    if not free_seats or free_seats < 0:
+        return []
+    promoted = dict(
+        Enrollment.objects.filter(lesson_id=lesson_id, status='waitlisted')
+        .order_by('waitlisted_at', 'id')
+        .values_list('id', 'student_id')[:free_seats]
+    )
+    if promoted:
+        Enrollment.objects.filter(id__in=promoted).update(
+            status='approved', waitlisted_at=None, status_changed_at=timezone.now(),
+        )
+        Lesson.objects.filter(id=lesson_id).update(approved_count=F('approved_count') + len(promoted))
+        catalogue.invalidate_lessons([lesson_id])
+        invalidate_profiles(promoted.values())
+    return list(promoted)
+
+
+def waitlist_ahead(lesson_id, waitlisted_at, enrollment_id):
+    # Listede verilen kaydın önündeki bekleyenler; (waitlisted_at, id) index aralığı üzerinden sayılır
+    return Enrollment.objects.filter(lesson_id=lesson_id, status='waitlisted').filter(
+        Q(waitlisted_at__lt=waitlisted_at) | Q(waitlisted_at=waitlisted_at, id__lt=enrollment_id)
+    )
+
+
+def waitlist_position(enrollment):
+    """Bekleyen kaydın listedeki sırasını (1'den başlayarak) döndürür."""
+    if enrollment.status != 'waitlisted':
+        return None
+    return waitlist_ahead(enrollment.lesson_id, enrollment.waitlisted_at, enrollment.id).count() + 1
+
+
+def waitlist_positions(student):
+    """Öğrencinin bekleme listesindeki tüm kayıtları için {lesson_id: sıra} döner (tek sorgu)."""
+    ahead = (
+        waitlist_ahead(OuterRef('lesson_id'), OuterRef('waitlisted_at'), OuterRef('id'))
+        .order_by().values('lesson_id').annotate(total=Count('id')).values('total')
+    )
+    rows = (
+        Enrollment.objects.filter(student=student, status='waitlisted')
+        .annotate(ahead=Subquery(ahead, output_field=IntegerField()))
+        .values_list('lesson_id', 'ahead')
+    )
+    return {lesson_id: (ahead or 0) + 1 for lesson_id, ahead in rows}
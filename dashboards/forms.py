@@ -4,7 +4,10 @@ from .models import Lesson
 class LessonForm(forms.ModelForm):
     class Meta:
         model = Lesson
-        fields = ['title', 'description', 'lesson_type', 'max_students', 'duration_weeks', 'duration_hours', 'start_date']
+        fields = [
+            'title', 'description', 'lesson_type', 'max_students', 'duration_weeks', 'duration_hours', 'start_date',
+            'schedule_mode', 'recurrence_rule',
+        ]
         widgets = {
             'title': forms.TextInput(attrs={
                 'class': 'form-control',
@@ -35,4 +38,11 @@ class LessonForm(forms.ModelForm):
                 'type': 'datetime-local',
                 'placeholder': 'Select start date and time'
             }),
+            'schedule_mode': forms.Select(attrs={
+                'class': 'form-control'
+            }),
+            'recurrence_rule': forms.TextInput(attrs={
+                'class': 'form-control',
+                'placeholder': 'e.g. FREQ=WEEKLY;BYDAY=MO,WE (optional)'
+            }),
         }
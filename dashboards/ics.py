@@ -0,0 +1,114 @@
+import hashlib
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.core import signing
+
+FEED_TOKEN_SALT = 'dashboards.calendar.feed'
+# Akış sırasında her yield'de gönderilecek etkinlik sayısı
+EVENTS_PER_CHUNK = 200
+
+
+def feed_token(user):
+    # Takvim uygulamaları oturum açamadığı için besleme adresine imzalı kullanıcı token'ı eklenir;
+    # sürüm (calendar_feed_version) artırılınca eski adresler geçersiz olur
+    return signing.dumps({'u': user.id, 'v': user.calendar_feed_version}, salt=FEED_TOKEN_SALT, compress=True)
+
+
+def read_feed_token(token, max_age=None):
+    """Token'daki (kullanıcı id, besleme sürümü) çiftini döndürür.
+
+    İmza geçersizse veya ``max_age`` verilip token ondan eskiyse ``None``
+    döner. Abonelikler sessizce durmasın diye besleme token'ları varsayılan
+    olarak süresizdir; iptal, sürümün kullanıcının güncel sürümüyle
+    eşleşmesiyle (çağıran tarafta) sağlanır.
+    """
+    try:
+        payload = signing.loads(token, salt=FEED_TOKEN_SALT, max_age=max_age)
+        return int(payload['u']), int(payload['v'])
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        return None
+
+
+def escape_text(value):
+    # RFC 5545 TEXT değerleri: ters bölü, noktalı virgül, virgül ve satır sonları kaçırılır
+    return (
+        str(value).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def fold_line(line):
+    # Satırlar 75 oktetten uzunsa CRLF + boşluk ile katlanır (çok baytlı karakterler bölünmez)
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts, current, size = [], '', 0
+    for char in line:
+        width = len(char.encode('utf-8'))
+        if size + width > (75 if not parts else 74):
+            parts.append(current)
+            current, size = '', 0
+        current += char
+        size += width
+    parts.append(current)
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def format_utc(value):
+    return value.strftime('%Y%m%dT%H%M%SZ')
+
+
+def feed_validators(lesson_rows):
+    """Beslemedeki derslerin (id, updated_at) çiftlerinden (ETag, Last-Modified) üretir.
+
+    Ders eklenip çıkarıldığında veya bir dersin programı değiştiğinde ikisi de
+    değişir; oturum satırları okunmadan hesaplanır.
+    """
+    digest = hashlib.sha1()
+    last_modified = None
+    for lesson_id, updated_at in sorted(lesson_rows):
+        digest.update(f'{lesson_id}:{updated_at.isoformat()};'.encode())
+        if last_modified is None or updated_at > last_modified:
+            last_modified = updated_at
+    return f'"{digest.hexdigest()}"', last_modified
+
+
+def render_calendar(sessions, name, host, generated_at=None):
+    """Oturumları iCalendar (.ics) metni olarak parça parça üretir.
+
+    ``sessions`` ``recurrence.Session`` akışıdır; tarih ve saatler UTC kabul
+    edilir. Bellekte aynı anda en fazla ``EVENTS_PER_CHUNK`` etkinlik tutulur.
+    """
+    stamp = format_utc(generated_at or datetime.now(dt_timezone.utc))
+    yield ''.join(fold_line(line) for line in (
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//Gym Management//Lesson Schedule//EN',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{escape_text(name)}',
+    ))
+
+    chunk = []
+    for session in sessions:
+        start = datetime.combine(session.date, session.start_time)
+        end = datetime.combine(session.date, session.end_time)
+        if end <= start:
+            end += timedelta(days=1)
+        uid = f'lesson-{session.lesson_id}-{session.date:%Y%m%d}@{host}'
+        lines = [
+            'BEGIN:VEVENT',
+            f'UID:{uid}',
+            f'DTSTAMP:{stamp}',
+            f'DTSTART:{format_utc(start)}',
+            f'DTEND:{format_utc(end)}',
+            f'SUMMARY:{escape_text(session.title)}',
+        ]
+        if session.teacher:
+            lines.append(f'DESCRIPTION:{escape_text("Teacher: " + session.teacher)}')
+        lines.append('END:VEVENT')
+        chunk.append(''.join(fold_line(line) for line in lines))
+        if len(chunk) >= EVENTS_PER_CHUNK:
+            yield ''.join(chunk)
+            chunk = []
+    chunk.append(fold_line('END:VCALENDAR'))
+    yield ''.join(chunk)
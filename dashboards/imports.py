@@ -0,0 +1,248 @@
+"""Şube açılışları için CSV'den toplu ders (ve kullanıcı, bkz. users.imports) aktarımı.
+
+Satırlar ``batch_size`` büyüklüğünde partiler halinde okunur. Her partinin
+doğrulaması satır sayısından bağımsız, sabit sayıda sorguyla yapılır (ör.
+tüm başlıklar tek bir ``title__in`` sorgusuyla), geçerli satırlar
+``bulk_create`` ile yazılır. Hatalı satırlar atlanır ve satır numarasıyla
+raporlanır.
+
+Her parti kendi transaction'ında yazılır ve commit'ten sonra kontrol
+noktası dosyasına son işlenen satır numarası kaydedilir. Yarıda kalan bir
+aktarım aynı komutla tekrar çalıştırıldığında kaldığı yerden devam eder.
+"""
+import csv
+import json
+import os
+from collections import defaultdict
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from users.profiles import invalidate_profiles
+from . import catalogue
+from .models import Lesson, LessonDay
+from .recurrence import iter_sessions
+from .schedule import IntervalTree, find_conflicts_in_batch, session_interval
+
+DEFAULT_BATCH_SIZE = 500
+
+
+class ImportFileError(Exception):
+    """CSV dosyası okunamadığında veya zorunlu kolonlar eksik olduğunda fırlatılır."""
+
+
+def error_messages(error):
+    # ValidationError alan sözlüğü veya liste taşıyabilir; rapor için düz metne çevrilir
+    if hasattr(error, 'message_dict'):
+        return '; '.join(f'{field}: {" ".join(messages)}' for field, messages in error.message_dict.items())
+    return ' '.join(error.messages)
+
+
+def read_batches(path, required_columns, batch_size, start_after=0):
+    """(satır numarası, satır sözlüğü) listelerini parti parti üretir.
+
+    Satır numaraları başlıktan sonraki ilk veri satırı 1 olacak şekilde
+    sayılır; ``start_after`` ve önceki satırlar atlanır.
+    """
+    with open(path, newline='', encoding='utf-8-sig') as handle:
+        reader = csv.DictReader(handle)
+        missing = set(required_columns) - set(reader.fieldnames or ())
+        if missing:
+            raise ImportFileError(f"Missing required column(s): {', '.join(sorted(missing))}.")
+        batch = []
+        for number, row in enumerate(reader, start=1):
+            if number <= start_after:
+                continue
+            batch.append((number, {key: (value or '').strip() for key, value in row.items() if key}))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def load_checkpoint(path):
+    try:
+        with open(path, encoding='utf-8') as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return None
+
+
+def save_checkpoint(path, data):
+    # Önce geçici dosyaya yazılıp taşınır; yarım yazılmış bir kontrol noktası bırakılmaz
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as handle:
+        json.dump(data, handle)
+    os.replace(temporary, path)
+
+
+def run_import(importer, path, batch_size=DEFAULT_BATCH_SIZE, dry_run=False, checkpoint_path=None, restart=False,
+               on_batch=None):
+    """Dosyayı ``importer`` ile aktarır; {'created', 'rejected', 'errors', 'resumed_from'} döner.
+
+    ``importer`` ``columns``, ``validate_batch(rows)`` ve ``create(objects)``
+    sağlar. ``validate_batch`` (geçerli nesneler, {satır: hata}) döndürür.
+    Kuru çalıştırmada (dry run) hiçbir şey yazılmaz ve kontrol noktası
+    kullanılmaz.
+    """
+    checkpoint_path = checkpoint_path or f'{path}.checkpoint'
+    state = None if dry_run or restart else load_checkpoint(checkpoint_path)
+    if state and state.get('source') != os.path.abspath(path):
+        raise ImportFileError(f"Checkpoint {checkpoint_path} belongs to another file; use --restart.")
+    state = state or {'source': os.path.abspath(path), 'row': 0, 'created': 0, 'rejected': 0}
+    resumed_from = state['row']
+
+    errors = {}
+    for batch in read_batches(path, importer.columns, batch_size, start_after=state['row']):
+        objects, batch_errors = importer.validate_batch(batch)
+        if not dry_run:
+            with transaction.atomic():
+                importer.create(objects)
+        errors.update(batch_errors)
+        state['row'] = batch[-1][0]
+        state['created'] += len(objects)
+        state['rejected'] += len(batch_errors)
+        if not dry_run:
+            save_checkpoint(checkpoint_path, state)
+        if on_batch:
+            on_batch(state)
+
+    if not dry_run and os.path.exists(checkpoint_path):
+        # Tamamlanan aktarım bir sonraki çalıştırmada baştan başlar
+        os.remove(checkpoint_path)
+    return {'created': state['created'], 'rejected': state['rejected'], 'errors': errors, 'resumed_from': resumed_from}
+
+
+def write_error_report(path, errors):
+    with open(path, 'w', newline='', encoding='utf-8') as handle:
+        writer = csv.writer(handle)
+        writer.writerow(['row', 'error'])
+        writer.writerows(sorted(errors.items()))
+
+
+class LessonImporter:
+    """Dersleri toplu doğrular ve yazar.
+
+    ``Lesson.save()`` her satır için başlık ve çakışma sorguları atıp ders
+    günlerini ayrı ayrı yazar. Burada aynı kurallar parti başına uygulanır:
+    başlıklar ve öğretmenler birer sorguyla, öğretmenlerin mevcut oturumları
+    ``iter_sessions`` ile bir kez okunur; partinin kendi içindeki çakışmalar
+    ``find_conflicts_in_batch`` ile bulunur.
+    """
+
+    columns = ('title', 'description', 'lesson_type', 'teacher', 'max_students', 'duration_weeks', 'duration_hours',
+               'start_date')
+    # Satırdan doğrudan alınan alanlar; öğretmen kullanıcı adından çözülür
+    fields = ('title', 'description', 'lesson_type', 'max_students', 'duration_weeks', 'duration_hours', 'start_date',
+              'schedule_mode', 'recurrence_rule')
+
+    def __init__(self):
+        # Kuru çalıştırmada önceki partiler yazılmadığı için dosya içi tekrarlar burada izlenir
+        self.seen_titles = set()
+
+    def build(self, row):
+        lesson = Lesson(**{field: row.get(field, '') for field in self.fields})
+        lesson.schedule_mode = lesson.schedule_mode or Lesson.MATERIALIZED
+        lesson.clean_fields(exclude=['teacher'])
+        if timezone.is_naive(lesson.start_date):
+            lesson.start_date = timezone.make_aware(lesson.start_date)
+        lesson.clean_capacity()
+        lesson.get_recurrence_rule()
+        lesson.end_date = lesson.start_date + timedelta(weeks=lesson.duration_weeks)
+        return lesson
+
+    def validate_batch(self, rows):
+        errors, candidates = {}, []
+        for number, row in rows:
+            try:
+                lesson = self.build(row)
+            except ValidationError as error:
+                errors[number] = error_messages(error)
+                continue
+            if lesson.title in self.seen_titles:
+                errors[number] = "title: Duplicate title in the import file."
+                continue
+            self.seen_titles.add(lesson.title)
+            candidates.append((number, row['teacher'], lesson))
+
+        # Başlık ve öğretmen kontrolleri partideki satır sayısından bağımsız olarak birer sorgudur
+        taken = set(Lesson.objects.filter(title__in=[lesson.title for _, _, lesson in candidates])
+                    .values_list('title', flat=True))
+        teachers = dict(
+            get_user_model().objects.filter(username__in={username for _, username, _ in candidates}, role='teacher')
+            .values_list('username', 'id')
+        )
+        valid = []
+        for number, username, lesson in candidates:
+            if lesson.title in taken:
+                errors[number] = "title: A lesson with this title already exists."
+            elif username not in teachers:
+                errors[number] = f"teacher: No teacher with username '{username}'."
+            else:
+                lesson.teacher_id = teachers[username]
+                valid.append((number, lesson))
+
+        conflicts = self.find_conflicts(valid, {teacher_id: username for username, teacher_id in teachers.items()})
+        errors.update(conflicts)
+        return [lesson for number, lesson in valid if number not in conflicts], errors
+
+    def find_conflicts(self, valid, usernames):
+        """Hem mevcut oturumlarla hem de aynı partideki derslerle çakışan satırları döndürür.
+
+        ``usernames`` {öğretmen id: kullanıcı adı} sözlüğüdür; oturumlar
+        öğretmeni kullanıcı adıyla taşır.
+        """
+        schedules = {number: lesson.build_lesson_schedule() for number, lesson in valid}
+        dates = set()
+        for schedule in schedules.values():
+            for date in schedule:
+                dates.update((date - timedelta(days=1), date, date + timedelta(days=1)))
+        existing = defaultdict(list)
+        for session in iter_sessions(dates=dates, teacher_id__in=list(usernames)):
+            existing[session.teacher].append(
+                (*session_interval(session.date, session.start_time, session.end_time), session.title)
+            )
+        trees = {username: IntervalTree(intervals) for username, intervals in existing.items()}
+
+        errors, new_sessions = {}, defaultdict(list)
+        for number, lesson in valid:
+            tree = trees.get(usernames[lesson.teacher_id])
+            sessions = []
+            for date, (start_time, end_time) in sorted(schedules[number].items()):
+                start, end = session_interval(date, start_time, end_time)
+                overlapping = tree.overlapping(start, end) if tree else []
+                if overlapping:
+                    errors[number] = (
+                        f"start_date: Overlaps the teacher's existing session of '{overlapping[0][2]}' "
+                        f"on {start:%Y-%m-%d %H:%M}."
+                    )
+                    break
+                sessions.append((start, end, number))
+            else:
+                new_sessions[lesson.teacher_id].extend(sessions)
+
+        # Partinin kendi içindeki çakışmalarda dosyada sonra gelen satır reddedilir
+        for sessions in new_sessions.values():
+            for first, second in find_conflicts_in_batch(sessions):
+                if first == second or first in errors or second in errors:
+                    continue
+                errors[max(first, second)] = f"start_date: Overlaps row {min(first, second)} of the import file."
+        return errors
+
+    def create(self, lessons):
+        if not lessons:
+            return
+        Lesson.objects.bulk_create(lessons)
+        LessonDay.objects.bulk_create(
+            [
+                LessonDay(lesson=lesson, date=date, start_time=start_time, end_time=end_time)
+                for lesson in lessons if lesson.schedule_mode == Lesson.MATERIALIZED
+                for date, (start_time, end_time) in lesson.build_lesson_schedule().items()
+            ],
+            batch_size=DEFAULT_BATCH_SIZE,
+        )
+        # bulk_create sinyal göndermez; katalog ve öğretmen profilleri parti başına bir kez geçersiz kılınır
+        catalogue.invalidate_lessons()
+        invalidate_profiles({lesson.teacher_id for lesson in lessons})
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+from dashboards import imports
+
+# Hata raporu dosyası verilmezse ekrana yazılan en fazla hata sayısı
+SHOWN_ERRORS = 20
+
+
+class ImportCommand(BaseCommand):
+    """import_lessons ve import_users komutlarının ortak seçenekleri ve çıktısı."""
+
+    # Alt komutlar kendi içe aktarıcı sınıflarını verebilir
+    importer_class = imports.LessonImporter
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', help="Path of the CSV file (UTF-8, first line is the header).")
+        parser.add_argument('--batch-size', type=int, default=imports.DEFAULT_BATCH_SIZE,
+                            help="Rows validated and inserted per batch and transaction.")
+        parser.add_argument('--dry-run', action='store_true', help="Validate every row without writing anything.")
+        parser.add_argument('--errors', help="Write every rejected row as (row, error) to this CSV file.")
+        parser.add_argument('--checkpoint', help="Checkpoint file (default: <csv_file>.checkpoint).")
+        parser.add_argument('--restart', action='store_true', help="Ignore an existing checkpoint and start over.")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be positive.")
+
+        def progress(state):
+            self.stdout.write(f"  row {state['row']}: {state['created']} valid, {state['rejected']} rejected")
+
+        try:
+            result = imports.run_import(
+                self.importer_class(), options['csv_file'], batch_size=options['batch_size'],
+                dry_run=options['dry_run'], checkpoint_path=options['checkpoint'], restart=options['restart'],
+                on_batch=progress if options['verbosity'] > 1 else None,
+            )
+        except (OSError, imports.ImportFileError) as error:
+            raise CommandError(str(error))
+
+        if result['resumed_from']:
+            self.stdout.write(f"Resumed after row {result['resumed_from']} from the checkpoint.")
+        errors = result['errors']
+        if options['errors']:
+            imports.write_error_report(options['errors'], errors)
+        else:
+            for row, error in sorted(errors.items())[:SHOWN_ERRORS]:
+                self.stderr.write(f"Row {row}: {error}")
+            if len(errors) > SHOWN_ERRORS:
+                self.stderr.write(f"... and {len(errors) - SHOWN_ERRORS} more; use --errors to save them all.")
+
+        verb = "Validated" if options['dry_run'] else "Imported"
+        message = f"{verb} {result['created']} row(s), rejected {result['rejected']}."
+        self.stdout.write(self.style.WARNING(message) if result['rejected'] else self.style.SUCCESS(message))
@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from time import perf_counter
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection, transaction
+from dashboards.models import Lesson, LessonDay
+from dashboards.recurrence import iter_sessions
+from users.models import User
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares materialized LessonDay rows with lazily expanded weekly rules: "
+        "storage, calendar window reads, conflict-style date reads and rescheduling. "
+        "All data is created inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lessons', type=int, default=200, help="Lessons created per mode.")
+        parser.add_argument('--weeks', type=int, default=52, help="duration_weeks of every lesson.")
+        parser.add_argument('--window-days', type=int, default=31, help="Calendar window size in days.")
+        parser.add_argument('--repeat', type=int, default=5, help="Timed repetitions per read.")
+
+    def handle(self, *args, **options):
+        self.options = options
+        for mode in (Lesson.MATERIALIZED, Lesson.RECURRING):
+            try:
+                with transaction.atomic():
+                    self.report(mode, self.run(mode))
+                    raise Rollback
+            except Rollback:
+                pass
+
+    def run(self, mode):
+        lessons, weeks = self.options['lessons'], self.options['weeks']
+        start = datetime(2030, 1, 7, 6, tzinfo=dt_timezone.utc)
+        teacher = User.objects.create(username=f'benchmark-{mode}', role='teacher')
+
+        # Çakışma kontrolü ölçümü bozmasın diye dersler save() yerine bulk_create ile eklenir;
+        # her ders haftanın farklı bir saatine yerleştirilir
+        created = Lesson.objects.bulk_create([
+            Lesson(
+                title=f'Benchmark {mode} {index}', description='Benchmark', lesson_type='group', teacher=teacher,
+                max_students=20, duration_weeks=weeks, duration_hours=1, schedule_mode=mode,
+                start_date=start + timedelta(days=index % 7, hours=index // 7 % 16),
+                end_date=start + timedelta(days=index % 7, hours=index // 7 % 16, weeks=weeks),
+            )
+            for index in range(lessons)
+        ])
+        elapsed = self.timed(lambda: [lesson.create_lesson_schedule() for lesson in created], repeat=1)
+        results = {'rows': LessonDay.objects.filter(lesson__teacher=teacher).count(), 'create': elapsed}
+        results['bytes'] = self.table_bytes()
+
+        window_start = start.date() + timedelta(weeks=weeks // 2)
+        window_end = window_start + timedelta(days=self.options['window_days'])
+        results['window'] = self.timed(lambda: list(iter_sessions(window_start, window_end, teacher_id=teacher.id)))
+        results['sessions'] = len(list(iter_sessions(window_start, window_end, teacher_id=teacher.id)))
+
+        # 52 haftalık yeni bir dersin çakışma kontrolünün okuduğu günler
+        dates = {start.date() + timedelta(weeks=week, days=offset) for week in range(weeks) for offset in (-1, 0, 1)}
+        results['dates'] = self.timed(lambda: list(iter_sessions(dates=dates, teacher_id=teacher.id)))
+
+        # Tüm derslerin saatini kaydırmak: materialize modda her satır yeniden yazılır
+        for lesson in created:
+            lesson.start_date += timedelta(minutes=30)
+        results['reschedule'] = self.timed(lambda: [lesson.create_lesson_schedule() for lesson in created], repeat=1)
+        return results
+
+    def timed(self, function, repeat=None):
+        timings = []
+        for _ in range(repeat or self.options['repeat']):
+            started = perf_counter()
+            function()
+            timings.append(perf_counter() - started)
+        return min(timings) * 1000
+
+    def table_bytes(self):
+        # dbstat sanal tablosu sadece SQLite'ta (ve derlemede açıksa) vardır
+        if connection.vendor != 'sqlite':
+            return None
+        with connection.cursor() as cursor:
+            try:
+                cursor.execute(
+                    "SELECT SUM(pgsize) FROM dbstat WHERE name = %s OR name IN "
+                    "(SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = %s)",
+                    [LessonDay._meta.db_table, LessonDay._meta.db_table],
+                )
+            except DatabaseError:
+                return None
+            return cursor.fetchone()[0]
+
+    def report(self, mode, results):
+        size = f"{results['bytes'] / 1024:.0f} KiB" if results['bytes'] is not None else 'n/a'
+        window = f"{self.options['window_days']}-day window read:"
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"{mode} ({self.options['lessons']} lessons x {self.options['weeks']} weeks)"
+        ))
+        self.stdout.write(f"  {'LessonDay rows:':<26}{results['rows']}")
+        self.stdout.write(f"  {'LessonDay table+indexes:':<26}{size}")
+        self.stdout.write(f"  {'build schedules:':<26}{results['create']:.1f} ms")
+        self.stdout.write(f"  {window:<26}{results['window']:.1f} ms ({results['sessions']} sessions)")
+        self.stdout.write(f"  {'conflict date read:':<26}{results['dates']:.1f} ms")
+        self.stdout.write(f"  {'reschedule all lessons:':<26}{results['reschedule']:.1f} ms")
@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from dashboards import benchmarks
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Requests every URL in the URL configuration through the test client as the matching role and "
+        "reports p50/p95/p99 latency, queries per request and peak memory per view. Everything the views "
+        "write is rolled back. Use --output to save a JSON baseline and --compare to diff against one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20, help="Timed requests per view.")
+        parser.add_argument('--view', action='append', dest='views', help="Only benchmark this URL name (repeatable).")
+        parser.add_argument('--output', help="Write the results as JSON to this file.")
+        parser.add_argument('--compare', help="Baseline JSON file to compare the results with.")
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help="Allowed relative p95 increase before a view counts as a regression.")
+        parser.add_argument('--fail-on-regression', action='store_true',
+                            help="Exit with an error when --compare finds a regression.")
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError("--repeat must be positive.")
+        baseline = benchmarks.load(options['compare']) if options['compare'] else None
+        try:
+            with transaction.atomic():
+                result = benchmarks.run_benchmarks(options['repeat'], options['views'])
+                raise Rollback
+        except Rollback:
+            pass
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        self.report(result, baseline)
+        if options['output']:
+            benchmarks.save(options['output'], result)
+            self.stdout.write(f"Saved results to {options['output']}.")
+
+        if baseline is not None:
+            regressions = benchmarks.compare(baseline, result, options['threshold'])
+            for name, reason in regressions:
+                self.stdout.write(self.style.ERROR(f"  regression: {name}: {reason}"))
+            if not regressions:
+                self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
+            elif options['fail_on_regression']:
+                raise CommandError(f"{len(regressions)} regression(s) against {options['compare']}.")
+
+    def report(self, result, baseline):
+        rows = ', '.join(f'{name}={count}' for name, count in result['meta']['rows'].items())
+        self.stdout.write(self.style.MIGRATE_HEADING(f"{len(result['views'])} views, {rows}"))
+        self.stdout.write(
+            f"  {'view':<32}{'role':<10}{'status':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+            f"{'queries':>9}{'peak KiB':>10}"
+        )
+        before = (baseline or {}).get('views', {})
+        for name, view in sorted(result['views'].items()):
+            line = (
+                f"  {name:<32}{view['role']:<10}{view['status']:>7}{view['p50_ms']:>10.1f}{view['p95_ms']:>10.1f}"
+                f"{view['p99_ms']:>10.1f}{view['queries']:>9}{view['peak_kib']:>10.1f}"
+            )
+            if name in before:
+                line += f"  (p95 was {before[name]['p95_ms']:.1f}, queries {before[name]['queries']})"
+            self.stdout.write(line)
+        for name, reason in sorted(result['skipped'].items()):
+            self.stdout.write(f"  skipped {name}: {reason}")
@@ -0,0 +1,226 @@
+import random
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from dashboards import catalogue
+from dashboards.imports import LessonImporter
+from dashboards.models import Attendance, Enrollment, Lesson
+from dashboards.recurrence import iter_sessions
+from sales.models import Cart, CartItem, Order, Product
+from users.models import Skill, User
+from users.skill_index import invalidate_index
+
+SKILL_NAMES = (
+    'Yoga', 'Pilates', 'Boxing', 'Spinning', 'CrossFit', 'Zumba', 'Kickboxing', 'HIIT', 'Swimming',
+    'Weightlifting', 'Mobility', 'Barre', 'Tai Chi', 'Rowing', 'Calisthenics',
+)
+LESSON_LEVELS = ('Intro', 'Beginner', 'Intermediate', 'Advanced', 'Open')
+PRODUCT_NAMES = ('Protein Bar', 'Water Bottle', 'Yoga Mat', 'Gym Towel', 'Resistance Band', 'Shaker', 'Gloves')
+# Öğretmen başına çakışmayan haftalık saat dilimleri: 7 gün x 06:00-20:00 arası iki saatlik bloklar
+SLOT_HOURS = tuple(range(6, 22, 2))
+WEEKLY_SLOTS = 7 * len(SLOT_HOURS)
+# Kayıt durumlarının ağırlıkları; dolu derslerde onay yerine bekleme listesi yazılır
+STATUS_WEIGHTS = {'approved': 50, 'requested': 20, 'rejected': 15, 'waitlisted': 15}
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates a seeded, realistic dataset for benchmarks: users by role, skills, lessons with "
+        "schedules, enrollments in every status, attendance, products, carts and orders. Counts are "
+        "multiplied by --scale; the same --seed always produces the same data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--scale', type=float, default=1.0, help="Multiplier for every count below.")
+        parser.add_argument('--prefix', default='gen', help="Prefix of generated usernames and titles.")
+        parser.add_argument('--managers', type=int, default=2)
+        parser.add_argument('--teachers', type=int, default=20)
+        parser.add_argument('--students', type=int, default=500)
+        parser.add_argument('--lessons', type=int, default=200)
+        parser.add_argument('--enrollments-per-student', type=int, default=4)
+        parser.add_argument('--products', type=int, default=30)
+        parser.add_argument('--orders', type=int, default=400)
+        parser.add_argument('--attendance-rate', type=float, default=0.7,
+                            help="Share of approved students checked in to each past session.")
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.prefix = options['prefix']
+        counts = {
+            name: max(1, round(options[name] * options['scale']))
+            for name in ('managers', 'teachers', 'students', 'lessons', 'products', 'orders')
+        }
+        if counts['lessons'] > counts['teachers'] * WEEKLY_SLOTS:
+            raise CommandError(f"At most {WEEKLY_SLOTS} lessons per teacher fit into a week without conflicts.")
+        if User.objects.filter(username__startswith=f'{self.prefix}-').exists():
+            raise CommandError(f"Users with the prefix '{self.prefix}-' already exist; choose another --prefix.")
+
+        self.now = timezone.now()
+        with transaction.atomic():
+            skills = self.create_skills()
+            users = self.create_users(counts, skills)
+            lessons = self.create_lessons(counts['lessons'], users['teacher'])
+            enrollments = self.create_enrollments(lessons, users['student'], options['enrollments_per_student'])
+            attendances = self.create_attendances(lessons, enrollments, options['attendance_rate'])
+            products = self.create_products(counts['products'])
+            orders = self.create_orders(counts['orders'], users['student'], products)
+            Lesson.objects.filter(id__in=[lesson.id for lesson in lessons]).rebuild_counters()
+            catalogue.invalidate_lessons()
+            invalidate_index()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {sum(len(group) for group in users.values())} users, {len(skills)} skills, "
+            f"{len(lessons)} lessons, {len(enrollments)} enrollments, {attendances} attendances, "
+            f"{len(products)} products and {orders} orders (seed {options['seed']})."
+        ))
+
+    def spread(self, days_back, days_forward=0):
+        # Şu andan verilen gün aralığında rastgele bir an
+        seconds = self.random.uniform(-days_back * 86400, days_forward * 86400)
+        return self.now + timedelta(seconds=seconds)
+
+    def create_skills(self):
+        names = [f'{self.prefix} {name}' for name in SKILL_NAMES]
+        return Skill.objects.bulk_create(Skill(name=name) for name in names)
+
+    def create_users(self, counts, skills):
+        # Şifre hash'i bilerek yavaştır; tüm test kullanıcıları için bir kez hesaplanır
+        password = make_password(self.prefix)
+        users = {}
+        for role in ('manager', 'teacher', 'student'):
+            users[role] = User.objects.bulk_create(
+                (
+                    User(
+                        username=f'{self.prefix}-{role}-{index}', role=role, password=password,
+                        first_name=role.capitalize(), last_name=str(index),
+                        email=f'{self.prefix}-{role}-{index}@example.com', date_joined=self.spread(720),
+                    )
+                    for index in range(counts[f'{role}s'])
+                ),
+                batch_size=BATCH_SIZE,
+            )
+        User.skills.through.objects.bulk_create(
+            [
+                User.skills.through(user_id=teacher.id, skill_id=skill.id)
+                for teacher in users['teacher'] for skill in self.random.sample(skills, self.random.randint(1, 3))
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        return users
+
+    def create_lessons(self, count, teachers):
+        # Her öğretmen farklı (gün, saat) dilimlerini kullanır; haftalık tekrarlar da bu yüzden çakışmaz
+        slots = {teacher.id: self.random.sample(range(WEEKLY_SLOTS), WEEKLY_SLOTS) for teacher in teachers}
+        this_week = timezone.localdate(self.now) - timedelta(days=timezone.localdate(self.now).weekday())
+        lessons = []
+        for index in range(count):
+            teacher = teachers[index % len(teachers)]
+            slot = slots[teacher.id].pop()
+            weeks_offset = self.random.randint(-8, 6)
+            day = this_week + timedelta(weeks=weeks_offset, days=slot // len(SLOT_HOURS))
+            private = self.random.random() < 0.2
+            recurring = self.random.random() < 0.3
+            lesson = Lesson(
+                title=f'{self.prefix} {self.random.choice(LESSON_LEVELS)} {self.random.choice(SKILL_NAMES)} {index}',
+                description=f'{self.random.choice(SKILL_NAMES)} session for all levels.',
+                lesson_type='private' if private else 'group',
+                teacher=teacher,
+                max_students=1 if private else self.random.randint(6, 30),
+                duration_weeks=self.random.randint(4, 12),
+                duration_hours=self.random.randint(1, 2),
+                start_date=timezone.make_aware(datetime.combine(day, time(SLOT_HOURS[slot % len(SLOT_HOURS)]))),
+                schedule_mode=Lesson.RECURRING if recurring else Lesson.MATERIALIZED,
+                recurrence_rule=f'INTERVAL={self.random.randint(1, 2)}' if recurring else '',
+            )
+            lesson.end_date = lesson.start_date + timedelta(weeks=lesson.duration_weeks)
+            lessons.append(lesson)
+        for start in range(0, len(lessons), BATCH_SIZE):
+            LessonImporter().create(lessons[start:start + BATCH_SIZE])
+        return lessons
+
+    def create_enrollments(self, lessons, students, per_student):
+        approved = dict.fromkeys((lesson.id for lesson in lessons), 0)
+        statuses, weights = zip(*STATUS_WEIGHTS.items())
+        enrollments = []
+        for student in students:
+            for lesson in self.random.sample(lessons, min(per_student, len(lessons))):
+                status = self.random.choices(statuses, weights)[0]
+                # Bekleme listesi sadece dolu derslerde anlamlıdır
+                full = approved[lesson.id] >= lesson.max_students
+                if status == 'approved' and full:
+                    status = 'waitlisted'
+                elif status == 'waitlisted' and not full:
+                    status = 'requested'
+                if status == 'approved':
+                    approved[lesson.id] += 1
+                created_at = min(self.spread(60), lesson.start_date)
+                enrollments.append(Enrollment(
+                    lesson=lesson, student=student, status=status, created_at=created_at,
+                    status_changed_at=created_at if status == 'requested' else created_at + timedelta(hours=6),
+                    waitlisted_at=created_at if status == 'waitlisted' else None,
+                ))
+        return Enrollment.objects.bulk_create(enrollments, batch_size=BATCH_SIZE)
+
+    def create_attendances(self, lessons, enrollments, rate):
+        members = {}
+        for enrollment in enrollments:
+            if enrollment.status == 'approved':
+                members.setdefault(enrollment.lesson_id, []).append(enrollment.student_id)
+        today = timezone.localdate(self.now)
+        attendances = []
+        for session in iter_sessions(
+            window_end=today, chunk_size=BATCH_SIZE, id__in=[lesson.id for lesson in lessons],
+        ):
+            checked_in_at = timezone.make_aware(datetime.combine(session.date, session.start_time))
+            for student_id in members.get(session.lesson_id, ()):
+                if self.random.random() < rate:
+                    attendances.append(Attendance(
+                        lesson_id=session.lesson_id, student_id=student_id, session_date=session.date,
+                        checked_in_at=checked_in_at - timedelta(minutes=self.random.randint(0, 15)),
+                        recorded_at=checked_in_at, source=self.random.choice(('door', 'door', 'kiosk')),
+                    ))
+        Attendance.objects.bulk_create(attendances, batch_size=BATCH_SIZE)
+        return len(attendances)
+
+    def create_products(self, count):
+        # Ürün şablonları resim adresi beklediği için her ürüne (dosyası olmayan) bir resim yolu verilir
+        return Product.objects.bulk_create(
+            Product(
+                name=f'{self.prefix} {self.random.choice(PRODUCT_NAMES)} {index}', description='Gym shop item.',
+                price=Decimal(self.random.randint(300, 9000)) / 100, stock=self.random.randint(0, 200),
+                image=f'products/{self.prefix}-{index}.jpg',
+            )
+            for index in range(count)
+        )
+
+    def create_orders(self, count, students, products):
+        carts = Cart.objects.bulk_create(Cart(user=student) for student in students)
+        CartItem.objects.bulk_create(
+            [
+                CartItem(cart=cart, product=product, quantity=self.random.randint(1, 3))
+                for cart in self.random.sample(carts, len(carts) // 3)
+                for product in self.random.sample(products, min(len(products), self.random.randint(1, 3)))
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        orders = Order.objects.bulk_create(
+            (
+                Order(
+                    user=self.random.choice(students), total_amount=Decimal(self.random.randint(500, 30000)) / 100,
+                    address='1 Generated Street', city=self.random.choice(('Istanbul', 'Ankara', 'Izmir')),
+                    postal_code=f'{self.random.randint(10000, 99999)}', country='TR',
+                )
+                for _ in range(count)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        # created_at auto_now_add olduğu için geçmişe yayılmış tarihler ekleme sonrası yazılır
+        for order in orders:
+            order.created_at = self.spread(90)
+        Order.objects.bulk_update(orders, ['created_at'], batch_size=BATCH_SIZE)
+        return len(orders)
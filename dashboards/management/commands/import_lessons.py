@@ -0,0 +1,9 @@
+from dashboards.management.commands._import import ImportCommand
+
+
+class Command(ImportCommand):
+    help = (
+        "Imports lessons from a CSV file with the columns title, description, lesson_type, teacher (username), "
+        "max_students, duration_weeks, duration_hours, start_date and optionally schedule_mode and "
+        "recurrence_rule. Rows are validated and inserted in batches; invalid rows are skipped and reported."
+    )
@@ -0,0 +1,119 @@
+from datetime import datetime, time
+from threading import Barrier, Lock, Thread
+from time import perf_counter
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from dashboards.benchmarks import get_host
+from dashboards.models import Attendance, Enrollment, Lesson
+from sales.models import Cart
+
+
+class Command(BaseCommand):
+    help = (
+        "Load tests door check-in: every member of a lesson is scanned in at the same moment from its "
+        "own kiosk thread (signed in as the lesson's teacher), then scanned again to exercise idempotency. Reports latency percentiles and verifies "
+        "that exactly one attendance row per member was written. Test data is deleted afterwards. On SQLite, run it "
+        "with --settings=gym_management.settings_loadtest (WAL, IMMEDIATE transactions)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--members', type=int, default=300, help="Approved members scanning in concurrently.")
+        parser.add_argument('--scans', type=int, default=2, help="Scans per member (extra scans are duplicates).")
+        parser.add_argument('--keep', action='store_true', help="Keep the generated lesson, members and attendance.")
+
+    def handle(self, *args, **options):
+        if options['members'] < 1 or options['scans'] < 1:
+            raise CommandError("--members and --scans must be positive.")
+        # Eşzamanlı yazıcılar sadece IMMEDIATE kipte sıraya girer; aksi halde "database is locked" ölçülür
+        if connection.vendor == 'sqlite' and connection.settings_dict['OPTIONS'].get('transaction_mode') != 'IMMEDIATE':
+            raise CommandError("Run the load test with --settings=gym_management.settings_loadtest.")
+        lesson, members = self.create_data(options['members'])
+        clients = []
+        try:
+            for member in members:
+                # Kapı kioskları dersin öğretmeniyle oturum açar ve öğrenciyi student_id ile gönderir
+                client = Client(HTTP_HOST=get_host())
+                client.force_login(lesson.teacher)
+                clients.append((client, member.id))
+            url = reverse('check_in', args=[lesson.id])
+
+            for wave in range(options['scans']):
+                results = self.run_wave(clients, url)
+                self.report(f"wave {wave + 1}", results)
+
+            rows = Attendance.objects.filter(lesson=lesson).count()
+            if rows != len(members):
+                raise CommandError(f"Expected {len(members)} attendance rows, found {rows}.")
+            self.stdout.write(self.style.SUCCESS(f"{rows} attendance rows for {len(members)} members."))
+        finally:
+            for client, _ in clients:
+                client.logout()
+            if not options['keep']:
+                get_user_model().objects.filter(id__in=[lesson.teacher_id, *(member.id for member in members)]).delete()
+
+    def create_data(self, count):
+        User = get_user_model()
+        prefix = f'loadtest-{timezone.now():%Y%m%d%H%M%S%f}'
+        teacher = User.objects.create(username=f'{prefix}-coach', role='teacher')
+        # Tüm kiosklar aynı öğretmen hesabını kullanır; sepet (user tekil değil) eşzamanlı oluşturulmasın diye önceden açılır
+        Cart.objects.create(user=teacher)
+        members = User.objects.bulk_create(User(username=f'{prefix}-{index}', role='student') for index in range(count))
+        # Bugünün oturumu olan bir ders; sayaçlar bulk_create sonrası toplu hesaplanır
+        lesson = Lesson.objects.create(
+            title=f'{prefix} peak class', description='Check-in load test', lesson_type='group',
+            teacher=teacher, max_students=max(count, 2), duration_weeks=1, duration_hours=1,
+            start_date=timezone.make_aware(datetime.combine(timezone.localdate(), time(18))),
+        )
+        Enrollment.objects.bulk_create(Enrollment(lesson=lesson, student=member, status='approved') for member in members)
+        Lesson.objects.filter(id=lesson.id).rebuild_counters()
+        return lesson, members
+
+    def run_wave(self, clients, url):
+        # Tüm iş parçacıkları bariyerde bekler, istekler aynı anda gönderilir
+        barrier = Barrier(len(clients))
+        lock = Lock()
+        results = []
+
+        def scan(client, student_id):
+            try:
+                barrier.wait()
+                started = perf_counter()
+                status = client.post(url, {'student_id': student_id}).status_code
+                elapsed = perf_counter() - started
+                with lock:
+                    results.append((status, elapsed))
+            finally:
+                connection.close()
+
+        started = perf_counter()
+        threads = [Thread(target=scan, args=client) for client in clients]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results, perf_counter() - started
+
+    def report(self, name, wave):
+        results, elapsed = wave
+        latencies = sorted(latency * 1000 for _, latency in results)
+        statuses = {}
+        for status, _ in results:
+            statuses[status] = statuses.get(status, 0) + 1
+
+        def percentile(value):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * value))]
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"{name}: {len(results)} concurrent check-ins"))
+        self.stdout.write(f"  {'statuses:':<14}{', '.join(f'{key}={value}' for key, value in sorted(statuses.items()))}")
+        self.stdout.write(f"  {'throughput:':<14}{len(results) / elapsed:.0f} req/s")
+        self.stdout.write(
+            f"  {'latency:':<14}p50 {percentile(0.5):.1f} ms, p95 {percentile(0.95):.1f} ms, "
+            f"p99 {percentile(0.99):.1f} ms, max {latencies[-1]:.1f} ms"
+        )
+        failed = sum(count for status, count in statuses.items() if status >= 400)
+        if failed:
+            raise CommandError(f"{failed} check-in(s) failed.")
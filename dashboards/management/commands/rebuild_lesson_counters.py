@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F
+from dashboards import catalogue
+from dashboards.models import Lesson
+
+
+class Command(BaseCommand):
+    help = "Rebuilds Lesson.approved_count and Lesson.requested_count from Enrollment rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help="Only report lessons whose counters drifted, exit with an error if any are found.",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            drifted = Lesson.objects.with_actual_counts().exclude(
+                approved_count=F('actual_approved'),
+                requested_count=F('actual_requested'),
+            ).values_list('id', 'title', 'approved_count', 'actual_approved', 'requested_count', 'actual_requested')
+            drifted = list(drifted)
+
+            for lesson_id, title, approved, actual_approved, requested, actual_requested in drifted:
+                self.stdout.write(
+                    f"Lesson #{lesson_id} '{title}': approved {approved} -> {actual_approved}, "
+                    f"requested {requested} -> {actual_requested}"
+                )
+
+            if options['check']:
+                if drifted:
+                    raise CommandError(f"{len(drifted)} lesson(s) have drifted counters.")
+                self.stdout.write(self.style.SUCCESS("All lesson counters are consistent."))
+                return
+
+            Lesson.objects.filter(id__in=[row[0] for row in drifted]).rebuild_counters()
+            catalogue.invalidate_lessons(row[0] for row in drifted)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt counters for {len(drifted)} lesson(s)."))
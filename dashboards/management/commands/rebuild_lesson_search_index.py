@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from dashboards.search import fts_available, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the SQLite FTS5 lesson search index from the Lesson table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help="Database alias to rebuild the index on.")
+
+    def handle(self, *args, **options):
+        using = options['database']
+        if not fts_available(using):
+            raise CommandError("Full-text lesson search is only available on SQLite; other backends use icontains.")
+        with transaction.atomic(using=using):
+            indexed = rebuild_search_index(using)
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} lesson(s)."))
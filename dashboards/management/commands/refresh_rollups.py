@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from dashboards import rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Refreshes the daily and weekly rollup tables behind the manager reports. Only lessons, lesson days "
+        "and revenue days changed since the last run (high-water mark) are recomputed; run it from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help="Recompute every rollup from Lesson, Enrollment, Attendance and Order rows. Rows of deleted "
+                 "lessons are not in the source tables, so their past days are kept as report history.",
+        )
+
+    def handle(self, *args, **options):
+        result = rollups.refresh_rollups(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Refreshed {result['lessons']} lesson(s), {result['lesson_days']} lesson day(s), "
+            f"{result['revenue_days']} revenue day(s) and {result['weeks']} week(s)."
+        ))
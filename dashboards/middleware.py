@@ -0,0 +1,37 @@
+import logging
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from .querybudget import QueryRecorder, get_query_budget
+
+logger = logging.getLogger('dashboards.queries')
+
+
+class QueryBudgetMiddleware:
+    """Geliştirme ortamında her isteğin SQL sorgularını kaydeder.
+
+    Görünüm @query_budget ile tanımladığı bütçeyi aşarsa veya aynı şekildeki
+    bir sorgu QUERY_REPEAT_THRESHOLD kadar tekrarlanırsa (N+1) uyarı loglanır.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_BUDGET_ENABLED', settings.DEBUG):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.repeat_threshold = getattr(settings, 'QUERY_REPEAT_THRESHOLD', 3)
+
+    def __call__(self, request):
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+
+        budget = getattr(request, 'query_budget', None)
+        repeated = recorder.repeated_shapes(self.repeat_threshold)
+        if (budget is not None and len(recorder) > budget) or repeated:
+            logger.warning(
+                "%s %s ran %d queries (budget: %s).\n%s",
+                request.method, request.path, len(recorder), budget, recorder.report(self.repeat_threshold),
+            )
+        response['X-Query-Count'] = str(len(recorder))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = get_query_budget(view_func)
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboards', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lessonday',
+            index=models.Index(fields=['date', 'start_time'], name='lessonday_date_start_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:47
+
+import django.db.models.expressions
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def populate_enrollment_counters(apps, schema_editor):
+    Lesson = apps.get_model('dashboards', 'Lesson')
+    Enrollment = apps.get_model('dashboards', 'Enrollment')
+    for field, status in (('approved_count', 'approved'), ('requested_count', 'requested')):
+        counts = models.Subquery(
+            Enrollment.objects.filter(lesson=models.OuterRef('pk'), status=status)
+            .values('lesson').annotate(total=models.Count('id')).values('total')
+        )
+        Lesson.objects.update(**{field: Coalesce(counts, 0)})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboards', '0003_lessonday_date_start_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lesson',
+            name='approved_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='requested_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(django.db.models.expressions.CombinedExpression(models.F('max_students'), '-', models.F('approved_count')), name='lesson_seats_left_idx'),
+        ),
+        migrations.RunPython(populate_enrollment_counters, migrations.RunPython.noop),
+    ]
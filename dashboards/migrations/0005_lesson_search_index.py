@@ -0,0 +1,102 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:49
+
+import dashboards.search
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# FTS5 tablosu ve Lesson/User değişikliklerini ona yansıtan trigger'lar (sadece SQLite)
+CREATE_SEARCH_INDEX_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS dashboards_lesson_fts USING fts5(
+        title, description, teacher,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS dashboards_lesson_fts_insert AFTER INSERT ON dashboards_lesson
+    BEGIN
+        INSERT INTO dashboards_lesson_fts (rowid, title, description, teacher)
+        VALUES (new.id, new.title, new.description, (SELECT username FROM users_user WHERE id = new.teacher_id));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS dashboards_lesson_fts_update AFTER UPDATE ON dashboards_lesson
+    WHEN old.title IS NOT new.title OR old.description IS NOT new.description OR old.teacher_id IS NOT new.teacher_id
+    BEGIN
+        DELETE FROM dashboards_lesson_fts WHERE rowid = old.id;
+        INSERT INTO dashboards_lesson_fts (rowid, title, description, teacher)
+        VALUES (new.id, new.title, new.description, (SELECT username FROM users_user WHERE id = new.teacher_id));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS dashboards_lesson_fts_delete AFTER DELETE ON dashboards_lesson
+    BEGIN
+        DELETE FROM dashboards_lesson_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS dashboards_lesson_fts_teacher AFTER UPDATE OF username ON users_user
+    WHEN old.username IS NOT new.username
+    BEGIN
+        UPDATE dashboards_lesson_fts SET teacher = new.username
+        WHERE rowid IN (SELECT id FROM dashboards_lesson WHERE teacher_id = new.id);
+    END
+    """,
+    """
+    INSERT INTO dashboards_lesson_fts (rowid, title, description, teacher)
+    SELECT l.id, l.title, l.description, u.username
+    FROM dashboards_lesson l INNER JOIN users_user u ON u.id = l.teacher_id
+    """,
+]
+
+DROP_SEARCH_INDEX_SQL = [
+    'DROP TRIGGER IF EXISTS dashboards_lesson_fts_teacher',
+    'DROP TRIGGER IF EXISTS dashboards_lesson_fts_delete',
+    'DROP TRIGGER IF EXISTS dashboards_lesson_fts_update',
+    'DROP TRIGGER IF EXISTS dashboards_lesson_fts_insert',
+    'DROP TABLE IF EXISTS dashboards_lesson_fts',
+]
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in CREATE_SEARCH_INDEX_SQL:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in DROP_SEARCH_INDEX_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboards', '0004_lesson_enrollment_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LessonSearchIndex',
+            fields=[
+                ('lesson', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='dashboards.lesson')),
+                ('title', models.TextField()),
+                ('description', models.TextField()),
+                ('teacher', models.TextField()),
+                ('document', dashboards.search.SearchDocumentField(db_column='dashboards_lesson_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'dashboards_lesson_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.15 on 2026-10-18 20:16
+
+from importlib import import_module
+from django.db import migrations, models
+
+search_index = import_module('dashboards.migrations.0005_lesson_search_index')
+
+# 0005'in trigger ifadeleri (sanal tablo ve ilk doldurma hariç)
+SEARCH_TRIGGERS_SQL = [sql for sql in search_index.CREATE_SEARCH_INDEX_SQL if 'CREATE TRIGGER' in sql]
+SEARCH_TRIGGERS_DROP_SQL = [sql for sql in search_index.DROP_SEARCH_INDEX_SQL if 'DROP TRIGGER' in sql]
+
+
+# Yeni alanlar SQLite'ta dashboards_lesson tablosunu yeniden oluşturur; arama trigger'ları
+# bu sırada kaldırılıp sonra geri eklenir
+def drop_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in SEARCH_TRIGGERS_DROP_SQL:
+        schema_editor.execute(statement)
+
+
+def create_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in SEARCH_TRIGGERS_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboards', '0007_enrollment_waitlist'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_search_triggers, create_search_triggers),
+        migrations.AddField(
+            model_name='lesson',
+            name='recurrence_rule',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='schedule_mode',
+            field=models.CharField(choices=[('materialized', 'Store every session'), ('recurring', 'Weekly rule with exceptions')], default='materialized', max_length=12),
+        ),
+        migrations.AddField(
+            model_name='lessonday',
+            name='cancelled',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(create_search_triggers, drop_search_triggers),
+    ]
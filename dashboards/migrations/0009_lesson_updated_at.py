@@ -0,0 +1,24 @@
+# Generated by Django 5.1.15 on 2026-10-18 20:20
+
+from importlib import import_module
+from django.db import migrations, models
+
+search_triggers = import_module('dashboards.migrations.0008_lesson_recurrence')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboards', '0008_lesson_recurrence'),
+    ]
+
+    operations = [
+        # Yeni kolon SQLite'ta dashboards_lesson tablosunu yeniden oluşturur (bkz. 0008)
+        migrations.RunPython(search_triggers.drop_search_triggers, search_triggers.create_search_triggers),
+        migrations.AddField(
+            model_name='lesson',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(search_triggers.create_search_triggers, search_triggers.drop_search_triggers),
+    ]
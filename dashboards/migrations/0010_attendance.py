@@ -0,0 +1,43 @@
+# Generated by Django 5.1.15 on 2026-10-18 20:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboards', '0009_lesson_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Attendance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('session_date', models.DateField()),
+                ('checked_in_at', models.DateTimeField()),
+                ('source', models.CharField(choices=[('door', 'Door check-in'), ('kiosk', 'Offline kiosk')], default='door', max_length=10)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='lessonday',
+            index=models.Index(fields=['lesson', 'date'], name='lessonday_lesson_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='attendance',
+            name='lesson',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendances', to='dashboards.lesson'),
+        ),
+        migrations.AddField(
+            model_name='attendance',
+            name='student',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendances', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='attendance',
+            constraint=models.UniqueConstraint(fields=('lesson', 'session_date', 'student'), name='attendance_once_per_session'),
+        ),
+    ]
@@ -0,0 +1,118 @@
+# Generated by Django 5.1.15 on 2026-10-18 20:36
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboards', '0010_attendance'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyLessonRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sessions', models.PositiveIntegerField(default=0)),
+                ('session_minutes', models.PositiveIntegerField(default=0)),
+                ('seats_offered', models.PositiveIntegerField(default=0)),
+                ('attended', models.PositiveIntegerField(default=0)),
+                ('requests', models.PositiveIntegerField(default=0)),
+                ('approvals', models.PositiveIntegerField(default=0)),
+                ('day', models.DateField()),
+                ('lesson_id', models.BigIntegerField()),
+                ('lesson_title', models.CharField(max_length=100)),
+                ('teacher_id', models.BigIntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyRevenueRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RollupState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('high_water_mark', models.DateTimeField(blank=True, null=True)),
+                ('refreshed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='WeeklyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sessions', models.PositiveIntegerField(default=0)),
+                ('session_minutes', models.PositiveIntegerField(default=0)),
+                ('seats_offered', models.PositiveIntegerField(default=0)),
+                ('attended', models.PositiveIntegerField(default=0)),
+                ('requests', models.PositiveIntegerField(default=0)),
+                ('approvals', models.PositiveIntegerField(default=0)),
+                ('week_start', models.DateField(unique=True)),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='WeeklyTeacherRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sessions', models.PositiveIntegerField(default=0)),
+                ('session_minutes', models.PositiveIntegerField(default=0)),
+                ('seats_offered', models.PositiveIntegerField(default=0)),
+                ('attended', models.PositiveIntegerField(default=0)),
+                ('requests', models.PositiveIntegerField(default=0)),
+                ('approvals', models.PositiveIntegerField(default=0)),
+                ('week_start', models.DateField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='attendance',
+            name='recorded_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='created_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='status_changed_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['updated_at'], name='lesson_updated_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dailylessonrollup',
+            index=models.Index(fields=['day', 'teacher_id'], name='daily_lesson_rollup_day_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailylessonrollup',
+            constraint=models.UniqueConstraint(fields=('lesson_id', 'day'), name='daily_lesson_rollup_unique'),
+        ),
+        migrations.AddField(
+            model_name='weeklyteacherrollup',
+            name='teacher',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='weekly_rollups', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='weeklyteacherrollup',
+            constraint=models.UniqueConstraint(fields=('week_start', 'teacher'), name='weekly_teacher_rollup_unique'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+from importlib import import_module
+from django.db import migrations
+from dashboards import search
+
+search_triggers = import_module('dashboards.migrations.0008_lesson_recurrence')
+
+
+# Güncelleme trigger'ı sadece title, description ve teacher_id yazıldığında çalışacak şekilde yeniden kurulur;
+# sayaç ve updated_at gibi diğer kolonlara yapılan UPDATE'ler artık trigger'ı tetiklemez
+def restore_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    search.drop_search_triggers(apps, schema_editor)
+    for statement in search_triggers.SEARCH_TRIGGERS_SQL:
+        schema_editor.execute(statement)
+
+
+def recreate_search_triggers(apps, schema_editor):
+    search.drop_search_triggers(apps, schema_editor)
+    search.create_search_triggers(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboards', '0011_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(recreate_search_triggers, restore_search_triggers),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.15 on 2026-10-18 21:16
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboards', '0012_search_update_trigger_columns'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='lesson',
+            name='lesson_seats_left_idx',
+        ),
+    ]
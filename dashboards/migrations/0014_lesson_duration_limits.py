@@ -0,0 +1,24 @@
+# Generated by Django 5.1.15 on 2026-10-18 21:25
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboards', '0013_remove_lesson_seats_left_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='lesson',
+            name='duration_hours',
+            field=models.PositiveIntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(24)]),
+        ),
+        migrations.AlterField(
+            model_name='lesson',
+            name='duration_weeks',
+            field=models.PositiveIntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(520)]),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.15 on 2026-10-18 21:42
+
+import django.db.models.expressions
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboards', '0014_lesson_duration_limits'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(django.db.models.expressions.CombinedExpression(models.F('max_students'), '-', models.F('approved_count')), name='lesson_seats_left_idx'),
+        ),
+    ]
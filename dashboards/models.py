@@ -1,36 +1,142 @@
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.conf import settings
+from django.utils import timezone
+from .search import LESSON_FTS_TABLE, SearchDocumentField
+from .schedule import find_schedule_conflicts
+from .recurrence import Session, expand_weekly, iter_lesson_sessions, parse_weekly_rule
 from datetime import timedelta, datetime
 
 
+class LessonQuerySet(models.QuerySet):
+    def with_free_seats(self):
+        # İfade lesson_seats_left_idx ile birebir aynı olmalı, aksi halde index kullanılmaz
+        return self.alias(seats_left=F('max_students') - F('approved_count')).filter(seats_left__gt=0)
+
+    def with_actual_counts(self):
+        # Sayaçların Enrollment tablosundan hesaplanan gerçek değerleri
+        return self.annotate(
+            actual_approved=enrollment_count_subquery('approved'),
+            actual_requested=enrollment_count_subquery('requested'),
+        )
+
+    def rebuild_counters(self):
+        return self.update(
+            approved_count=enrollment_count_subquery('approved'),
+            requested_count=enrollment_count_subquery('requested'),
+        )
+
+
+def enrollment_count_subquery(status):
+    counts = (
+        Enrollment.objects.filter(lesson=OuterRef('pk'), status=status)
+        .values('lesson').annotate(total=Count('id')).values('total')
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
 class Lesson(models.Model):
     LESSON_TYPE_CHOICES = (
         ('private', 'Private'),
         ('group', 'Group'),
     )
+    # Oturumların saklanma biçimi: her hafta LessonDay satırı ya da sadece kural + istisnalar
+    MATERIALIZED = 'materialized'
+    RECURRING = 'recurring'
+    SCHEDULE_MODE_CHOICES = (
+        (MATERIALIZED, 'Store every session'),
+        (RECURRING, 'Weekly rule with exceptions'),
+    )
     
     title = models.CharField(max_length=100)
     description = models.TextField()
     lesson_type = models.CharField(max_length=10, choices=LESSON_TYPE_CHOICES)
     teacher = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='lessons')
     max_students = models.PositiveIntegerField()
-    duration_weeks = models.PositiveIntegerField()
-    duration_hours = models.PositiveIntegerField()  # Ders süresi saat cinsinden
+    # Süre sınırları formlarda doğrulanır ve çakışma API'sinde parametreler bu aralığa sıkıştırılır
+    MAX_DURATION_WEEKS = 520
+    MAX_DURATION_HOURS = 24
+
+    duration_weeks = models.PositiveIntegerField(
+        validators=[MinValueValidator(1), MaxValueValidator(MAX_DURATION_WEEKS)],
+    )
+    duration_hours = models.PositiveIntegerField(  # Ders süresi saat cinsinden
+        validators=[MinValueValidator(1), MaxValueValidator(MAX_DURATION_HOURS)],
+    )
     start_date = models.DateTimeField()
     end_date = models.DateTimeField(blank=True, null=True)  # End date otomatik hesaplanacak
+    schedule_mode = models.CharField(max_length=12, choices=SCHEDULE_MODE_CHOICES, default=MATERIALIZED)
+    # RRULE benzeri haftalık kural, ör. "FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,TH"; boşsa başlangıç gününde her hafta
+    recurrence_rule = models.CharField(max_length=100, blank=True)
+    # Takvim beslemelerinin ETag/Last-Modified değerleri buradan türetilir; sayaç UPDATE'leri bu alanı değiştirmez
+    updated_at = models.DateTimeField(auto_now=True)
+    # Enrollment kaydedildikçe/silindikçe F() ifadeleriyle güncellenen sayaçlar
+    approved_count = models.PositiveIntegerField(default=0, editable=False)
+    requested_count = models.PositiveIntegerField(default=0, editable=False)
 
-    def clean(self):
+    objects = LessonQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # "Boş yeri olan dersler" filtresi bu ifade index'i üzerinden çalışır
+            models.Index(F('max_students') - F('approved_count'), name='lesson_seats_left_idx'),
+            # Öğretmen panosu ve tarih aralığı/keyset sayfalama sorguları için
+            models.Index(fields=['teacher', 'start_date'], name='lesson_teacher_start_idx'),
+            models.Index(fields=['start_date', 'id'], name='lesson_start_date_id_idx'),
+            # Rapor özetleri son çalışmadan beri kaydedilen dersleri buradan bulur
+            models.Index(fields=['updated_at'], name='lesson_updated_at_idx'),
+        ]
+
+    def clean_capacity(self):
         # "Private" tipi dersler için max_students = 1 zorunluluğu
         if self.lesson_type == 'private':
             self.max_students = 1
         elif self.lesson_type == 'group' and self.max_students < 2:
             raise ValidationError("Group lessons must allow at least 2 students.")
+
+    def clean(self):
+        self.clean_capacity()
         
         # Aynı başlıkta bir ders olup olmadığını kontrol et
         if Lesson.objects.filter(title=self.title).exclude(id=self.id).exists():
             raise ValidationError("A lesson with this title already exists. Please choose a different title.")
 
+        if self.start_date is not None:
+            self.get_recurrence_rule()
+
+        # Öğretmenin mevcut ders oturumlarıyla çakışma kontrolü
+        schedule_ready = None not in self.get_schedule_snapshot()
+        if self.teacher_id and schedule_ready and (self._state.adding or self.schedule_has_changed()):
+            conflicts = self.find_schedule_conflicts()
+            if conflicts:
+                first = conflicts[0]
+                raise ValidationError(
+                    f"This schedule overlaps {len(conflicts)} existing session(s) of the teacher, "
+                    f"e.g. '{first['conflicting_lesson_title']}' on {first['conflicting_start']:%Y-%m-%d %H:%M}."
+                )
+
+    def find_schedule_conflicts(self):
+        return find_schedule_conflicts(self.teacher_id, self.build_lesson_schedule(), exclude_lesson_id=self.id)
+
+    # Değiştiğinde ders programının yeniden hesaplanmasını gerektiren alanlar
+    SCHEDULE_FIELDS = ('start_date', 'duration_weeks', 'duration_hours', 'schedule_mode', 'recurrence_rule')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._schedule_snapshot = instance.get_schedule_snapshot()
+        return instance
+
+    def get_schedule_snapshot(self):
+        # Ertelenmiş (deferred) alanlar için ekstra sorgu atmamak adına __dict__ kullanılır
+        return tuple(self.__dict__.get(field) for field in self.SCHEDULE_FIELDS)
+
+    def schedule_has_changed(self):
+        return getattr(self, '_schedule_snapshot', None) != self.get_schedule_snapshot()
+
     def save(self, *args, **kwargs):
         # Temizleme işlemi ile doğrulamayı gerçekleştir
         self.clean()
@@ -38,32 +144,138 @@ class Lesson(models.Model):
         # Ders bitiş tarihini otomatik hesapla
         self.end_date = self.start_date + timedelta(weeks=self.duration_weeks)
         
-        # Ders günleri ve saatlerini oluşturma
-        super().save(*args, **kwargs)
-        self.create_lesson_schedule()
+        # Program alanları değişmediyse ders günlerine hiç dokunulmaz
+        schedule_changed = self._state.adding or self.schedule_has_changed()
+
+        # Ders ve ders günleri tek bir transaction içinde kaydedilir
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if schedule_changed:
+                self.create_lesson_schedule()
+        self._schedule_snapshot = self.get_schedule_snapshot()
+
+    def get_recurrence_rule(self):
+        return parse_weekly_rule(self.recurrence_rule, self.start_date.weekday())
+
+    def expand_schedule(self, window_start=None, window_end=None):
+        # Kuralın oturumlarını (tarih, başlangıç, bitiş) olarak tembel üretir; istisnalar uygulanmaz
+        return expand_weekly(
+            self.start_date, self.start_date + timedelta(weeks=self.duration_weeks),
+            timedelta(hours=self.duration_hours), self.get_recurrence_rule(), window_start, window_end,
+        )
+
+    def build_lesson_schedule(self):
+        # Kuraldaki her oturum için {tarih: (başlangıç saati, bitiş saati)} üretir
+        return {day: (start_time, end_time) for day, start_time, end_time in self.expand_schedule()}
+
+    def iter_sessions(self, window_start=None, window_end=None):
+        """Dersin oturumlarını saklanma biçiminden bağımsız olarak tarih sırasıyla üretir."""
+        if self.schedule_mode == self.RECURRING:
+            overrides = self.lesson_days.all()
+            if window_start is not None:
+                overrides = overrides.filter(date__gte=window_start)
+            if window_end is not None:
+                overrides = overrides.filter(date__lt=window_end)
+            return iter_lesson_sessions(self, list(overrides), window_start, window_end)
+        lesson_days = self.lesson_days.order_by('date', 'start_time')
+        if window_start is not None:
+            lesson_days = lesson_days.filter(date__gte=window_start)
+        if window_end is not None:
+            lesson_days = lesson_days.filter(date__lt=window_end)
+        teacher = self.teacher.username if type(self).teacher.is_cached(self) else None
+        rows = lesson_days.values_list('id', 'date', 'start_time', 'end_time')
+        return (
+            Session(date, start_time, end_time, self.id, self.title, teacher, lesson_day_id, self.teacher_id)
+            for lesson_day_id, date, start_time, end_time in rows
+        )
+
+    def override_session(self, date, start_time=None, end_time=None, cancelled=False):
+        """Kurallı dersin tek bir oturumunu iptal eder veya saatini değiştirir.
+
+        Sadece bu istisna ``LessonDay`` satırı olarak saklanır.
+        """
+        if self.schedule_mode != self.RECURRING:
+            raise ValidationError("Only recurring lessons store session overrides.")
+        scheduled = next(self.expand_schedule(date, date + timedelta(days=1)), None)
+        if scheduled is None:
+            raise ValidationError(f"The lesson has no session on {date}.")
+        with transaction.atomic():
+            lesson_day, _ = LessonDay.objects.update_or_create(lesson=self, date=date, defaults={
+                'start_time': start_time or scheduled[1],
+                'end_time': end_time or scheduled[2],
+                'cancelled': cancelled,
+            })
+            self.updated_at = timezone.now()
+            Lesson.objects.filter(id=self.id).update(updated_at=self.updated_at)
+        return lesson_day
 
     def create_lesson_schedule(self):
-        # Önceki kayıtlı ders günlerini temizleyin
-        self.lesson_days.all().delete()
-
-        # Her hafta için ders günlerini oluştur
-        for week in range(self.duration_weeks):
-            lesson_date = self.start_date + timedelta(weeks=week)
-            LessonDay.objects.create(
-                lesson=self,
-                date=lesson_date,
-                start_time=lesson_date.time(),
-                end_time=(lesson_date + timedelta(hours=self.duration_hours)).time()
-            )
+        schedule = self.build_lesson_schedule()
+
+        # Saklanma biçimi değiştiyse eski satırlar (oturumlar veya istisnalar) geçersizdir
+        snapshot = getattr(self, '_schedule_snapshot', None)
+        if snapshot and snapshot[self.SCHEDULE_FIELDS.index('schedule_mode')] != self.schedule_mode:
+            self.lesson_days.all().delete()
+
+        # Kurallı derslerde sadece artık kurala uymayan tarihlerdeki istisnalar silinir
+        if self.schedule_mode == self.RECURRING:
+            self.lesson_days.exclude(date__in=list(schedule)).delete()
+            return
+
+        # Mevcut ders günleriyle fark alınır: değişmeyen haftalar yerinde kalır
+        to_delete, to_update = [], []
+        existing = self.lesson_days.values_list('id', 'date', 'start_time', 'end_time')
+        for lesson_day_id, date, start_time, end_time in existing:
+            times = schedule.pop(date, None)
+            if times is None:
+                to_delete.append(lesson_day_id)
+            elif times != (start_time, end_time):
+                to_update.append(LessonDay(id=lesson_day_id, start_time=times[0], end_time=times[1]))
+
+        if to_delete:
+            LessonDay.objects.filter(id__in=to_delete).delete()
+        if to_update:
+            LessonDay.objects.bulk_update(to_update, ['start_time', 'end_time'])
+        if schedule:
+            LessonDay.objects.bulk_create([
+                LessonDay(lesson=self, date=date, start_time=start_time, end_time=end_time)
+                for date, (start_time, end_time) in schedule.items()
+            ])
 
     def __str__(self):
         return self.title
 
+class LessonSearchIndex(models.Model):
+    # SQLite FTS5 sanal tablosu; migration ile oluşturulur ve trigger'larla senkron tutulur
+    lesson = models.OneToOneField(
+        Lesson, primary_key=True, db_column='rowid', related_name='search_index', on_delete=models.DO_NOTHING
+    )
+    title = models.TextField()
+    description = models.TextField()
+    teacher = models.TextField()
+    document = SearchDocumentField(db_column=LESSON_FTS_TABLE)
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = LESSON_FTS_TABLE
+
+
 class LessonDay(models.Model):
     lesson = models.ForeignKey(Lesson, related_name="lesson_days", on_delete=models.CASCADE)
     date = models.DateField()  # Ders tarihi
     start_time = models.TimeField()
     end_time = models.TimeField()
+    # Sadece kurallı derslerin istisna satırlarında kullanılır
+    cancelled = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            # Takvim beslemesi tarih aralığı sorgularını bu index üzerinden yapar
+            models.Index(fields=['date', 'start_time'], name='lessonday_date_start_idx'),
+            # Yoklamada dersin o günkü oturumu (veya istisnası) tek index araması ile bulunur
+            models.Index(fields=['lesson', 'date'], name='lessonday_lesson_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.lesson.title} on {self.date} from {self.start_time} to {self.end_time}"
@@ -73,10 +285,166 @@ class Enrollment(models.Model):
         ('requested', 'Requested'),
         ('approved', 'Approved'),
         ('rejected', 'Rejected'),
+        ('waitlisted', 'Waitlisted'),
     )
     lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name='enrollments')
     student = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='enrollments')
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='requested')
+    # Bekleme listesine giriş zamanı; liste (waitlisted_at, id) sırasıyla ilerler
+    waitlisted_at = models.DateTimeField(null=True, blank=True, editable=False)
+    created_at = models.DateTimeField(default=timezone.now, editable=False, db_index=True)
+    # Durumun son değiştiği an; QuerySet.update() kullanan servis yolları da bu alanı yazar
+    status_changed_at = models.DateTimeField(default=timezone.now, editable=False, db_index=True)
+
+    # Durumu Lesson üzerinde sayaç olarak tutulanlar
+    COUNTER_FIELDS = {
+        'approved': 'approved_count',
+        'requested': 'requested_count',
+    }
 
     class Meta:
         unique_together = ('lesson', 'student')
+        indexes = [
+            # Öğrenci panosu öğrencinin kayıtlarını duruma göre filtreler
+            models.Index(fields=['student', 'status'], name='enrollment_student_status_idx'),
+            # Sadece bekleyen kayıtları içeren kısmi index: sıradaki öğrenci ve sıra numarası buradan okunur
+            models.Index(
+                fields=['lesson', 'waitlisted_at', 'id'], condition=Q(status='waitlisted'),
+                name='enrollment_waitlist_idx',
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
+    @classmethod
+    def update_lesson_counters(cls, lesson_id, old_status=None, new_status=None, check_capacity=False):
+        # Eski durumun sayacını azaltıp yeni durumunkini tek bir UPDATE ile artırır.
+        # check_capacity ile onaylar sadece boş yer varsa uygulanır; güncellenen satır sayısı döner.
+        if old_status == new_status:
+            return 0
+        changes = {}
+        if old_status in cls.COUNTER_FIELDS:
+            field = cls.COUNTER_FIELDS[old_status]
+            changes[field] = F(field) - 1
+        if new_status in cls.COUNTER_FIELDS:
+            field = cls.COUNTER_FIELDS[new_status]
+            changes[field] = F(field) + 1
+        if not changes:
+            return 0
+        lessons = Lesson.objects.filter(id=lesson_id)
+        if check_capacity and new_status == 'approved':
+            lessons = lessons.filter(approved_count__lt=F('max_students'))
+        return lessons.update(**changes)
+
+    def save(self, *args, **kwargs):
+        old_status = None if self._state.adding else getattr(self, '_loaded_status', None)
+        if not self._state.adding and old_status != self.status:
+            self.status_changed_at = timezone.now()
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self.update_lesson_counters(self.lesson_id, old_status, self.status)
+        self._loaded_status = self.status
+
+
+class Attendance(models.Model):
+    SOURCE_CHOICES = (
+        ('door', 'Door check-in'),
+        ('kiosk', 'Offline kiosk'),
+    )
+    # Kayıt yerine ders ve öğrenci tutulur: öğrenci dersten ayrılsa da yoklama geçmişi kalır
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name='attendances')
+    student = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='attendances')
+    session_date = models.DateField()
+    checked_in_at = models.DateTimeField()
+    # Kiosk yüklemeleri geçmiş saatlerle gelir; rapor özetleri yazılma anına bakar
+    recorded_at = models.DateTimeField(default=timezone.now, editable=False, db_index=True)
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES, default='door')
+
+    class Meta:
+        constraints = [
+            # Aynı oturuma tekrar okutulan kartlar yeni satır oluşturmaz
+            models.UniqueConstraint(fields=['lesson', 'session_date', 'student'], name='attendance_once_per_session'),
+        ]
+
+    def __str__(self):
+        return f"{self.student} attended {self.lesson} on {self.session_date}"
+
+
+class RollupState(models.Model):
+    # Artımlı özet komutunun kaldığı yer (high-water mark)
+    name = models.CharField(max_length=50, unique=True)
+    high_water_mark = models.DateTimeField(null=True, blank=True)
+    refreshed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} up to {self.high_water_mark}"
+
+
+class RollupMetrics(models.Model):
+    sessions = models.PositiveIntegerField(default=0)
+    session_minutes = models.PositiveIntegerField(default=0)
+    seats_offered = models.PositiveIntegerField(default=0)
+    attended = models.PositiveIntegerField(default=0)
+    requests = models.PositiveIntegerField(default=0)
+    approvals = models.PositiveIntegerField(default=0)
+
+    METRIC_FIELDS = ('sessions', 'session_minutes', 'seats_offered', 'attended', 'requests', 'approvals')
+
+    class Meta:
+        abstract = True
+
+    @property
+    def fill_rate(self):
+        # Sunulan koltukların yoklamada dolan oranı
+        return self.attended / self.seats_offered if self.seats_offered else None
+
+    @property
+    def approval_ratio(self):
+        return self.approvals / self.requests if self.requests else None
+
+    @property
+    def hours(self):
+        return self.session_minutes / 60
+
+
+class DailyLessonRollup(RollupMetrics):
+    # Ders silindiğinde geçmiş günler raporlarda kalsın diye ForeignKey yerine id ve başlık tutulur
+    day = models.DateField()
+    lesson_id = models.BigIntegerField()
+    lesson_title = models.CharField(max_length=100)
+    teacher_id = models.BigIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['lesson_id', 'day'], name='daily_lesson_rollup_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['day', 'teacher_id'], name='daily_lesson_rollup_day_idx'),
+        ]
+
+
+class DailyRevenueRollup(models.Model):
+    day = models.DateField(unique=True)
+    orders = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+
+class WeeklyTeacherRollup(RollupMetrics):
+    week_start = models.DateField()
+    teacher = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='weekly_rollups')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['week_start', 'teacher'], name='weekly_teacher_rollup_unique'),
+        ]
+
+
+class WeeklyRollup(RollupMetrics):
+    # Tüm salonun haftalık toplamları; gelir sadece bu tabloda tutulur
+    week_start = models.DateField(unique=True)
+    orders = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
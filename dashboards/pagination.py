@@ -0,0 +1,171 @@
+import json
+from math import ceil
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+CURSOR_SALT = 'dashboards.pagination.cursor'
+
+
+class KeysetPage:
+    """Django ``Page`` ile uyumlu sayfa nesnesi.
+
+    ``next_page_number`` / ``previous_page_number`` sayfa numarası yerine
+    ``?page=`` parametresine yazılacak imleç (cursor) değerini döndürür, böylece
+    mevcut şablonlardaki sayfalama blokları değişmeden çalışır.
+    """
+
+    def __init__(self, object_list, paginator, number, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.number = number
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<Page {self.number}>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def next_page_number(self):
+        return self.next_cursor
+
+    def previous_page_number(self):
+        return self.previous_cursor
+
+
+class KeysetPaginator:
+    """OFFSET ve COUNT(*) kullanmadan, sıralama anahtarına göre sayfalama yapar.
+
+    ``ordering`` benzersiz bir sıralama olmalıdır (son alan genellikle ``id``);
+    alan adları veya sorgu setinde ``annotate`` ile eklenmiş ifadeler olabilir.
+    İlk sayfa imleçsiz istenir; şablonlar ilk sayfa bağlantısını ``page``
+    parametresini kaldırarak kurar (``{% querystring page=None %}``).
+    Toplam kayıt sayısı sadece ``count`` / ``num_pages`` okunduğunda hesaplanır;
+    şablonlar bu değerleri ``with_count`` açıksa gösterir.
+    """
+
+    def __init__(self, queryset, per_page, ordering=('start_date', 'id'), with_count=False):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.with_count = with_count
+
+    @cached_property
+    def count(self):
+        return self.queryset.order_by().count()
+
+    @cached_property
+    def num_pages(self):
+        return max(1, ceil(self.count / self.per_page))
+
+    def get_page(self, cursor=None):
+        state = self.decode_cursor(cursor)
+        if state is None:
+            return self.build_page(1, self.fetch(), forward=True, has_before=False)
+
+        keys, forward, number = state
+        rows = self.fetch(keys, forward)
+        if not rows:
+            # İmleç artık geçerli bir sayfaya denk gelmiyorsa ilk sayfaya dönülür
+            return self.build_page(1, self.fetch(), forward=True, has_before=False)
+        return self.build_page(number, rows, forward=forward, has_before=True)
+
+    def fetch(self, keys=None, forward=True):
+        # Bir sonraki/önceki sayfanın varlığını anlamak için bir fazla kayıt çekilir
+        queryset = self.queryset.order_by(*self.directed_ordering(forward))
+        if keys is not None:
+            queryset = queryset.filter(self.keyset_condition(keys, forward))
+        return list(queryset[:self.per_page + 1])
+
+    def build_page(self, number, rows, forward, has_before):
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward:
+            rows.reverse()
+            has_more, has_before = has_before, has_more
+
+        next_cursor = previous_cursor = None
+        if rows and has_more:
+            next_cursor = self.encode_cursor(rows[-1], True, number + 1 if number else None)
+        if rows and has_before:
+            previous_cursor = self.encode_cursor(rows[0], False, number - 1 if number else None)
+        return KeysetPage(rows, self, number, next_cursor, previous_cursor)
+
+    def directed_ordering(self, forward):
+        if forward:
+            return self.ordering
+        return tuple(name[1:] if name.startswith('-') else f'-{name}' for name in self.ordering)
+
+    def keyset_condition(self, keys, forward):
+        # (a, b) > (x, y)  =>  a > x OR (a = x AND b > y)
+        condition = Q()
+        for index, name in enumerate(self.ordering):
+            descending = name.startswith('-') == forward
+            term = Q(**{f"{name.lstrip('-')}__{'lt' if descending else 'gt'}": keys[index]})
+            for previous_name, previous_key in zip(self.ordering[:index], keys[:index]):
+                term &= Q(**{previous_name.lstrip('-'): previous_key})
+            condition |= term
+        return condition
+
+    def key_fields(self):
+        fields = []
+        for name in self.ordering:
+            # Sıralama bir annotate() ifadesi olabilir (ör. Lower('username')); değeri çıktı alanıyla çözülür
+            annotation = self.queryset.query.annotations.get(name.lstrip('-'))
+            if annotation is not None:
+                fields.append(annotation.output_field)
+                continue
+            model = self.queryset.model
+            *relations, field_name = name.lstrip('-').split('__')
+            for relation in relations:
+                model = model._meta.get_field(relation).related_model
+            fields.append(model._meta.get_field(field_name))
+        return fields
+
+    def encode_cursor(self, row, forward, number):
+        keys = []
+        for name in self.ordering:
+            value = row
+            for attribute in name.lstrip('-').split('__'):
+                value = getattr(value, attribute)
+            keys.append(value)
+        payload = {
+            'k': json.loads(json.dumps(keys, cls=DjangoJSONEncoder)),
+            'd': 'n' if forward else 'p',
+            'n': number,
+        }
+        return signing.dumps(payload, salt=CURSOR_SALT, compress=True)
+
+    def decode_cursor(self, cursor):
+        # Geçersiz veya kurcalanmış imleçler ilk sayfa olarak yorumlanır
+        if not cursor:
+            return None
+        try:
+            payload = signing.loads(cursor, salt=CURSOR_SALT)
+            keys = [field.to_python(value) for field, value in zip(self.key_fields(), payload['k'])]
+            forward = payload['d'] == 'n'
+            number = payload.get('n')
+        except (signing.BadSignature, ValidationError, KeyError, TypeError, ValueError):
+            return None
+        if len(keys) != len(self.ordering):
+            return None
+        return keys, forward, number if isinstance(number, int) and number > 0 else None
@@ -0,0 +1,106 @@
+import re
+from collections import Counter
+from django.core.cache import caches
+from django.db import connection
+from django.urls import resolve
+
+# Transaction yönetimi için Django'nun attığı sorgular sayılmaz
+IGNORED_PREFIXES = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT', 'BEGIN', 'COMMIT')
+
+
+def normalize_sql(sql):
+    # Aynı "şekle" sahip sorguları gruplamak için sabitleri ve IN listelerini sadeleştirir
+    sql = re.sub(r'\s+', ' ', sql).strip()
+    sql = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    sql = re.sub(r'\b\d+(?:\.\d+)?\b', '?', sql)
+    sql = re.sub(r'%s|\?', '?', sql)
+    return re.sub(r'\(\s*\?(?:\s*,\s*\?)*\s*\)', '(?...)', sql)
+
+
+def query_budget(budget):
+    """Görünümün istek başına atabileceği en fazla sorgu sayısını tanımlar.
+
+    ``login_required`` gibi functools.wraps kullanan dekoratörlerin altına
+    yazıldığında değer dış görünüme de taşınır.
+    """
+    def decorator(view_func):
+        view_func.query_budget = budget
+        return view_func
+    return decorator
+
+
+def get_query_budget(view_func):
+    return getattr(view_func, 'query_budget', None)
+
+
+class QueryRecorder:
+    """Bir blok içinde çalıştırılan SQL cümlelerini kaydeder."""
+
+    def __init__(self, using=connection):
+        self.connection = using
+        self.queries = []
+        self._wrapper = None
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.lstrip().upper().startswith(IGNORED_PREFIXES):
+            self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._wrapper = self.connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._wrapper.__exit__(*exc_info)
+
+    def __len__(self):
+        return len(self.queries)
+
+    def shapes(self):
+        return Counter(normalize_sql(sql) for sql in self.queries)
+
+    def repeated_shapes(self, threshold=2):
+        return [(shape, count) for shape, count in self.shapes().most_common() if count >= threshold]
+
+    def report(self, threshold=2):
+        lines = [f'{len(self)} queries executed.']
+        for shape, count in self.repeated_shapes(threshold):
+            lines.append(f'  {count}x {shape}')
+        return '\n'.join(lines)
+
+
+class QueryBudgetTestMixin:
+    """TestCase sınıfları için sorgu bütçesi ve N+1 kontrolleri."""
+
+    def record_request(self, url, method='get', **kwargs):
+        # Bütçeler önbelleğin boş olduğu (en pahalı) yol için ölçülür; QueryBudgetMiddleware
+        # bu istekte bütçe aşımı veya tekrarlanan sorgu uyarısı loglarsa test başarısız olur
+        for cache in caches.all():
+            cache.clear()
+        with self.assertNoLogs('dashboards.queries', 'WARNING'), QueryRecorder() as recorder:
+            response = getattr(self.client, method)(url, **kwargs)
+        return response, recorder
+
+    def assertWithinQueryBudget(self, url, method='get', budget=None, **kwargs):
+        # Bütçe verilmezse görünümün @query_budget ile tanımladığı değer kullanılır
+        if budget is None:
+            budget = get_query_budget(resolve(url.split('?')[0]).func)
+        self.assertIsNotNone(budget, f'{url} does not declare a query budget.')
+        response, recorder = self.record_request(url, method, **kwargs)
+        self.assertLess(response.status_code, 400, f'{url} returned {response.status_code}.')
+        self.assertLessEqual(len(recorder), budget, f'{url} is over its budget of {budget}.\n{recorder.report()}')
+        return response, recorder
+
+    def assertConstantQueries(self, url, grow, method='get', budget=None, **kwargs):
+        # Veri büyütüldüğünde sorgu sayısı değişiyorsa görünümde N+1 vardır.
+        # İlk istek (sepet oluşturma gibi) tek seferlik yazmalar içerebilir; o da bütçeye uymalıdır,
+        # ama karşılaştırmaya ısınma olarak katılmaz.
+        self.assertWithinQueryBudget(url, method, budget, **kwargs)
+        _, before = self.assertWithinQueryBudget(url, method, budget, **kwargs)
+        grow()
+        _, after = self.assertWithinQueryBudget(url, method, budget, **kwargs)
+        self.assertEqual(
+            len(before), len(after),
+            f'{url} query count grew with the data ({len(before)} -> {len(after)}).\n{after.report()}',
+        )
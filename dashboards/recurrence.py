@@ -0,0 +1,168 @@
+import heapq
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+from django.core.exceptions import ValidationError
+from .utils import day_range
+
+WEEKDAYS = ('MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU')
+
+# Takvim, ders detayı ve çakışma kontrolünün ortak okuduğu oturum kaydı.
+# lesson_day_id sadece veritabanında satırı olan (materialize edilmiş veya
+# istisna) oturumlarda dolu olur. teacher öğretmenin kullanıcı adıdır (okunduysa),
+# teacher_id her zaman doludur.
+Session = namedtuple('Session', 'date start_time end_time lesson_id title teacher lesson_day_id teacher_id')
+
+WeeklyRule = namedtuple('WeeklyRule', 'interval weekdays')
+
+
+def parse_weekly_rule(value, default_weekday):
+    """RRULE benzeri haftalık kuralı ayrıştırır.
+
+    Desteklenen biçim ``FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,TH``; tüm parçalar
+    isteğe bağlıdır. Boş kural, başlangıç gününde her hafta bir oturum demektir.
+    Geçersiz kurallar için ``ValidationError`` fırlatılır.
+    """
+    parts = {}
+    for part in filter(None, (value or '').upper().replace(' ', '').split(';')):
+        key, _, part_value = part.partition('=')
+        if not part_value or key in parts:
+            raise ValidationError(f"Invalid recurrence rule part '{part}'.")
+        parts[key] = part_value
+
+    unknown = set(parts) - {'FREQ', 'INTERVAL', 'BYDAY'}
+    if unknown:
+        raise ValidationError(f"Unsupported recurrence rule parts: {', '.join(sorted(unknown))}.")
+    if parts.get('FREQ', 'WEEKLY') != 'WEEKLY':
+        raise ValidationError("Only weekly recurrence rules are supported.")
+    interval = parts.get('INTERVAL', '1')
+    if not interval.isdigit() or int(interval) < 1:
+        raise ValidationError("INTERVAL must be a positive number.")
+    weekdays = {default_weekday}
+    if 'BYDAY' in parts:
+        days = parts['BYDAY'].split(',')
+        if not set(days) <= set(WEEKDAYS):
+            raise ValidationError("BYDAY must list weekdays such as MO,WE,FR.")
+        weekdays = {WEEKDAYS.index(day) for day in days}
+    return WeeklyRule(int(interval), tuple(sorted(weekdays)))
+
+
+def expand_weekly(start, end, duration, rule, window_start=None, window_end=None):
+    """Kuralın [start, end) arasındaki oturumlarını tarih sırasıyla üretir.
+
+    Üreteç sadece istenen [window_start, window_end) gün aralığını dolaşır;
+    pencereden önceki haftalar hesapla atlanır. (tarih, başlangıç saati,
+    bitiş saati) üçlüleri döner; gece yarısını geçen oturumlarda bitiş saati
+    başlangıçtan küçüktür.
+    """
+    first_day, last_day = start.date(), end.date()
+    if window_start is not None:
+        first_day = max(first_day, window_start)
+    if window_end is not None:
+        last_day = min(last_day, window_end)
+    start_time, end_time = start.time(), (start + duration).time()
+
+    # Haftalar kuralın başladığı haftanın pazartesisinden itibaren sayılır
+    origin = start.date() - timedelta(days=start.weekday())
+    week = max(0, (first_day - origin).days // 7)
+    week -= week % rule.interval
+    while True:
+        monday = origin + timedelta(weeks=week)
+        if monday >= last_day:
+            return
+        for weekday in rule.weekdays:
+            day = monday + timedelta(days=weekday)
+            if day >= last_day:
+                return
+            if day >= first_day:
+                yield day, start_time, end_time
+        week += rule.interval
+
+
+def iter_lesson_sessions(lesson, overrides=(), window_start=None, window_end=None):
+    """Kurallı (recurring) bir dersin oturumlarını istisnaları uygulayarak üretir.
+
+    ``overrides`` dersin ``LessonDay`` istisna satırlarıdır; iptal edilenler
+    atlanır, saati değiştirilenler yeni saatleriyle döner.
+    """
+    overrides = {override.date: override for override in overrides}
+    # Öğretmen adı sadece önceden yüklendiyse eklenir; ekstra sorgu atılmaz
+    teacher = lesson.teacher.username if type(lesson).teacher.is_cached(lesson) else None
+    for day, start_time, end_time in lesson.expand_schedule(window_start, window_end):
+        override = overrides.get(day)
+        if override is None:
+            yield Session(day, start_time, end_time, lesson.id, lesson.title, teacher, None, lesson.teacher_id)
+        elif not override.cancelled:
+            yield Session(
+                day, override.start_time, override.end_time, lesson.id, lesson.title, teacher, override.id,
+                lesson.teacher_id,
+            )
+
+
+def iter_sessions(window_start=None, window_end=None, dates=None, exclude_lesson_id=None, chunk_size=None,
+                  **lesson_filters):
+    """Verilen pencere için tüm derslerin oturumlarını (tarih, saat) sırasıyla üretir.
+
+    Materialize edilmiş dersler ``LessonDay`` üzerinde index'li bir aralık
+    sorgusuyla, kurallı dersler ise pencereyle kesişen dersler ve istisnaları
+    için birer sorguyla okunup bellekte açılır; iki akış sıralı birleştirilir.
+    ``dates`` verilirse sadece o günlerin oturumları döner. ``lesson_filters``
+    Lesson alanlarına uygulanır (ör. ``teacher_id=3``, ``id=7``). ``chunk_size``
+    verilirse materialize satırlar ``iterator()`` ile parça parça okunur.
+    """
+    from .models import Lesson, LessonDay
+
+    day_filters = {}
+    if dates is not None:
+        if not dates:
+            return
+        # Kurallı dersler bu günleri kapsayan pencere için açılıp süzülür
+        day_filters['date__in'] = dates
+        window_start, window_end = min(dates), max(dates) + timedelta(days=1)
+    else:
+        if window_start is not None:
+            day_filters['date__gte'] = window_start
+        if window_end is not None:
+            day_filters['date__lt'] = window_end
+
+    lessons = Lesson.objects.filter(**lesson_filters)
+    if exclude_lesson_id:
+        lessons = lessons.exclude(id=exclude_lesson_id)
+
+    materialized = (
+        LessonDay.objects.filter(lesson__schedule_mode=Lesson.MATERIALIZED, **day_filters)
+        .filter(**{f'lesson__{key}': value for key, value in lesson_filters.items()})
+        .order_by('date', 'start_time')
+        .values_list(
+            'date', 'start_time', 'end_time', 'lesson_id', 'lesson__title', 'lesson__teacher__username', 'id',
+            'lesson__teacher_id',
+        )
+    )
+    if exclude_lesson_id:
+        materialized = materialized.exclude(lesson_id=exclude_lesson_id)
+    if chunk_size:
+        materialized = materialized.iterator(chunk_size=chunk_size)
+
+    # Pencereyle kesişen kurallı dersler: start_date < pencere sonu, end_date > pencere başı
+    recurring = lessons.filter(schedule_mode=Lesson.RECURRING).select_related('teacher').only(
+        'id', 'title', 'start_date', 'duration_weeks', 'duration_hours', 'recurrence_rule', 'schedule_mode',
+        'teacher_id', 'teacher__username',
+    )
+    if window_end is not None:
+        recurring = recurring.filter(start_date__lt=day_range(window_end)[0])
+    if window_start is not None:
+        recurring = recurring.filter(end_date__gt=day_range(window_start)[0])
+    recurring = list(recurring)
+
+    overrides = defaultdict(list)
+    if recurring:
+        for override in LessonDay.objects.filter(lesson__in=[lesson.id for lesson in recurring], **day_filters):
+            overrides[override.lesson_id].append(override)
+
+    expanded = [
+        iter_lesson_sessions(lesson, overrides[lesson.id], window_start, window_end) for lesson in recurring
+    ]
+    for session in heapq.merge(
+        (Session(*row) for row in materialized), *expanded, key=lambda session: (session.date, session.start_time),
+    ):
+        if dates is None or session.date in dates:
+            yield session
@@ -0,0 +1,307 @@
+"""Yönetici raporları için günlük ve haftalık özet (rollup) tabloları.
+
+``refresh_rollups`` sadece son çalışmadan (high-water mark) beri değişen
+özetleri yeniden hesaplar: kendisi değişen (program, başlık, kapasite)
+derslerin tüm günleri, kayıt veya yoklaması değişen derslerin sadece ilgili
+(ders, gün) satırları ve sipariş verilen günler. Ardından bu günlerin düştüğü
+haftalar günlük tablolardan toplanır. Raporlar sadece
+özet tablolarını okur; kayıt veya sipariş geçmişi büyüdükçe yavaşlamaz.
+
+Değişiklikler zaman damgalarıyla bulunur: ``Lesson.updated_at``,
+``Enrollment.created_at`` / ``status_changed_at``, ``Attendance.recorded_at``
+ve ``Order.created_at``. Silinen kayıtlar ve siparişler zaman damgası
+bırakmadığı için ders veya gün başka bir nedenle yeniden hesaplanana ya da
+``--full`` ile çalıştırılana kadar özetlerde kalır.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from sales.models import Order
+from .models import (
+    Attendance, DailyLessonRollup, DailyRevenueRollup, Enrollment, Lesson, RollupState, WeeklyRollup,
+    WeeklyTeacherRollup,
+)
+from .recurrence import iter_sessions
+from .schedule import session_interval
+from .utils import day_range
+
+STATE_NAME = 'manager_reports'
+# Zaman damgası yazıldıktan sonra commit edilen transaction'lar kaçmasın diye
+# her çalışma son işaretin bu kadar öncesinden başlar; yeniden hesaplama idempotenttir
+OVERLAP = timedelta(minutes=5)
+LESSON_CHUNK_SIZE = 200
+
+
+def week_start(day):
+    return day - timedelta(days=day.weekday())
+
+
+def refresh_rollups(full=False, now=None):
+    """Değişen dersleri, gelir günlerini ve haftaları yeniden hesaplar.
+
+    ``full`` ile mevcut derslerin tüm günleri, tüm gelir günleri ve tüm
+    haftalar kaynak tablolardan yeniden hesaplanır. Tablolar boşaltılmaz:
+    silinen derslerin geçmiş günleri kaynakta artık bulunmadığı için olduğu
+    gibi korunur. Yeniden hesaplanan ders, gün ve hafta sayılarını döndürür.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        state, _ = RollupState.objects.select_for_update().get_or_create(name=STATE_NAME)
+        since = None if full or state.high_water_mark is None else state.high_water_mark - OVERLAP
+
+        lesson_ids = changed_lessons(since)
+        lesson_days = set() if since is None else changed_lesson_days(since, lesson_ids)
+        revenue_days = changed_revenue_days(since)
+        if since is None:
+            # Siparişi kalmayan günlerin satırları da yeniden hesaplanıp silinir
+            revenue_days |= set(DailyRevenueRollup.objects.values_list('day', flat=True))
+        weeks = refresh_lessons(lesson_ids)
+        weeks |= refresh_lesson_days(lesson_days)
+        weeks |= refresh_revenue(revenue_days)
+        weeks |= purge_deleted_lessons(timezone.localdate(now))
+        if since is None:
+            weeks |= rebuild_all_weeks()
+        refresh_weeks(weeks)
+
+        state.high_water_mark = now
+        state.refreshed_at = timezone.now()
+        state.save()
+    return {
+        'lessons': len(lesson_ids), 'lesson_days': len(lesson_days), 'revenue_days': len(revenue_days),
+        'weeks': len(weeks),
+    }
+
+
+def changed_lessons(since):
+    # Programı, başlığı veya kapasitesi değişen dersin tüm günleri etkilenir
+    if since is None:
+        return set(Lesson.objects.values_list('id', flat=True))
+    return set(Lesson.objects.filter(updated_at__gt=since).values_list('id', flat=True))
+
+
+def changed_lesson_days(since, skip_lesson_ids=()):
+    """Son çalışmadan beri kayıt veya yoklaması değişen (ders, gün) çiftleri.
+
+    Onaydan çıkan bir kaydın eski onay günü saklanmadığı için, onaylı olmayan
+    bir duruma geçen kayıtların derslerinde onay sayılan günler de eklenir.
+    Tüm günleri zaten yeniden hesaplanacak dersler atlanır.
+    """
+    # Her kaynak kendi zaman damgası index'iyle okunur
+    sources = [
+        Enrollment.objects.filter(created_at__gt=since).annotate(day=TruncDate('created_at')),
+        Enrollment.objects.filter(status_changed_at__gt=since).annotate(day=TruncDate('status_changed_at')),
+        Attendance.objects.filter(recorded_at__gt=since).annotate(day=F('session_date')),
+    ]
+    pairs = set()
+    for queryset in sources:
+        pairs.update(queryset.values_list('lesson_id', 'day').order_by().distinct())
+    revoked = Enrollment.objects.filter(status_changed_at__gt=since).exclude(status='approved').values('lesson_id')
+    pairs.update(
+        DailyLessonRollup.objects.filter(lesson_id__in=revoked, approvals__gt=0).values_list('lesson_id', 'day')
+    )
+    skip_lesson_ids = set(skip_lesson_ids)
+    return {(lesson_id, day) for lesson_id, day in pairs if lesson_id not in skip_lesson_ids}
+
+
+def changed_revenue_days(since):
+    orders = Order.objects.all() if since is None else Order.objects.filter(created_at__gt=since)
+    return set(orders.annotate(day=TruncDate('created_at')).values_list('day', flat=True).distinct())
+
+
+def refresh_lessons(lesson_ids):
+    # Kendisi değişen derslerin tüm günleri parça parça yeniden yazılır; etkilenen haftalar döner
+    weeks = set()
+    lesson_ids = sorted(lesson_ids)
+    for index in range(0, len(lesson_ids), LESSON_CHUNK_SIZE):
+        weeks |= refresh_lesson_chunk(lesson_ids[index:index + LESSON_CHUNK_SIZE])
+    return weeks
+
+
+def refresh_lesson_days(pairs):
+    # Sadece verilen (ders, gün) satırları parça parça yeniden yazılır; etkilenen haftalar döner
+    days = defaultdict(set)
+    for lesson_id, day in pairs:
+        days[lesson_id].add(day)
+    weeks = set()
+    lesson_ids = sorted(days)
+    for index in range(0, len(lesson_ids), LESSON_CHUNK_SIZE):
+        chunk = lesson_ids[index:index + LESSON_CHUNK_SIZE]
+        weeks |= refresh_lesson_chunk(chunk, {lesson_id: days[lesson_id] for lesson_id in chunk})
+    return weeks
+
+
+def refresh_lesson_chunk(lesson_ids, days=None):
+    """Derslerin günlük özet satırlarını yeniden yazar; etkilenen haftaları döndürür.
+
+    ``days`` ({ders id: gün kümesi}) verilirse sadece o (ders, gün) satırları
+    hesaplanıp değiştirilir, verilmezse derslerin tüm günleri.
+    """
+    all_days = set().union(*days.values()) if days is not None else None
+
+    def wanted(lesson_id, day):
+        return days is None or day in days.get(lesson_id, ())
+
+    lessons = {
+        lesson_id: (title, teacher_id, max_students)
+        for lesson_id, title, teacher_id, max_students in Lesson.objects.filter(id__in=lesson_ids)
+        .values_list('id', 'title', 'teacher_id', 'max_students')
+    }
+    rows = defaultdict(lambda: dict.fromkeys(DailyLessonRollup.METRIC_FIELDS, 0))
+
+    for session in iter_sessions(dates=all_days, id__in=list(lessons)):
+        if not wanted(session.lesson_id, session.date):
+            continue
+        start, end = session_interval(session.date, session.start_time, session.end_time)
+        row = rows[session.lesson_id, session.date]
+        row['sessions'] += 1
+        row['session_minutes'] += int((end - start).total_seconds() // 60)
+        row['seats_offered'] += lessons[session.lesson_id][2]
+
+    grouped = [
+        ('attended', Attendance.objects.filter(lesson_id__in=lessons).values('lesson_id', day=F('session_date'))),
+        ('requests', Enrollment.objects.filter(lesson_id__in=lessons).values('lesson_id', day=TruncDate('created_at'))),
+        ('approvals', Enrollment.objects.filter(lesson_id__in=lessons, status='approved').values(
+            'lesson_id', day=TruncDate('status_changed_at'),
+        )),
+    ]
+    for field, queryset in grouped:
+        if all_days is not None:
+            queryset = queryset.filter(day__in=all_days)
+        for lesson_id, day, total in queryset.annotate(total=Count('id')).order_by().values_list('lesson_id', 'day', 'total'):
+            if wanted(lesson_id, day):
+                rows[lesson_id, day][field] = total
+
+    # Eski satırların haftaları da yeniden toplanır (ör. ders başka bir haftaya taşındıysa)
+    existing = DailyLessonRollup.objects.filter(lesson_id__in=lesson_ids)
+    if days is not None:
+        condition = Q()
+        for lesson_id, lesson_days in days.items():
+            condition |= Q(lesson_id=lesson_id, day__in=lesson_days)
+        existing = existing.filter(condition)
+    weeks = {week_start(day) for day in existing.values_list('day', flat=True).distinct()}
+    existing.delete()
+    DailyLessonRollup.objects.bulk_create(
+        [
+            DailyLessonRollup(
+                day=day, lesson_id=lesson_id, lesson_title=lessons[lesson_id][0], teacher_id=lessons[lesson_id][1],
+                **metrics,
+            )
+            for (lesson_id, day), metrics in rows.items()
+        ],
+        batch_size=500,
+    )
+    return weeks | {week_start(day) for _, day in rows}
+
+
+def refresh_revenue(days):
+    if not days:
+        return set()
+    start, end = day_range(min(days))[0], day_range(max(days))[1]
+    totals = {
+        day: (orders, revenue)
+        for day, orders, revenue in Order.objects.filter(created_at__gte=start, created_at__lt=end)
+        .annotate(day=TruncDate('created_at')).values('day')
+        .annotate(orders=Count('id'), revenue=Sum('total_amount')).order_by()
+        .values_list('day', 'orders', 'revenue')
+        if day in days
+    }
+    DailyRevenueRollup.objects.filter(day__in=days).delete()
+    DailyRevenueRollup.objects.bulk_create([
+        DailyRevenueRollup(day=day, orders=orders, revenue=revenue) for day, (orders, revenue) in totals.items()
+    ])
+    return {week_start(day) for day in days}
+
+
+def purge_deleted_lessons(today):
+    # Silinen derslerin geçmiş günleri rapor geçmişi olarak kalır, gelecekteki oturumları silinir
+    stale = DailyLessonRollup.objects.filter(day__gte=today).exclude(lesson_id__in=Lesson.objects.values('id'))
+    weeks = {week_start(day) for day in stale.values_list('day', flat=True).distinct()}
+    if weeks:
+        stale.delete()
+    return weeks
+
+
+def rebuild_all_weeks():
+    """Günlük satırı olan tüm haftaları döndürür; günlük satırı kalmayan haftaların özetlerini siler."""
+    days = set(DailyLessonRollup.objects.values_list('day', flat=True).distinct())
+    days.update(DailyRevenueRollup.objects.values_list('day', flat=True))
+    weeks = {week_start(day) for day in days}
+    WeeklyTeacherRollup.objects.exclude(week_start__in=weeks).delete()
+    WeeklyRollup.objects.exclude(week_start__in=weeks).delete()
+    return weeks
+
+
+def metric_sums():
+    # Toplamlar model alanlarıyla çakışmasın diye önekli adlarla alınır
+    return {f'total_{field}': Sum(field) for field in DailyLessonRollup.METRIC_FIELDS}
+
+
+def pop_metrics(row):
+    return {field: row.pop(f'total_{field}') or 0 for field in DailyLessonRollup.METRIC_FIELDS}
+
+
+def refresh_weeks(weeks):
+    """Verilen haftaların öğretmen ve salon toplamlarını günlük tablolardan yeniden yazar."""
+    if not weeks:
+        return
+    teacher_ids = set(get_user_model().objects.filter(role='teacher').values_list('id', flat=True))
+    per_teacher, totals = [], []
+    for week in sorted(weeks):
+        days = DailyLessonRollup.objects.filter(day__gte=week, day__lt=week + timedelta(days=7))
+        total = dict.fromkeys(DailyLessonRollup.METRIC_FIELDS, 0)
+        for row in days.values('teacher_id').annotate(**metric_sums()).order_by():
+            metrics = pop_metrics(row)
+            for field, value in metrics.items():
+                total[field] += value
+            # Silinen öğretmenlerin günleri sadece salon toplamına girer
+            if row['teacher_id'] in teacher_ids:
+                per_teacher.append(WeeklyTeacherRollup(week_start=week, teacher_id=row['teacher_id'], **metrics))
+        revenue = DailyRevenueRollup.objects.filter(day__gte=week, day__lt=week + timedelta(days=7)).aggregate(
+            orders=Sum('orders'), revenue=Sum('revenue'),
+        )
+        totals.append(WeeklyRollup(
+            week_start=week, orders=revenue['orders'] or 0, revenue=revenue['revenue'] or 0, **total,
+        ))
+
+    WeeklyTeacherRollup.objects.filter(week_start__in=weeks).delete()
+    WeeklyRollup.objects.filter(week_start__in=weeks).delete()
+    WeeklyTeacherRollup.objects.bulk_create(per_teacher, batch_size=500)
+    WeeklyRollup.objects.bulk_create(totals, batch_size=500)
+
+
+def weekly_report(week_count, today=None, top_lessons=10):
+    """Son ``week_count`` haftanın raporunu sadece özet tablolarından okur.
+
+    Sorgu sayısı sabittir ve okunan satır sayısı sadece pencereye bağlıdır;
+    kayıt ve sipariş geçmişinin boyutundan etkilenmez.
+    """
+    today = today or timezone.localdate()
+    first_week = week_start(today) - timedelta(weeks=week_count - 1)
+    weeks = list(WeeklyRollup.objects.filter(week_start__gte=first_week).order_by('-week_start'))
+    teachers = []
+    for row in (
+        WeeklyTeacherRollup.objects.filter(week_start__gte=first_week)
+        .values('teacher_id', 'teacher__username').annotate(**metric_sums()).order_by('teacher__username')
+    ):
+        teacher = WeeklyTeacherRollup(teacher_id=row['teacher_id'], **pop_metrics(row))
+        teacher.username = row['teacher__username']
+        teachers.append(teacher)
+    # Pencerede en yüksek doluluk oranına sahip dersler
+    lessons = [
+        DailyLessonRollup(lesson_id=row['lesson_id'], lesson_title=row['lesson_title'], **pop_metrics(row))
+        for row in DailyLessonRollup.objects.filter(day__gte=first_week, seats_offered__gt=0)
+        .values('lesson_id', 'lesson_title').annotate(**metric_sums())
+        .order_by((F('total_attended') * 1.0 / F('total_seats_offered')).desc(), 'lesson_id')[:top_lessons]
+    ]
+    state = RollupState.objects.filter(name=STATE_NAME).first()
+    return {
+        'weeks': weeks,
+        'teachers': teachers,
+        'top_lessons': lessons,
+        'first_week': first_week,
+        'refreshed_at': state.refreshed_at if state else None,
+    }
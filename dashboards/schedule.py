@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta
+
+
+def session_interval(date, start_time, end_time):
+    # Gece yarısını geçen oturumların bitişi bir sonraki güne taşınır
+    start = datetime.combine(date, start_time)
+    end = datetime.combine(date, end_time)
+    if end <= start:
+        end += timedelta(days=1)
+    return start, end
+
+
+class IntervalTree:
+    """Statik, merkezli aralık ağacı.
+
+    Aralıklar yarı açık [start, end) kabul edilir; n aralık için kurulum
+    O(n log n), bir çakışma sorgusu O(log n + k) sürer.
+    """
+
+    def __init__(self, intervals):
+        # Boş aralıklar [t, t) hiçbir şeyle çakışmaz
+        intervals = [interval for interval in intervals if interval[0] < interval[1]]
+        self.center = None
+        self.left = self.right = None
+        self.by_start = self.by_end = []
+        if not intervals:
+            return
+
+        # Merkez bir başlangıç noktası seçilir; o aralık her zaman bu düğümde kalır
+        starts = sorted(interval[0] for interval in intervals)
+        self.center = starts[len(starts) // 2]
+        left, right, overlapping = [], [], []
+        for interval in intervals:
+            if interval[1] <= self.center:
+                left.append(interval)
+            elif interval[0] > self.center:
+                right.append(interval)
+            else:
+                overlapping.append(interval)
+
+        self.by_start = sorted(overlapping, key=lambda interval: interval[0])
+        self.by_end = sorted(overlapping, key=lambda interval: interval[1], reverse=True)
+        self.left = IntervalTree(left) if left else None
+        self.right = IntervalTree(right) if right else None
+
+    def overlapping(self, start, end):
+        found = []
+        if start >= end:
+            return found
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node is None or node.center is None:
+                continue
+            if end <= node.center:
+                # Sorgu merkezin solunda: merkezdeki aralıklardan başlangıcı end'den küçük olanlar
+                for interval in node.by_start:
+                    if interval[0] >= end:
+                        break
+                    found.append(interval)
+                stack.append(node.left)
+            elif start > node.center:
+                # Sorgu merkezin sağında: bitişi start'tan büyük olanlar
+                for interval in node.by_end:
+                    if interval[1] <= start:
+                        break
+                    found.append(interval)
+                stack.append(node.right)
+            else:
+                # Sorgu merkezi kapsıyor: merkezdeki tüm aralıklar çakışır
+                found.extend(node.by_start)
+                stack.append(node.left)
+                stack.append(node.right)
+        return found
+
+
+def find_schedule_conflicts(teacher_id, schedule, exclude_lesson_id=None):
+    """Önerilen programın öğretmenin mevcut oturumlarıyla çakışmalarını döndürür.
+
+    ``schedule`` {tarih: (başlangıç saati, bitiş saati)} sözlüğüdür
+    (bkz. ``Lesson.build_lesson_schedule``). Öğretmenin sadece ilgili
+    günlerdeki oturumları ``iter_sessions`` ile (materialize edilmiş dersler
+    için tek bir index'li sorgu) çekilir ve bir aralık ağacında karşılaştırılır.
+    """
+    from .recurrence import iter_sessions
+
+    if not teacher_id or not schedule:
+        return []
+
+    # Gece yarısını geçen oturumlar için komşu günler de sorguya dahil edilir
+    dates = set()
+    for date in schedule:
+        dates.update((date - timedelta(days=1), date, date + timedelta(days=1)))
+
+    sessions = iter_sessions(dates=dates, exclude_lesson_id=exclude_lesson_id, teacher_id=teacher_id)
+    tree = IntervalTree(
+        (
+            *session_interval(session.date, session.start_time, session.end_time),
+            (session.lesson_day_id, session.lesson_id, session.title),
+        )
+        for session in sessions
+    )
+
+    conflicts = []
+    for date, (start_time, end_time) in sorted(schedule.items()):
+        start, end = session_interval(date, start_time, end_time)
+        overlapping = sorted(tree.overlapping(start, end), key=lambda interval: interval[:2])
+        for other_start, other_end, (lesson_day_id, lesson_id, title) in overlapping:
+            conflicts.append({
+                'start': start,
+                'end': end,
+                'conflicting_session_id': lesson_day_id,
+                'conflicting_lesson_id': lesson_id,
+                'conflicting_lesson_title': title,
+                'conflicting_start': other_start,
+                'conflicting_end': other_end,
+            })
+    return conflicts
+
+
+def find_conflicts_in_batch(sessions):
+    """Birbirine karşı doğrulanacak oturum listesindeki çakışmaları bulur.
+
+    ``sessions`` (start, end, payload) üçlülerinden oluşur; toplu içe aktarma
+    gibi henüz veritabanında olmayan programların kendi içinde kontrolü için.
+    Her çakışan çift bir kez, (payload, diğer payload) olarak döner.
+    """
+    sessions = list(sessions)
+    tree = IntervalTree((start, end, index) for index, (start, end, _) in enumerate(sessions))
+    conflicts = []
+    for index, (start, end, payload) in enumerate(sessions):
+        for _, _, other_index in tree.overlapping(start, end):
+            if other_index > index:
+                conflicts.append((payload, sessions[other_index][2]))
+    return conflicts
@@ -0,0 +1,165 @@
+import re
+from django.contrib.auth import get_user_model
+from django.db import connections, migrations, models
+from django.db.models import F, Lookup, Q
+
+# FTS5 sanal tablosu; rowid her zaman Lesson.id ile aynıdır
+LESSON_FTS_TABLE = 'dashboards_lesson_fts'
+# Sıralı aramada bm25 skorunun eklendiği annotate adı; küçük skor daha alakalıdır
+RANK_ANNOTATION = 'search_rank'
+
+# Lesson/User değişikliklerini FTS tablosuna yansıtan trigger'lar (sadece SQLite).
+# Güncelleme trigger'ı sadece indekslenen kolonlar yazıldığında çalışır; sayaç,
+# updated_at gibi diğer kolonlara yapılan UPDATE'ler trigger'ı hiç tetiklemez.
+SEARCH_TRIGGERS_SQL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS dashboards_lesson_fts_insert AFTER INSERT ON dashboards_lesson
+    BEGIN
+        INSERT INTO dashboards_lesson_fts (rowid, title, description, teacher)
+        VALUES (new.id, new.title, new.description, (SELECT username FROM users_user WHERE id = new.teacher_id));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS dashboards_lesson_fts_update
+    AFTER UPDATE OF title, description, teacher_id ON dashboards_lesson
+    WHEN old.title IS NOT new.title OR old.description IS NOT new.description OR old.teacher_id IS NOT new.teacher_id
+    BEGIN
+        DELETE FROM dashboards_lesson_fts WHERE rowid = old.id;
+        INSERT INTO dashboards_lesson_fts (rowid, title, description, teacher)
+        VALUES (new.id, new.title, new.description, (SELECT username FROM users_user WHERE id = new.teacher_id));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS dashboards_lesson_fts_delete AFTER DELETE ON dashboards_lesson
+    BEGIN
+        DELETE FROM dashboards_lesson_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS dashboards_lesson_fts_teacher AFTER UPDATE OF username ON users_user
+    WHEN old.username IS NOT new.username
+    BEGIN
+        UPDATE dashboards_lesson_fts SET teacher = new.username
+        WHERE rowid IN (SELECT id FROM dashboards_lesson WHERE teacher_id = new.id);
+    END
+    """,
+]
+
+SEARCH_TRIGGERS = [
+    'dashboards_lesson_fts_insert',
+    'dashboards_lesson_fts_update',
+    'dashboards_lesson_fts_delete',
+    'dashboards_lesson_fts_teacher',
+]
+
+# Arama yapılabilecek kolonlar ve FTS kullanılamadığında karşılık gelen ORM alanları
+SEARCH_COLUMNS = {
+    'title': 'title',
+    'description': 'description',
+    'teacher': 'teacher__username',
+}
+
+
+class SearchDocumentField(models.TextField):
+    """FTS5 tablosunun kendi adındaki gizli kolonu; sadece MATCH sorgularında kullanılır."""
+
+
+@SearchDocumentField.register_lookup
+class Match(Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+def fts_available(using='default'):
+    return connections[using].vendor == 'sqlite'
+
+
+def build_match_expression(query, columns=None):
+    # Her kelime önek (prefix) araması olarak eklenir, kelimeler AND ile birleşir
+    terms = re.findall(r'\w+', query)
+    if not terms:
+        return None
+    expression = ' '.join(f'"{term}"*' for term in terms)
+    if columns:
+        expression = '{%s} : (%s)' % (' '.join(columns), expression)
+    return expression
+
+
+def search_lessons(lessons, query, columns=None, prefix=''):
+    """Lesson sorgu setini verilen arama metnine göre filtreler.
+
+    SQLite'ta FTS5 indeksi kullanılır; bm25 skoru ``search_rank`` olarak
+    eklenir ve sonuçlar bu skora göre dizilir. Diğer veritabanlarında (veya
+    metinde kelime yoksa) icontains sorgularına geri dönülür ve sıralama
+    değişmez. Derse bağlı başka bir modelin sorgu seti için ilişki yolu
+    ``prefix`` ile verilir (ör. ``'lesson__'``).
+    """
+    columns = list(columns or SEARCH_COLUMNS)
+    expression = build_match_expression(query, columns)
+
+    if expression is not None and fts_available(lessons.db):
+        lessons = lessons.filter(**{f'{prefix}search_index__document__match': expression})
+        return lessons.annotate(**{RANK_ANNOTATION: F(f'{prefix}search_index__rank')}).order_by(RANK_ANNOTATION, 'id')
+
+    condition = Q()
+    for column in columns:
+        condition |= Q(**{f'{prefix}{SEARCH_COLUMNS[column]}__icontains': query})
+    return lessons.filter(condition)
+
+
+def search_ordering(queryset, default=('start_date', 'id')):
+    # Sayfalama anahtarı: sıralı arama yapıldıysa (skor, id), yoksa görünümün varsayılan sırası
+    if RANK_ANNOTATION in queryset.query.annotations:
+        return (RANK_ANNOTATION, 'id')
+    return default
+
+
+def rebuild_search_index(using='default'):
+    # FTS tablosunu Lesson ve User tablolarından baştan doldurur
+    from .models import Lesson
+
+    if not fts_available(using):
+        return 0
+    lesson_table = Lesson._meta.db_table
+    user_table = get_user_model()._meta.db_table
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {LESSON_FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {LESSON_FTS_TABLE} (rowid, title, description, teacher) '
+            f'SELECT l.id, l.title, l.description, u.username '
+            f'FROM {lesson_table} l INNER JOIN {user_table} u ON u.id = l.teacher_id'
+        )
+        return cursor.rowcount
+
+
+def create_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in SEARCH_TRIGGERS_SQL:
+        schema_editor.execute(statement)
+
+
+def drop_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for name in reversed(SEARCH_TRIGGERS):
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS {name}')
+
+
+def without_search_triggers(*operations):
+    """Migration işlemlerini arama trigger'ları kaldırılmış halde çalıştırır.
+
+    SQLite'ta dashboards_lesson veya users_user tablosunu yeniden oluşturan
+    (remake) işlemler (ör. default'lu AddField) tablonun trigger'larını siler
+    ya da diğer tablonun trigger'ları yüzünden yeniden adlandırmada hata verir. Böyle işlemler
+    ``operations = [*without_search_triggers(AddField(...))]`` şeklinde sarılır.
+    """
+    return [
+        migrations.RunPython(drop_search_triggers, create_search_triggers),
+        *operations,
+        migrations.RunPython(create_search_triggers, drop_search_triggers),
+    ]
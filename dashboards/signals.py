@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from . import catalogue
+from .models import Enrollment, Lesson, LessonDay
+
+
+@receiver(post_delete, sender=Enrollment)
+def decrease_lesson_counters(sender, instance, **kwargs):
+    # QuerySet.delete() ve cascade silmeler Model.delete() çağırmadığı için sinyal kullanılır
+    old_status = getattr(instance, '_loaded_status', instance.status)
+    Enrollment.update_lesson_counters(instance.lesson_id, old_status=old_status)
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def invalidate_lesson_catalogue(sender, instance, **kwargs):
+    catalogue.invalidate_lessons([instance.id])
+
+
+# LessonDay için post_delete dinlenmez: dinleyici olması QuerySet.delete()'in hızlı
+# silme yolunu kapatır. Ders günleri sadece Lesson.save() ve ders silinirken silinir,
+# ikisi de yukarıdaki Lesson sinyaliyle geçersiz kılınır.
+@receiver(post_save, sender=LessonDay)
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def invalidate_related_catalogue(sender, instance, **kwargs):
+    catalogue.invalidate_lessons([instance.lesson_id])
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_user_catalogue(sender, instance, created, update_fields=None, **kwargs):
+    # Katalog satırları öğretmen adını, ders sayfaları onaylı öğrencilerin adlarını da gösterir;
+    # sadece kullanıcı adı gerçekten değiştiyse verdiği ve onaylı kaydı olduğu dersler geçersiz kılınır
+    if created or (update_fields is not None and 'username' not in update_fields):
+        return
+    if not instance.username_has_changed():
+        return
+    lesson_ids = set(instance.lessons.values_list('id', flat=True))
+    lesson_ids.update(instance.enrollments.filter(status='approved').values_list('lesson_id', flat=True))
+    catalogue.invalidate_lessons(lesson_ids)
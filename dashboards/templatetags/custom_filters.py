@@ -1,4 +1,5 @@
 from django import template
+from dashboards import catalogue
 
 register = template.Library()
 
@@ -8,9 +9,40 @@ def dict_get(dictionary, key):
 
 @register.filter
 def get_status(enrollments, lesson_id):
-    enrollment = enrollments.filter(lesson_id=lesson_id).first()
-    return enrollment.status if enrollment else 'Not Enrolled'
+    # Sorgu seti her çağrıda yeniden filtrelenmez; ilk iterasyonda önbelleğe alınan sonuçlar taranır
+    for enrollment in enrollments:
+        if enrollment.lesson_id == lesson_id:
+            return enrollment.status
+    return 'Not Enrolled'
 
 @register.filter
 def custom_range(value):
-    return range(1, value + 1)
\ No newline at end of file
+    return range(1, value + 1)
+
+@register.filter
+def percent(value):
+    # Paydası sıfır olan oranlar (ör. koltuk sunulmayan hafta) None gelir
+    return '-' if value is None else f'{value:.0%}'
+
+class CatalogueFragmentNode(template.Node):
+    def __init__(self, nodelist, name, lesson):
+        self.nodelist = nodelist
+        self.name = name
+        self.lesson = lesson
+
+    def render(self, context):
+        lesson = self.lesson.resolve(context)
+        # Görünüm catalogue.attach_versions ile sürümleri eklediyse ekstra önbellek okuması yapılmaz
+        version = getattr(lesson, 'catalogue_version', None) or catalogue.get_versions([lesson.id])[lesson.id]
+        key = catalogue.make_key('fragment', self.name.resolve(context), lesson.id, version)
+        return catalogue.cached(key, lambda: self.nodelist.render(context))
+
+@register.tag
+def catalogue_fragment(parser, token):
+    # {% catalogue_fragment "satır adı" lesson %}...{% endcatalogue_fragment %}: ders sürümüyle saklanan parça
+    bits = token.split_contents()
+    if len(bits) != 3:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' takes a fragment name and a lesson.")
+    nodelist = parser.parse(('endcatalogue_fragment',))
+    parser.delete_first_token()
+    return CatalogueFragmentNode(nodelist, parser.compile_filter(bits[1]), parser.compile_filter(bits[2]))
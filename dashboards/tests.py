@@ -1,3 +1,1433 @@
-from django.test import TestCase
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+import csv
+import os
+import tempfile
+from io import StringIO
+from threading import Barrier, Lock, Thread
+from unittest import mock, skipUnless
+from django.core.exceptions import ValidationError
+from django.core import signing
+from django.core.management import CommandError, call_command
+from django.db import connection, connections, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from users.models import User
+from sales.models import Order, Product
+from . import attendance, benchmarks, catalogue, enrollments, ics, imports, rollups, search, views
+from .models import (
+    Attendance, DailyLessonRollup, DailyRevenueRollup, Lesson, LessonDay, Enrollment, WeeklyRollup, WeeklyTeacherRollup,
+)
+from .pagination import KeysetPaginator
+from .querybudget import QueryBudgetTestMixin
+from .recurrence import WeeklyRule, parse_weekly_rule
+from .schedule import find_conflicts_in_batch
 
-# Create your tests here.
+
+# Eşzamanlı yazıcılar sadece dosya tabanlı, IMMEDIATE kipli veritabanında sıraya girer (bkz. settings_loadtest)
+concurrent_writes = skipUnless(
+    connection.vendor != 'sqlite' or connection.settings_dict['OPTIONS'].get('transaction_mode') == 'IMMEDIATE',
+    'run with --settings=gym_management.settings_loadtest',
+)
+
+
+def explain_query_plan(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN is SQLite specific')
+class SargableDateFilterTests(TestCase):
+    # Tarih filtresi uygulanan her görünüm ve bu görünümü açabilen kullanıcı rolü
+    DATE_FILTER_VIEWS = [
+        ('teacher', '/teacher_dashboard/'),
+        ('teacher', '/all_lessons/'),
+        ('student', '/student_dashboard/'),
+        ('student', '/available_lessons/'),
+        ('manager', '/teacher/lessons/'),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {
+            role: User.objects.create_user(username=role, password='pass', role=role)
+            for role in ('teacher', 'student', 'manager')
+        }
+        start = datetime(2024, 1, 1, 10, tzinfo=dt_timezone.utc)
+        for index in range(20):
+            lesson = Lesson.objects.create(
+                title=f'Lesson {index}', description='Strength training', lesson_type='group',
+                teacher=cls.users['teacher'], max_students=5, duration_weeks=1, duration_hours=1,
+                start_date=start + timedelta(days=index),
+            )
+            if index % 2:
+                Enrollment.objects.create(lesson=lesson, student=cls.users['student'])
+
+    def setUp(self):
+        catalogue.clear()
+
+    def test_date_filters_are_sargable(self):
+        # ANALYZE çalıştırılmaz: küçük test verisinde planlayıcı istatistiklere bakıp tam taramayı seçebilir
+        for role, url in self.DATE_FILTER_VIEWS:
+            with self.subTest(url=url):
+                self.client.force_login(self.users[role])
+                with CaptureQueriesContext(connection) as context:
+                    response = self.client.get(url, {'date': '2024-01-04'})
+                self.assertEqual(response.status_code, 200)
+
+                date_queries = [query['sql'] for query in context.captured_queries if 'start_date' in query['sql']]
+                self.assertTrue(date_queries, f'{url} did not run a start_date query')
+                for sql in date_queries:
+                    self.assertNotIn('django_datetime_cast_date', sql)
+                    for step in explain_query_plan(sql):
+                        full_scan = step.startswith('SCAN ') and ' USING ' not in step
+                        self.assertFalse(full_scan, f'{url} falls back to a full scan: {step}\n{sql}')
+
+
+class DashboardQueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username='teacher', password='pass', role='teacher')
+        cls.student = User.objects.create_user(username='student', password='pass', role='student')
+        cls.start = datetime(2024, 1, 1, 10, tzinfo=dt_timezone.utc)
+        cls.lesson = cls.create_lessons(1)[0]
+        cls.enroll_students(cls.lesson, 2)
+        cls.enrollment = Enrollment.objects.create(lesson=cls.lesson, student=cls.student)
+
+    @classmethod
+    def create_lessons(cls, count, teacher=None):
+        # Aynı öğretmenin haftalık oturumları çakışmasın diye her hafta bir saat kaydırılır
+        offset = Lesson.objects.count()
+        return [
+            Lesson.objects.create(
+                title=f'Lesson {offset + index}', description='Strength training', lesson_type='group',
+                teacher=teacher or cls.teacher, max_students=50, duration_weeks=4, duration_hours=1,
+                start_date=cls.start + timedelta(days=offset + index, hours=(offset + index) // 7 % 12),
+            )
+            for index in range(count)
+        ]
+
+    @classmethod
+    def enroll_students(cls, lesson, count):
+        offset = User.objects.count()
+        statuses = ['requested', 'approved', 'rejected']
+        for index in range(count):
+            student = User.objects.create(username=f'member{offset + index}', role='student')
+            Enrollment.objects.create(lesson=lesson, student=student, status=statuses[index % 3])
+
+    def grow(self):
+        # Sayfa boyutunu (5) aşacak kadar ders, kayıt ve öğrenci etkileşimi eklenir
+        for lesson in self.create_lessons(12):
+            self.enroll_students(lesson, 3)
+            Enrollment.objects.create(lesson=lesson, student=self.student)
+        other_teacher = User.objects.create(username=f'coach{User.objects.count()}', role='teacher')
+        for lesson in self.create_lessons(12, teacher=other_teacher):
+            self.enroll_students(lesson, 2)
+        self.enroll_students(self.lesson, 20)
+
+    def test_teacher_views(self):
+        self.client.force_login(self.teacher)
+        for url in [
+            '/teacher_dashboard/',
+            '/teacher_dashboard/?status=requested',
+            '/all_lessons/?query=lesson',
+            f'/lessons/{self.lesson.id}/',
+            '/lessons/',
+            '/lessons/calendar/feed/?start=2024-01-01&end=2024-02-01',
+            '/lessons/create/',
+        ]:
+            with self.subTest(url=url):
+                self.assertConstantQueries(url, self.grow)
+
+    def test_student_views(self):
+        self.client.force_login(self.student)
+        for url in [
+            '/student_dashboard/',
+            '/student_dashboard/?status=requested',
+            '/available_lessons/?query=lesson',
+            '/all_lessons/?date=2024-01-01',
+        ]:
+            with self.subTest(url=url):
+                self.assertConstantQueries(url, self.grow)
+
+    def test_teacher_dashboard_enrollment_totals(self):
+        # setUpTestData: 'requested', 'approved' ve self.student'ın 'requested' kaydı
+        other = self.create_lessons(1)[0]
+        self.enroll_students(other, 5)
+        waitlisted = User.objects.create(username='waiting', role='student')
+        Enrollment.objects.create(lesson=other, student=waitlisted, status='waitlisted')
+        empty = self.create_lessons(1)[0]
+
+        self.client.force_login(self.teacher)
+        page = self.client.get('/teacher_dashboard/').context['page_obj']
+        totals = {
+            lesson.id: (lesson.requested_total, lesson.approved_total, lesson.rejected_total, lesson.seats_left)
+            for lesson in page
+        }
+        self.assertEqual(totals, {
+            self.lesson.id: (2, 1, 0, 49),
+            other.id: (2, 2, 1, 48),
+            empty.id: (0, 0, 0, 50),
+        })
+
+    def test_enrollment_views(self):
+        self.client.force_login(self.student)
+        self.grow()
+        lesson = self.create_lessons(1)[0]
+        self.assertWithinQueryBudget(f'/lessons/{lesson.id}/enroll/')
+        self.assertWithinQueryBudget(f'/lessons/{lesson.id}/request/')
+
+        self.client.force_login(self.teacher)
+        self.assertWithinQueryBudget('/lessons/create/', method='post', data={
+            'title': 'Morning Yoga', 'description': 'Flow', 'lesson_type': 'group', 'max_students': 10,
+            'duration_weeks': 52, 'duration_hours': 1, 'start_date': '2024-03-01T08:00',
+            'schedule_mode': 'materialized',
+        })
+        self.assertWithinQueryBudget(f'/enrollment/{self.enrollment.id}/approve/')
+        self.assertWithinQueryBudget(f'/enrollment/{self.enrollment.id}/reject/')
+
+
+class ScheduleConflictTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username='teacher', password='pass', role='teacher')
+        cls.lesson = Lesson.objects.create(
+            title='Evening Spin', description='Cardio', lesson_type='group', teacher=cls.teacher,
+            max_students=10, duration_weeks=52, duration_hours=2,
+            start_date=datetime(2024, 1, 1, 18, tzinfo=dt_timezone.utc),
+        )
+
+    def build_lesson(self, start_date, **kwargs):
+        return Lesson(
+            title=kwargs.pop('title', 'Night Boxing'), description='Boxing', lesson_type='group',
+            teacher=kwargs.pop('teacher', self.teacher), max_students=10, duration_weeks=4, duration_hours=1,
+            start_date=start_date, **kwargs,
+        )
+
+    def test_overlapping_lesson_is_rejected(self):
+        lesson = self.build_lesson(datetime(2024, 3, 4, 19, tzinfo=dt_timezone.utc))
+        # Materialize edilmiş oturumlar ve kurallı dersler için birer sorgu
+        with self.assertNumQueries(2):
+            conflicts = lesson.find_schedule_conflicts()
+        self.assertEqual(len(conflicts), 4)
+        self.assertEqual({conflict['conflicting_lesson_id'] for conflict in conflicts}, {self.lesson.id})
+        with self.assertRaises(ValidationError):
+            lesson.save()
+
+    def test_adjacent_and_other_teacher_lessons_are_allowed(self):
+        self.build_lesson(datetime(2024, 3, 4, 20, tzinfo=dt_timezone.utc)).save()
+        other_teacher = User.objects.create(username='coach', role='teacher')
+        self.build_lesson(
+            datetime(2024, 3, 4, 18, tzinfo=dt_timezone.utc), title='Other Spin', teacher=other_teacher,
+        ).save()
+
+    def test_rescheduling_ignores_own_sessions(self):
+        self.lesson.start_date = datetime(2024, 1, 1, 18, 30, tzinfo=dt_timezone.utc)
+        self.lesson.save()
+        self.assertEqual(self.lesson.lesson_days.count(), 52)
+
+    def test_conflicts_api(self):
+        self.client.force_login(self.teacher)
+        response = self.client.get('/lessons/conflicts/', {
+            'start_date': '2024-01-08T17:30', 'duration_weeks': 2, 'duration_hours': 1,
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 2)
+
+        response = self.client.get('/lessons/conflicts/', {
+            'start_date': '2024-01-08T17:30', 'duration_weeks': 2, 'duration_hours': 1, 'lesson': self.lesson.id,
+        })
+        self.assertEqual(response.json()['count'], 0)
+        self.assertEqual(self.client.get('/lessons/conflicts/').status_code, 400)
+        response = self.client.get('/lessons/conflicts/', {
+            'start_date': '2024-13-01T10:00', 'duration_weeks': 2, 'duration_hours': 1,
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.json())
+
+        # Aşırı süreler model sınırına sıkıştırılır; 52 haftalık dersin 2. haftadan sonraki tüm oturumları çakışır
+        response = self.client.get('/lessons/conflicts/', {
+            'start_date': '2024-01-08T17:30', 'duration_weeks': 10 ** 9, 'duration_hours': 1,
+        })
+        self.assertEqual(response.json()['count'], 51)
+
+    def test_interval_tree_matches_brute_force(self):
+        base = datetime(2024, 1, 1)
+        sessions = [
+            (base + timedelta(minutes=start), base + timedelta(minutes=start + length), index)
+            for index, (start, length) in enumerate((i * 37 % 500, i * 13 % 90) for i in range(200))
+        ]
+        # Boş aralıklar hiçbir oturumla çakışmaz
+        expected = {
+            (a[2], b[2]) for i, a in enumerate(sessions) for b in sessions[i + 1:]
+            if a[0] < b[1] and b[0] < a[1] and a[0] < a[1] and b[0] < b[1]
+        }
+        self.assertEqual(set(find_conflicts_in_batch(sessions)), expected)
+
+
+class LessonScheduleSaveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username='teacher', password='pass', role='teacher')
+        cls.lesson = Lesson.objects.create(
+            title='Evening Spin', description='Cardio', lesson_type='group', teacher=cls.teacher,
+            max_students=10, duration_weeks=4, duration_hours=2,
+            start_date=datetime(2024, 1, 1, 18, tzinfo=dt_timezone.utc),
+        )
+
+    def lesson_day_ids(self):
+        return dict(self.lesson.lesson_days.values_list('date', 'id'))
+
+    def lesson_day_queries(self, queries):
+        return [query['sql'] for query in queries if 'dashboards_lessonday' in query['sql']]
+
+    def test_saving_non_schedule_fields_does_not_touch_lesson_days(self):
+        lesson = Lesson.objects.get(id=self.lesson.id)
+        lesson.title = 'Evening Spin Plus'
+        lesson.max_students = 12
+        with CaptureQueriesContext(connection) as queries:
+            lesson.save()
+        self.assertEqual(self.lesson_day_queries(queries), [])
+        self.assertEqual(len(self.lesson_day_ids()), 4)
+
+    def test_duration_change_only_adds_or_removes_the_affected_weeks(self):
+        original = self.lesson_day_ids()
+        lesson = Lesson.objects.get(id=self.lesson.id)
+
+        lesson.duration_weeks = 6
+        lesson.save()
+        extended = self.lesson_day_ids()
+        self.assertEqual(len(extended), 6)
+        self.assertEqual({date: extended[date] for date in original}, original)
+
+        lesson.duration_weeks = 3
+        with CaptureQueriesContext(connection) as queries:
+            lesson.save()
+        shortened = self.lesson_day_ids()
+        self.assertEqual(shortened, {date: original[date] for date in sorted(original)[:3]})
+        # Kalan haftalar yeniden yazılmaz; sadece fazlalar silinir
+        statements = [sql.lstrip().split()[0].upper() for sql in self.lesson_day_queries(queries)]
+        self.assertNotIn('UPDATE', statements)
+        self.assertNotIn('INSERT', statements)
+
+
+class LessonCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username='teacher', password='pass', role='teacher')
+        cls.students = [User.objects.create(username=f'student{index}', role='student') for index in range(3)]
+        cls.lesson = Lesson.objects.create(
+            title='Evening Spin', description='Cardio', lesson_type='group', teacher=cls.teacher,
+            max_students=2, duration_weeks=1, duration_hours=1,
+            start_date=datetime(2024, 1, 1, 18, tzinfo=dt_timezone.utc),
+        )
+
+    def assertCounters(self, approved, requested):
+        self.lesson.refresh_from_db()
+        self.assertEqual((self.lesson.approved_count, self.lesson.requested_count), (approved, requested))
+
+    def test_counters_follow_approve_reject_flip_and_delete(self):
+        requests = [Enrollment.objects.create(lesson=self.lesson, student=student) for student in self.students]
+        self.assertCounters(0, 3)
+
+        enrollments.approve_enrollment(requests[0])
+        self.assertCounters(1, 2)
+        enrollments.reject_enrollment(requests[1])
+        self.assertCounters(1, 1)
+
+        # Onaylı kaydın reddedilmesi ve tekrar talebe dönmesi
+        requests[0].status = 'rejected'
+        requests[0].save()
+        self.assertCounters(0, 1)
+        requests[0].status = 'requested'
+        requests[0].save()
+        self.assertCounters(0, 2)
+
+        # Durumu değişmeyen kayıt sayaçlara dokunmaz
+        self.assertEqual(Enrollment.update_lesson_counters(self.lesson.id, 'requested', 'requested'), 0)
+
+        requests[2].delete()
+        Enrollment.objects.filter(id=requests[0].id).delete()
+        self.assertCounters(0, 0)
+
+    def test_capacity_check_blocks_approvals_on_full_lessons(self):
+        for student in self.students:
+            Enrollment.objects.create(lesson=self.lesson, student=student)
+        self.assertEqual(Enrollment.update_lesson_counters(self.lesson.id, 'requested', 'approved', True), 1)
+        self.assertEqual(Enrollment.update_lesson_counters(self.lesson.id, 'requested', 'approved', True), 1)
+        self.assertEqual(Enrollment.update_lesson_counters(self.lesson.id, 'requested', 'approved', True), 0)
+        self.assertCounters(2, 1)
+
+    def test_rebuild_command_fixes_drifted_counters(self):
+        Enrollment.objects.create(lesson=self.lesson, student=self.students[0], status='approved')
+        Enrollment.objects.create(lesson=self.lesson, student=self.students[1])
+        Lesson.objects.filter(id=self.lesson.id).update(approved_count=5, requested_count=0)
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_lesson_counters', '--check', stdout=StringIO())
+        self.assertCounters(5, 0)
+
+        out = StringIO()
+        call_command('rebuild_lesson_counters', stdout=out)
+        self.assertIn('approved 5 -> 1, requested 0 -> 1', out.getvalue())
+        self.assertCounters(1, 1)
+
+        out = StringIO()
+        call_command('rebuild_lesson_counters', '--check', stdout=out)
+        self.assertIn('All lesson counters are consistent.', out.getvalue())
+
+
+class KeysetPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Aynı isimli ürünler sıralama anahtarında eşitlik oluşturur; id eşitliği bozar
+        cls.products = [
+            Product.objects.create(name=name, description='', price=1)
+            for name in ('b', 'a', 'c', 'b', 'a', 'b', 'd')
+        ]
+
+    def walk(self, paginator):
+        pages, page = [], paginator.get_page()
+        while True:
+            pages.append(page)
+            if not page.has_next():
+                return pages
+            page = paginator.get_page(page.next_page_number())
+
+    def names(self, page):
+        return [(product.name, product.id) for product in page]
+
+    def test_next_and_previous_cursors_cover_ties_once(self):
+        paginator = KeysetPaginator(Product.objects.all(), 3, ordering=('name', 'id'))
+        expected = sorted((product.name, product.id) for product in self.products)
+        pages = self.walk(paginator)
+        self.assertEqual([name for page in pages for name in self.names(page)], expected)
+        self.assertEqual([page.number for page in pages], [1, 2, 3])
+        self.assertFalse(pages[0].has_previous())
+
+        # Son sayfadan geriye doğru aynı sayfalar aynı numaralarla gelir
+        page = pages[-1]
+        for previous in reversed(pages[:-1]):
+            page = paginator.get_page(page.previous_page_number())
+            self.assertEqual(self.names(page), self.names(previous))
+            self.assertEqual(page.number, previous.number)
+        self.assertFalse(page.has_previous())
+
+    def test_descending_ordering(self):
+        paginator = KeysetPaginator(Product.objects.all(), 2, ordering=('-name', 'id'))
+        rows = [(product.name, product.id) for product in self.products]
+        expected = sorted(rows, key=lambda row: (-ord(row[0]), row[1]))
+        self.assertEqual([name for page in self.walk(paginator) for name in self.names(page)], expected)
+
+    def test_count_is_lazy_and_opt_in(self):
+        paginator = KeysetPaginator(Product.objects.all(), 3, ordering=('name', 'id'))
+        with CaptureQueriesContext(connection) as queries:
+            page = paginator.get_page()
+            self.assertEqual(len(page), 3)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"__count"', queries[0]['sql'])
+
+        # Varsayılan şablonlar sayıyı istemez; with_count açıksa tek bir COUNT ile hesaplanır ve saklanır
+        self.client.force_login(User.objects.create_user(username='manager', password='pass', role='manager'))
+        with CaptureQueriesContext(connection) as queries:
+            self.assertContains(self.client.get('/user_management/'), 'manager')
+        self.assertFalse([query for query in queries if '"__count"' in query['sql']])
+        counted = KeysetPaginator(Product.objects.all(), 3, ordering=('name', 'id'), with_count=True)
+        with self.assertNumQueries(1):
+            self.assertEqual((counted.count, counted.num_pages, counted.count), (7, 3, 7))
+
+    def test_tampered_or_unsigned_cursors_fall_back_to_the_first_page(self):
+        paginator = KeysetPaginator(Product.objects.all(), 3, ordering=('name', 'id'))
+        first = self.names(paginator.get_page())
+        cursor = paginator.get_page().next_page_number()
+        unsigned = signing.dumps({'k': ['b', 0], 'd': 'n', 'n': 2}, salt='other', compress=True)
+        for bad in (cursor[:-2] + 'xx', unsigned, '1', 'garbage'):
+            with self.subTest(cursor=bad):
+                page = paginator.get_page(bad)
+                self.assertEqual(self.names(page), first)
+                self.assertEqual(page.number, 1)
+
+
+@concurrent_writes
+class EnrollmentConcurrencyTests(TransactionTestCase):
+    THREADS = 16
+    APPROVALS = 240
+
+    def setUp(self):
+        self.teacher = User.objects.create_user(username='teacher', password='pass', role='teacher')
+        self.lesson = Lesson.objects.create(
+            title='Crowded Class', description='Cardio', lesson_type='group', teacher=self.teacher,
+            max_students=25, duration_weeks=1, duration_hours=1,
+            start_date=datetime(2024, 1, 1, 10, tzinfo=dt_timezone.utc),
+        )
+        User.objects.bulk_create(
+            User(username=f'member{index}', role='student') for index in range(self.APPROVALS)
+        )
+        for student in User.objects.filter(role='student'):
+            enrollments.request_enrollment(self.lesson, student)
+
+    def run_concurrently(self, action, items):
+        # Her iş parçacığı kendi veritabanı bağlantısını açar ve işi bitince kapatır
+        barrier = Barrier(self.THREADS)
+        results = {'changed': 0, 'full': 0}
+        lock = Lock()
+
+        def worker(chunk):
+            barrier.wait()
+            try:
+                for item in chunk:
+                    try:
+                        changed = action(item)
+                    except enrollments.LessonFullError:
+                        outcome = 'full'
+                    else:
+                        outcome = 'changed' if changed else None
+                    if outcome:
+                        with lock:
+                            results[outcome] += 1
+            finally:
+                connections.close_all()
+
+        threads = [Thread(target=worker, args=(items[index::self.THREADS],)) for index in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_approvals_never_overbook(self):
+        pending = list(Enrollment.objects.filter(lesson=self.lesson))
+        # Aynı kayıt birden fazla kez onaylanmaya çalışılır
+        results = self.run_concurrently(enrollments.approve_enrollment, pending + pending[:40])
+
+        self.lesson.refresh_from_db()
+        approved = Enrollment.objects.filter(lesson=self.lesson, status='approved').count()
+        self.assertEqual(approved, self.lesson.max_students)
+        self.assertEqual(results['changed'], self.lesson.max_students)
+        self.assertEqual(self.lesson.approved_count, approved)
+        self.assertEqual(self.lesson.requested_count, self.APPROVALS - approved)
+
+    def test_concurrent_requests_create_one_enrollment(self):
+        student = User.objects.create(username='late', role='student')
+        self.run_concurrently(lambda _: enrollments.request_enrollment(self.lesson, student)[1], list(range(64)))
+        self.assertEqual(Enrollment.objects.filter(lesson=self.lesson, student=student).count(), 1)
+        self.lesson.refresh_from_db()
+        self.assertEqual(self.lesson.requested_count, self.APPROVALS + 1)
+
+
+class BulkEnrollmentTests(QueryBudgetTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username='teacher', password='pass', role='teacher')
+        cls.lessons = [
+            Lesson.objects.create(
+                title=f'Lesson {index}', description='Cardio', lesson_type='group', teacher=cls.teacher,
+                max_students=150, duration_weeks=1, duration_hours=1,
+                start_date=datetime(2024, 1, 1 + index, 10, tzinfo=dt_timezone.utc),
+            )
+            for index in range(2)
+        ]
+        students = User.objects.bulk_create(User(username=f'member{index}', role='student') for index in range(200))
+        for index, student in enumerate(students):
+            Enrollment.objects.create(lesson=cls.lessons[index % 2], student=student)
+
+    def post_bulk(self, ids, action, budget=None):
+        response, _ = self.assertWithinQueryBudget(
+            '/enrollment/bulk/', method='post', budget=budget,
+            data={'enrollment_ids': ids, 'action': action}, HTTP_ACCEPT='application/json',
+        )
+        return response.json()['results']
+
+    def test_bulk_approval_has_fixed_query_cost(self):
+        self.client.force_login(self.teacher)
+        # İlk istek oturuma yazdığı için ısınma olarak atılır
+        self.client.post('/enrollment/bulk/', {'action': 'approve'})
+        small = list(Enrollment.objects.values_list('id', flat=True)[:2])
+        _, few = self.assertWithinQueryBudget('/enrollment/bulk/', method='post', data={
+            'enrollment_ids': small, 'action': 'approve',
+        })
+        ids = list(Enrollment.objects.exclude(id__in=small).values_list('id', flat=True))
+        _, many = self.assertWithinQueryBudget('/enrollment/bulk/', method='post', data={
+            'enrollment_ids': ids, 'action': 'approve',
+        })
+        self.assertEqual(len(few), len(many))
+        self.assertEqual(Enrollment.objects.filter(status='approved').count(), 200)
+        for lesson in Lesson.objects.all():
+            self.assertEqual((lesson.approved_count, lesson.requested_count), (100, 0))
+
+    def test_bulk_results_cover_capacity_and_ownership(self):
+        Lesson.objects.filter(id=self.lessons[0].id).update(max_students=3)
+        other = User.objects.create(username='coach', role='teacher')
+        foreign = Lesson.objects.create(
+            title='Foreign', description='Cardio', lesson_type='group', teacher=other, max_students=5,
+            duration_weeks=1, duration_hours=1, start_date=datetime(2024, 2, 1, 10, tzinfo=dt_timezone.utc),
+        )
+        foreign_enrollment = Enrollment.objects.create(lesson=foreign, student=User.objects.get(username='member0'))
+        ids = list(Enrollment.objects.filter(lesson=self.lessons[0]).order_by('id').values_list('id', flat=True)[:5])
+
+        self.client.force_login(self.teacher)
+        results = self.post_bulk(ids + [foreign_enrollment.id, 0], 'approve')
+        self.assertEqual([results[str(pk)] for pk in ids], ['changed'] * 3 + ['full'] * 2)
+        self.assertEqual(results[str(foreign_enrollment.id)], 'not_found')
+        self.assertEqual(results['0'], 'not_found')
+
+        results = self.post_bulk(ids[:1], 'approve')
+        self.assertEqual(results[str(ids[0])], 'unchanged')
+        self.post_bulk(ids[:1], 'reject')
+        lesson = Lesson.objects.get(id=self.lessons[0].id)
+        self.assertEqual((lesson.approved_count, lesson.requested_count), (2, 97))
+
+    def test_bulk_change_to_waitlisted_is_rejected(self):
+        enrollment = Enrollment.objects.filter(lesson=self.lessons[0]).first()
+        with self.assertRaises(enrollments.EnrollmentError):
+            enrollments.bulk_change_enrollment_status(self.teacher, [enrollment.id], 'waitlisted')
+        enrollment.refresh_from_db()
+        self.assertEqual((enrollment.status, enrollment.waitlisted_at), ('requested', None))
+
+
+class WaitlistTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username='teacher', password='pass', role='teacher')
+        cls.lesson = Lesson.objects.create(
+            title='Popular Class', description='Cardio', lesson_type='group', teacher=cls.teacher,
+            max_students=2, duration_weeks=1, duration_hours=1,
+            start_date=datetime(2024, 1, 1, 10, tzinfo=dt_timezone.utc),
+        )
+        cls.students = User.objects.bulk_create(User(username=f'member{index}', role='student') for index in range(6))
+        cls.seated = [
+            Enrollment.objects.create(lesson=cls.lesson, student=student, status='approved')
+            for student in cls.students[:2]
+        ]
+
+    def setUp(self):
+        catalogue.clear()
+
+    def join(self, students):
+        return [enrollments.join_waitlist(self.lesson, student)[0] for student in students]
+
+    def test_queue_is_fifo_and_reports_positions(self):
+        waiting = self.join(self.students[2:])
+        self.assertEqual([enrollments.waitlist_position(enrollment) for enrollment in waiting], [1, 2, 3, 4])
+        self.assertEqual(enrollments.waitlist_positions(self.students[4]), {self.lesson.id: 3})
+
+        enrollments.reject_enrollment(self.seated[0])
+        enrollments.leave_lesson(self.seated[1])
+        statuses = dict(Enrollment.objects.filter(lesson=self.lesson).values_list('student_id', 'status'))
+        self.assertEqual(
+            [statuses[student.id] for student in self.students[2:]], ['approved', 'approved', 'waitlisted', 'waitlisted'],
+        )
+        self.assertEqual(enrollments.waitlist_position(Enrollment.objects.get(student=self.students[5])), 2)
+        self.lesson.refresh_from_db()
+        self.assertEqual(self.lesson.approved_count, 2)
+
+    def test_leaving_the_waitlist_does_not_promote(self):
+        waiting = self.join(self.students[2:4])
+        enrollments.leave_lesson(waiting[0])
+        self.assertEqual(enrollments.waitlist_position(waiting[1]), 1)
+        self.assertEqual(Enrollment.objects.filter(lesson=self.lesson, status='approved').count(), 2)
+
+    def test_promotion_cost_does_not_depend_on_queue_length(self):
+        self.join(self.students[2:])
+        Lesson.objects.filter(id=self.lesson.id).update(max_students=4)
+        with transaction.atomic(), self.assertNumQueries(4):
+            promoted = enrollments.promote_from_waitlist(self.lesson.id)
+        self.assertEqual(len(promoted), 2)
+
+    def test_free_seats_filter_hides_full_lessons(self):
+        open_lesson = Lesson.objects.create(
+            title='Quiet Class', description='Cardio', lesson_type='group', teacher=self.teacher,
+            max_students=2, duration_weeks=1, duration_hours=1,
+            start_date=datetime(2024, 1, 8, 10, tzinfo=dt_timezone.utc),
+        )
+        self.assertEqual(list(Lesson.objects.with_free_seats()), [open_lesson])
+        if connection.vendor == 'sqlite':
+            self.assertIn('lesson_seats_left_idx', Lesson.objects.with_free_seats().explain())
+
+        self.client.force_login(self.students[2])
+        response = self.client.get('/available_lessons/', {'free': '1'})
+        self.assertContains(response, 'Quiet Class')
+        self.assertNotContains(response, 'Popular Class')
+        self.assertContains(self.client.get('/available_lessons/'), 'Popular Class')
+
+    def test_full_lesson_offers_the_waitlist(self):
+        student = self.students[2]
+        self.client.force_login(student)
+        response = self.client.get('/available_lessons/')
+        self.assertContains(response, f'/lessons/{self.lesson.id}/waitlist/')
+
+        self.client.get(f'/lessons/{self.lesson.id}/waitlist/')
+        enrollment = Enrollment.objects.get(lesson=self.lesson, student=student)
+        self.assertEqual(enrollment.status, 'waitlisted')
+        self.assertContains(self.client.get('/student_dashboard/'), '(#1)')
+
+    @skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN is SQLite specific')
+    def test_next_in_line_uses_the_waitlist_index(self):
+        queryset = Enrollment.objects.filter(lesson=self.lesson, status='waitlisted').order_by('waitlisted_at', 'id')[:1]
+        plan = queryset.explain()
+        self.assertIn('enrollment_waitlist_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+
+class RecurringScheduleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username='teacher', password='pass', role='teacher')
+
+    def create_lesson(self, title, mode, rule='', start=datetime(2024, 1, 1, 18, tzinfo=dt_timezone.utc), weeks=8):
+        return Lesson.objects.create(
+            title=title, description='Cardio', lesson_type='group', teacher=self.teacher, max_students=10,
+            duration_weeks=weeks, duration_hours=1, start_date=start, schedule_mode=mode, recurrence_rule=rule,
+        )
+
+    def test_rule_parsing(self):
+        self.assertEqual(parse_weekly_rule('', 2), WeeklyRule(1, (2,)))
+        self.assertEqual(parse_weekly_rule('FREQ=WEEKLY;INTERVAL=2;BYDAY=TH,MO', 0), WeeklyRule(2, (0, 3)))
+        for rule in ('FREQ=DAILY', 'INTERVAL=0', 'BYDAY=XX', 'COUNT=3', 'BYDAY'):
+            with self.subTest(rule=rule), self.assertRaises(ValidationError):
+                parse_weekly_rule(rule, 0)
+
+    def test_recurring_lessons_store_only_exceptions(self):
+        materialized = self.create_lesson('Stored', Lesson.MATERIALIZED, 'BYDAY=MO,WE')
+        recurring = self.create_lesson(
+            'Lazy', Lesson.RECURRING, 'BYDAY=MO,WE', start=datetime(2024, 1, 1, 8, tzinfo=dt_timezone.utc),
+        )
+        self.assertEqual(materialized.lesson_days.count(), 16)
+        self.assertEqual(recurring.lesson_days.count(), 0)
+        self.assertEqual(
+            [session.date for session in recurring.iter_sessions()],
+            [session.date for session in materialized.iter_sessions()],
+        )
+
+        recurring.override_session(datetime(2024, 1, 3).date(), cancelled=True)
+        recurring.override_session(datetime(2024, 1, 8).date(), start_time=time(9), end_time=time(10))
+        self.assertEqual(recurring.lesson_days.count(), 2)
+        sessions = list(recurring.iter_sessions(datetime(2024, 1, 1).date(), datetime(2024, 1, 11).date()))
+        self.assertEqual(
+            [(session.date.day, session.start_time.hour) for session in sessions], [(1, 8), (8, 9), (10, 8)],
+        )
+
+    def test_window_expansion_skips_to_the_window(self):
+        lesson = self.create_lesson('Biweekly', Lesson.RECURRING, 'INTERVAL=2;BYDAY=MO,FR', weeks=52)
+        sessions = lesson.iter_sessions(datetime(2024, 6, 1).date(), datetime(2024, 7, 1).date())
+        days = [session.date for session in sessions]
+        self.assertTrue(days)
+        self.assertTrue(all(day.weekday() in (0, 4) for day in days))
+        self.assertTrue(all((day - datetime(2024, 1, 1).date()).days // 7 % 2 == 0 for day in days))
+
+    def test_calendar_and_conflicts_read_recurring_sessions(self):
+        self.create_lesson('Stored', Lesson.MATERIALIZED, start=datetime(2024, 1, 2, 18, tzinfo=dt_timezone.utc))
+        self.create_lesson('Lazy', Lesson.RECURRING)
+        self.client.force_login(self.teacher)
+        events = self.client.get('/lessons/calendar/feed/', {'start': '2024-01-01', 'end': '2024-01-08'}).json()
+        self.assertEqual([(event['title'], event['start']) for event in events], [
+            ('Lazy', '2024-01-01T18:00:00'), ('Stored', '2024-01-02T18:00:00'),
+        ])
+        self.assertEqual(events[0]['extendedProps']['teacher'], 'teacher')
+
+        with self.assertRaises(ValidationError):
+            self.create_lesson('Clash', Lesson.MATERIALIZED, start=datetime(2024, 1, 15, 18, 30, tzinfo=dt_timezone.utc))
+
+    def test_switching_modes_replaces_stored_rows(self):
+        lesson = self.create_lesson('Switch', Lesson.MATERIALIZED)
+        lesson.schedule_mode = Lesson.RECURRING
+        lesson.save()
+        self.assertEqual(lesson.lesson_days.count(), 0)
+        lesson.override_session(datetime(2024, 1, 8).date(), cancelled=True)
+        lesson.schedule_mode = Lesson.MATERIALIZED
+        lesson.save()
+        self.assertEqual(lesson.lesson_days.filter(cancelled=False).count(), 8)
+
+
+class LessonCalendarFeedTests(TestCase):
+    url = '/lessons/calendar/feed/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username='teacher', password='pass', role='teacher')
+        cls.lesson = Lesson.objects.create(
+            title='Weekly Spin', description='Cardio', lesson_type='group', teacher=cls.teacher, max_students=10,
+            duration_weeks=4, duration_hours=1, start_date=datetime(2024, 1, 1, 18, tzinfo=dt_timezone.utc),
+        )
+
+    def setUp(self):
+        self.client.force_login(self.teacher)
+
+    def test_returns_only_sessions_in_the_window(self):
+        events = self.client.get(self.url, {'start': '2024-01-08T00:00:00+00:00', 'end': '2024-01-22'}).json()
+        self.assertEqual([event['start'] for event in events], ['2024-01-08T18:00:00', '2024-01-15T18:00:00'])
+        self.assertEqual(events[0]['extendedProps']['lesson_id'], self.lesson.id)
+
+    def test_missing_or_invalid_dates_are_rejected(self):
+        for params in (
+            {}, {'start': '2024-01-01'}, {'start': 'tomorrow', 'end': '2024-01-08'},
+            {'start': '2024-02-30T00:00:00', 'end': '2024-03-08'}, {'start': '2024-01-01', 'end': '2024-13-01'},
+            {'start': '2024-01-08', 'end': '2024-01-01'},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(self.url, params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json())
+
+    def test_window_is_limited(self):
+        end = datetime(2024, 1, 1) + views.CALENDAR_MAX_WINDOW
+        self.assertEqual(self.client.get(self.url, {'start': '2024-01-01', 'end': end.date().isoformat()}).status_code, 200)
+        response = self.client.get(self.url, {'start': '2024-01-01', 'end': (end + timedelta(days=1)).date().isoformat()})
+        self.assertEqual(response.status_code, 400)
+
+    def test_unchanged_feed_returns_304(self):
+        params = {'start': '2024-01-01', 'end': '2024-02-01'}
+        response = self.client.get(self.url, params)
+        etag = response['ETag']
+        self.assertEqual(self.client.get(self.url, params, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.lesson.title = 'Renamed Spin'
+        self.lesson.save()
+        response = self.client.get(self.url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['title'], 'Renamed Spin')
+
+
+class CalendarFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username='teacher', password='pass', role='teacher')
+        cls.student = User.objects.create_user(username='student', password='pass', role='student')
+        cls.lessons = [
+            Lesson.objects.create(
+                title=title, description='Cardio', lesson_type='group', teacher=cls.teacher, max_students=10,
+                duration_weeks=weeks, duration_hours=1, start_date=datetime(2024, 1, 1, hour, tzinfo=dt_timezone.utc),
+            )
+            for title, weeks, hour in (('Spin, Level 1; Morning', 250, 7), ('Boxing', 4, 20))
+        ]
+        Enrollment.objects.create(lesson=cls.lessons[1], student=cls.student, status='approved')
+
+    def get_feed(self, url, **headers):
+        response = self.client.get(url, **headers)
+        if response.status_code != 200:
+            return response, ''
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_teacher_feed_streams_every_session(self):
+        self.client.force_login(self.teacher)
+        response, body = self.get_feed('/calendar/schedule.ics')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        self.assertEqual(body.count('BEGIN:VEVENT'), 254)
+        self.assertTrue(body.startswith('BEGIN:VCALENDAR\r\n') and body.endswith('END:VCALENDAR\r\n'))
+        self.assertIn('SUMMARY:Spin\\, Level 1\; Morning\r\n', body)
+        self.assertIn('DTSTART:20240101T070000Z\r\n', body)
+        self.assertTrue(all(len(line.encode()) <= 75 for line in body.split('\r\n')))
+
+    def test_student_feed_uses_the_signed_token(self):
+        token = ics.feed_token(self.student)
+        _, body = self.get_feed(f'/calendar/schedule.ics?token={token}')
+        self.assertEqual(body.count('BEGIN:VEVENT'), 4)
+        self.assertNotIn('Spin', body)
+        self.assertEqual(self.client.get('/calendar/schedule.ics?token=forged').status_code, 403)
+        self.assertEqual(self.client.get(f'/lessons/{self.lessons[0].id}/calendar.ics').status_code, 403)
+
+    def test_tokens_do_not_expire_and_can_be_reset(self):
+        token = ics.feed_token(self.student)
+        # Takvim abonelikleri yıllarca aynı adresi kullanır; süre sınırı sadece istenirse uygulanır
+        later = (timezone.now() + timedelta(days=3 * 365)).timestamp()
+        with mock.patch('django.core.signing.time.time', return_value=later):
+            self.assertEqual(self.client.get(f'/calendar/schedule.ics?token={token}').status_code, 200)
+            self.assertIsNone(ics.read_feed_token(token, max_age=timedelta(days=365)))
+
+        self.client.force_login(self.student)
+        self.assertEqual(self.client.get('/calendar/reset/').status_code, 405)
+        self.assertRedirects(self.client.post('/calendar/reset/'), '/student_dashboard/')
+        self.client.logout()
+        self.assertEqual(self.client.get(f'/calendar/schedule.ics?token={token}').status_code, 403)
+        self.student.refresh_from_db()
+        new_token = ics.feed_token(self.student)
+        self.assertEqual(self.client.get(f'/calendar/schedule.ics?token={new_token}').status_code, 200)
+
+    def test_lesson_feed_is_limited_to_own_lessons(self):
+        token = ics.feed_token(self.student)
+        self.assertEqual(self.client.get(f'/lessons/{self.lessons[0].id}/calendar.ics?token={token}').status_code, 404)
+        Enrollment.objects.create(lesson=self.lessons[0], student=self.student, status='requested')
+        self.assertEqual(self.client.get(f'/lessons/{self.lessons[0].id}/calendar.ics?token={token}').status_code, 404)
+
+        teacher_token = ics.feed_token(self.teacher)
+        for lesson in self.lessons:
+            with self.subTest(lesson=lesson.title):
+                response = self.client.get(f'/lessons/{lesson.id}/calendar.ics?token={teacher_token}')
+                self.assertEqual(response.status_code, 200)
+
+    def test_conditional_get(self):
+        url = f'/lessons/{self.lessons[1].id}/calendar.ics?token={ics.feed_token(self.student)}'
+        response, _ = self.get_feed(url)
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        # Token sahibi, ders ve doğrulayıcılar; oturumlar okunmaz
+        with self.assertNumQueries(3):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # Sayaç güncellemeleri beslemeyi değiştirmez, program değişikliği değiştirir
+        Enrollment.objects.create(lesson=self.lessons[1], student=self.teacher, status='approved')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        lesson = Lesson.objects.get(id=self.lessons[1].id)
+        lesson.duration_hours = 2
+        lesson.save()
+        response, body = self.get_feed(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('DTEND:20240101T220000Z', body)
+
+    def test_long_lines_are_folded(self):
+        line = ics.fold_line('SUMMARY:' + 'ç' * 60)
+        self.assertTrue(all(len(part.encode()) <= 75 for part in line.split('\r\n')))
+        self.assertEqual(line.replace('\r\n ', '').rstrip('\r\n'), 'SUMMARY:' + 'ç' * 60)
+
+
+class CatalogueCacheTests(QueryBudgetTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username='teacher', password='pass', role='teacher')
+        cls.student = User.objects.create_user(username='student', password='pass', role='student')
+        cls.manager = User.objects.create_user(username='manager', password='pass', role='manager')
+        cls.lesson = Lesson.objects.create(
+            title='Morning Yoga', description='Flow', lesson_type='private', teacher=cls.teacher, max_students=1,
+            duration_weeks=4, duration_hours=1, start_date=datetime(2024, 1, 1, 8, tzinfo=dt_timezone.utc),
+        )
+        cls.other = User.objects.create(username='member', role='student')
+        cls.enrollment = Enrollment.objects.create(lesson=cls.lesson, student=cls.other)
+
+    def setUp(self):
+        catalogue.clear()
+        self.client.force_login(self.student)
+
+    def test_lesson_detail_is_served_from_cache_until_a_write(self):
+        url = f'/lessons/{self.lesson.id}/'
+        self.client.get(url)
+        # Sadece kullanıcı ve sepet okunur (oturum önbellekten gelir); ders tablolarına gidilmez
+        with self.assertNumQueries(3):
+            self.assertNotContains(self.client.get(url), 'member')
+
+        # QuerySet.update() kullanan servis yolu da önbelleği geçersiz kılar
+        enrollments.approve_enrollment(self.enrollment)
+        self.assertContains(self.client.get(url), 'member')
+        self.assertContains(self.client.get(url), '1 / 1')
+
+    def test_listing_and_row_fragments_follow_writes(self):
+        self.assertContains(self.client.get('/available_lessons/'), 'Request to Join')
+        enrollments.approve_enrollment(self.enrollment)
+        response = self.client.get('/available_lessons/')
+        self.assertNotContains(response, 'Request to Join')
+        self.assertContains(response, 'Join Waitlist')
+
+        self.assertContains(self.client.get('/all_lessons/?query=yoga'), 'Morning Yoga')
+        self.lesson.title = 'Evening Yoga'
+        self.lesson.save()
+        response = self.client.get('/all_lessons/?query=yoga')
+        self.assertContains(response, 'Evening Yoga')
+        self.assertNotContains(response, 'Morning Yoga')
+
+        self.teacher.username = 'coach'
+        self.teacher.save()
+        self.assertContains(self.client.get('/all_lessons/?query=yoga'), 'coach')
+
+    def test_student_rename_invalidates_lesson_pages(self):
+        url = f'/lessons/{self.lesson.id}/'
+        enrollments.approve_enrollment(self.enrollment)
+        self.assertContains(self.client.get(url), 'member')
+
+        # Kullanıcı adı değişmeyen kayıtlar sürümleri yenilemez
+        version = catalogue.get_versions([self.lesson.id])[self.lesson.id]
+        member = User.objects.get(id=self.other.id)
+        member.first_name = 'Mia'
+        member.save()
+        self.assertEqual(catalogue.get_versions([self.lesson.id])[self.lesson.id], version)
+
+        member.username = 'renamed'
+        member.save()
+        response = self.client.get(url)
+        self.assertContains(response, 'renamed')
+        self.assertNotContains(response, 'member')
+
+    def test_versions_are_bumped_again_on_commit(self):
+        version = catalogue.get_versions([self.lesson.id])[self.lesson.id]
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                Enrollment.objects.create(lesson=self.lesson, student=self.student)
+                written = catalogue.get_versions([self.lesson.id])[self.lesson.id]
+        # Commit'ten önce okunup yazılmış bir sonuç commit sonrası sürümle okunamaz
+        self.assertNotIn(catalogue.get_versions([self.lesson.id])[self.lesson.id], {version, written})
+
+    def test_hit_and_miss_counters(self):
+        url = f'/lessons/{self.lesson.id}/'
+        self.client.get(url)
+        self.client.get(url)
+        self.assertEqual(catalogue.get_stats(), {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+
+        self.assertEqual(self.client.get('/lessons/cache/stats/').status_code, 403)
+        self.client.force_login(self.manager)
+        self.assertEqual(self.client.get('/lessons/cache/stats/').json()['hits'], 1)
+        self.assertWithinQueryBudget('/lessons/cache/stats/')
+
+
+def indexed_rows():
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT rowid, title, description, teacher FROM {search.LESSON_FTS_TABLE} ORDER BY rowid')
+        return cursor.fetchall()
+
+
+@skipUnless(connection.vendor == 'sqlite', 'FTS5 search index is SQLite specific')
+class SearchIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username='anna', password='pass', role='teacher')
+        cls.lessons = [
+            Lesson.objects.create(
+                title=title, description=description, lesson_type='group', teacher=cls.teacher, max_students=5,
+                duration_weeks=1, duration_hours=1, start_date=datetime(2024, 1, 1 + index, 8, tzinfo=dt_timezone.utc),
+            )
+            for index, (title, description) in enumerate([
+                ('Pilates', 'Core work with some yoga stretches'),
+                ('Yoga Flow', 'Yoga for every level, yoga breathing'),
+                ('Boxing', 'Pads & bags'),
+            ])
+        ]
+
+    def search(self, query, **kwargs):
+        return list(search.search_lessons(Lesson.objects.all(), query, **kwargs).values_list('title', flat=True))
+
+    def test_triggers_survive_later_migrations(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger'")
+            triggers = dict(cursor.fetchall())
+        self.assertLessEqual(set(search.SEARCH_TRIGGERS), set(triggers))
+        # Güncelleme trigger'ı sadece indekslenen kolonlar yazıldığında çalışır
+        self.assertIn('UPDATE OF title, description, teacher_id', triggers['dashboards_lesson_fts_update'])
+
+    def test_triggers_follow_inserts_updates_and_deletes(self):
+        self.assertEqual([row[0] for row in indexed_rows()], [lesson.id for lesson in self.lessons])
+
+        boxing = self.lessons[2]
+        boxing.title = 'Kickboxing'
+        boxing.save()
+        self.assertEqual(self.search('kick'), ['Kickboxing'])
+        self.assertEqual(self.search('pads'), ['Kickboxing'])
+
+        # Sayaç güncellemesi indekslenen kolonlara dokunmaz
+        Lesson.objects.filter(id=boxing.id).update(approved_count=3)
+        self.assertIn((boxing.id, 'Kickboxing', 'Pads & bags', 'anna'), indexed_rows())
+
+        # Model silme testapp tablosuna cascade eder; trigger'ı doğrudan DELETE tetikler
+        LessonDay.objects.filter(lesson=boxing).delete()
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM dashboards_lesson WHERE id = %s', [boxing.id])
+        self.assertEqual(self.search('kick'), [])
+        self.assertNotIn(boxing.id, [row[0] for row in indexed_rows()])
+
+    def test_teacher_rename_updates_the_index(self):
+        self.teacher.username = 'beatrice'
+        self.teacher.save()
+        self.assertEqual(len(self.search('beat', columns=['teacher'])), 3)
+        self.assertEqual(self.search('anna', columns=['teacher']), [])
+
+    def test_results_are_ranked_and_paginated_by_score(self):
+        # "yoga" başlıkta ve açıklamada iki kez geçen ders daha alakalıdır
+        self.assertEqual(self.search('yoga'), ['Yoga Flow', 'Pilates'])
+
+        lessons = search.search_lessons(Lesson.objects.all(), 'yoga')
+        paginator = KeysetPaginator(lessons, 1, ordering=search.search_ordering(lessons))
+        first = paginator.get_page()
+        second = paginator.get_page(first.next_page_number())
+        self.assertEqual([lesson.title for lesson in first], ['Yoga Flow'])
+        self.assertEqual([lesson.title for lesson in second], ['Pilates'])
+        self.assertFalse(second.has_next())
+        self.assertEqual([lesson.title for lesson in paginator.get_page(second.previous_page_number())], ['Yoga Flow'])
+
+    def test_like_fallback(self):
+        with mock.patch.object(search, 'fts_available', return_value=False):
+            lessons = search.search_lessons(Lesson.objects.order_by('id'), 'yog')
+            self.assertEqual([lesson.title for lesson in lessons], ['Pilates', 'Yoga Flow'])
+            self.assertEqual(search.search_ordering(lessons), ('start_date', 'id'))
+            self.assertNotIn('MATCH', str(lessons.query))
+        # Kelime içermeyen metin FTS'e gönderilmez
+        self.assertEqual(self.search('&', columns=['description']), ['Boxing'])
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {search.LESSON_FTS_TABLE}')
+        self.assertEqual(self.search('yoga'), [])
+
+        out = StringIO()
+        call_command('rebuild_lesson_search_index', stdout=out)
+        self.assertIn('Indexed 3 lesson(s).', out.getvalue())
+        self.assertEqual(self.search('yoga'), ['Yoga Flow', 'Pilates'])
+
+
+class StudentDashboardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username='coach', password='pass', role='teacher')
+        cls.student = User.objects.create_user(username='student', password='pass', role='student')
+        start = datetime(2024, 1, 1, 6, tzinfo=dt_timezone.utc)
+        statuses = ['approved', 'requested', 'rejected']
+        for index in range(30):
+            lesson = Lesson.objects.create(
+                title=f'{"Yoga" if index % 2 else "Boxing"} {index}', description='Class', lesson_type='group',
+                teacher=cls.teacher, max_students=5, duration_weeks=1, duration_hours=1,
+                start_date=start + timedelta(days=index // 7 * 7 + index % 7, hours=index // 7),
+            )
+            Enrollment.objects.create(lesson=lesson, student=cls.student, status=statuses[index % 3])
+
+    def setUp(self):
+        self.client.force_login(self.student)
+
+    def get_titles(self, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/student_dashboard/', params)
+        lesson_queries = [query['sql'] for query in context.captured_queries if 'dashboards_lesson' in query['sql']]
+        # Ders ve öğretmen, kayıtlarla aynı sorguda okunur; id listesiyle IN (...) sorgusu atılmaz
+        self.assertEqual(len(lesson_queries), 1, lesson_queries)
+        self.assertIn('users_user', lesson_queries[0])
+        self.assertNotIn(' IN (', lesson_queries[0])
+        return [enrollment.lesson.title for enrollment in response.context['page_obj']]
+
+    def test_filters_are_combined_in_sql(self):
+        self.assertEqual(self.get_titles(), ['Boxing 0', 'Yoga 1', 'Boxing 2', 'Yoga 3', 'Boxing 4'])
+        # Durum filtresi arama ve tarih filtrelerini artık ezmez
+        self.assertEqual(self.get_titles(status='approved', query='yoga'), ['Yoga 3', 'Yoga 9', 'Yoga 15', 'Yoga 21', 'Yoga 27'])
+        self.assertEqual(self.get_titles(status='requested', date='2024-01-08'), ['Yoga 7'])
+
+    def test_pages_follow_the_lesson_start_date(self):
+        response = self.client.get('/student_dashboard/', {'status': 'approved'})
+        seen = [enrollment.lesson.title for enrollment in response.context['page_obj']]
+        response = self.client.get('/student_dashboard/', {
+            'status': 'approved', 'page': response.context['page_obj'].next_page_number(),
+        })
+        seen += [enrollment.lesson.title for enrollment in response.context['page_obj']]
+        self.assertEqual(seen, [f'{"Yoga" if index % 2 else "Boxing"} {index}' for index in range(0, 30, 3)])
+        self.assertContains(response, 'Approved')
+
+
+class AttendanceTests(QueryBudgetTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username='coach', password='pass', role='teacher')
+        cls.manager = User.objects.create_user(username='manager', password='pass', role='manager')
+        cls.members = [User.objects.create_user(username=f'member{index}', password='pass', role='student') for index in range(3)]
+        cls.today = timezone.localdate()
+        evening = timezone.make_aware(datetime.combine(cls.today - timedelta(weeks=1), time(18)))
+        cls.lesson = Lesson.objects.create(
+            title='Peak Spin', description='Cardio', lesson_type='group', teacher=cls.teacher, max_students=10,
+            duration_weeks=3, duration_hours=1, start_date=evening,
+        )
+        cls.recurring = Lesson.objects.create(
+            title='Peak Yoga', description='Flow', lesson_type='group', teacher=cls.teacher, max_students=10,
+            duration_weeks=3, duration_hours=1, start_date=evening + timedelta(hours=2), schedule_mode=Lesson.RECURRING,
+        )
+        for lesson in (cls.lesson, cls.recurring):
+            for member in cls.members[:2]:
+                Enrollment.objects.create(lesson=lesson, student=member, status='approved')
+        Enrollment.objects.create(lesson=cls.lesson, student=cls.members[2], status='requested')
+
+    def check_in(self, lesson, member):
+        # Kapı kioskunda dersin öğretmeni oturum açmıştır
+        self.client.force_login(self.teacher)
+        return self.assertWithinQueryBudget(
+            f'/lessons/{lesson.id}/check-in/', method='post', data={'student_id': member.id},
+        )[0]
+
+    def test_check_in_is_idempotent(self):
+        for lesson in (self.lesson, self.recurring):
+            self.assertEqual(self.check_in(lesson, self.members[0]).json()['status'], 'checked_in')
+            self.assertEqual(self.check_in(lesson, self.members[0]).json()['status'], 'already_checked_in')
+        self.assertEqual(Attendance.objects.filter(student=self.members[0], session_date=self.today).count(), 2)
+
+    def test_validation_is_one_indexed_lookup(self):
+        with CaptureQueriesContext(connection) as context:
+            found = attendance.find_session_enrollment(self.lesson.id, self.members[0].id, self.today)
+        self.assertIsNotNone(found.lesson_day_id)
+        self.assertEqual(len(context.captured_queries), 1)
+        if connection.vendor == 'sqlite':
+            for step in explain_query_plan(context.captured_queries[0]['sql']):
+                self.assertFalse(step.startswith('SCAN ') and ' USING ' not in step, step)
+
+    def test_rejected_check_ins(self):
+        self.client.force_login(self.teacher)
+        url = f'/lessons/{self.lesson.id}/check-in/'
+        self.assertEqual(self.client.post(url, {'student_id': self.members[2].id}).status_code, 404)
+        self.recurring.override_session(self.today, cancelled=True)
+        response = self.client.post(f'/lessons/{self.recurring.id}/check-in/', {'student_id': self.members[0].id})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.client.post(url).status_code, 400)
+        with self.assertRaises(attendance.NoSessionError):
+            attendance.check_in(self.lesson.id, self.members[0].id, timezone.now() + timedelta(days=1))
+
+    def test_offline_kiosk_upload(self):
+        attendance.check_in(self.lesson.id, self.members[0].id)
+        scanned_at = timezone.make_aware(datetime.combine(self.today, time(17, 55)))
+        scans = [
+            {'lesson_id': self.lesson.id, 'student_id': self.members[0].id, 'scanned_at': scanned_at.isoformat()},
+            {'lesson_id': self.lesson.id, 'student_id': self.members[1].id, 'scanned_at': scanned_at.isoformat()},
+            {'lesson_id': self.lesson.id, 'student_id': self.members[1].id, 'scanned_at': scanned_at.isoformat()},
+            {'lesson_id': self.lesson.id, 'student_id': self.members[2].id, 'scanned_at': scanned_at.isoformat()},
+            {'lesson_id': self.recurring.id, 'student_id': self.members[0].id,
+             'scanned_at': (scanned_at + timedelta(days=1)).isoformat()},
+            {'lesson_id': 'door', 'student_id': self.members[0].id, 'scanned_at': scanned_at.isoformat()},
+        ]
+        self.client.force_login(self.manager)
+        response, _ = self.assertWithinQueryBudget(
+            '/attendance/scans/', method='post', data={'scans': scans}, content_type='application/json',
+        )
+        self.assertEqual(response.json(), {
+            'accepted': 3, 'rejected': {'3': attendance.NOT_ENROLLED, '4': attendance.NO_SESSION, '5': attendance.INVALID},
+        })
+        self.assertEqual(Attendance.objects.filter(lesson=self.lesson, session_date=self.today).count(), 2)
+        self.assertEqual(Attendance.objects.get(student=self.members[1]).source, 'kiosk')
+
+    def test_only_the_lessons_teacher_or_a_manager_records_attendance(self):
+        other = User.objects.create_user(username='other-coach', password='pass', role='teacher')
+        scan = {'lesson_id': self.lesson.id, 'student_id': self.members[0].id, 'scanned_at': timezone.now().isoformat()}
+        for user in (other, self.members[0]):
+            with self.subTest(user=user.username):
+                self.client.force_login(user)
+                response = self.client.post(f'/lessons/{self.lesson.id}/check-in/', {'student_id': self.members[0].id})
+                self.assertEqual(response.status_code, 403)
+                response = self.client.post('/attendance/scans/', {'scans': [scan]}, content_type='application/json')
+                self.assertEqual(response.status_code, 403)
+        self.assertFalse(Attendance.objects.exists())
+
+        self.client.force_login(self.manager)
+        response = self.client.post(f'/lessons/{self.lesson.id}/check-in/', {'student_id': self.members[0].id})
+        self.assertEqual(response.status_code, 201)
+        self.client.force_login(self.teacher)
+        response = self.client.post('/attendance/scans/', {'scans': [scan]}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_session_summaries(self):
+        attendance.check_in(self.lesson.id, self.members[0].id)
+        attendance.check_in(self.lesson.id, self.members[1].id)
+        self.client.force_login(self.teacher)
+        response, _ = self.assertWithinQueryBudget(f'/lessons/{self.lesson.id}/attendance/')
+        sessions = response.json()['sessions']
+        self.assertEqual(
+            [(session['date'], session['attended'], session['expected']) for session in sessions],
+            [(str(self.today + timedelta(weeks=week)), 2 if week == 0 else 0, 2) for week in (-1, 0, 1)],
+        )
+        self.client.force_login(self.members[0])
+        self.assertEqual(self.client.get(f'/lessons/{self.lesson.id}/attendance/').status_code, 403)
+
+
+class RollupTests(QueryBudgetTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username='coach', password='pass', role='teacher')
+        cls.manager = User.objects.create_user(username='manager', password='pass', role='manager')
+        cls.members = [User.objects.create_user(username=f'member{index}', password='pass', role='student') for index in range(2)]
+        cls.today = timezone.localdate()
+        evening = timezone.make_aware(datetime.combine(cls.today, time(18)))
+        cls.spin, cls.yoga = [
+            Lesson.objects.create(
+                title=title, description='Cardio', lesson_type='group', teacher=cls.teacher, max_students=4,
+                duration_weeks=2, duration_hours=1, start_date=evening + timedelta(hours=offset), schedule_mode=mode,
+            )
+            for title, mode, offset in (('Spin', Lesson.MATERIALIZED, 0), ('Yoga', Lesson.RECURRING, 2))
+        ]
+        for member in cls.members:
+            Enrollment.objects.create(lesson=cls.spin, student=member, status='approved')
+        Enrollment.objects.create(lesson=cls.yoga, student=cls.members[0], status='requested')
+        attendance.check_in(cls.spin.id, cls.members[0].id, evening)
+        Order.objects.create(user=cls.members[0], total_amount='40.00', address='-', city='-', postal_code='-', country='-')
+        # Kaynak satırlar bir gün önce yazılmış gibi gösterilir, böylece sadece testteki değişiklikler yeni kalır
+        cls.yesterday = timezone.now() - timedelta(days=1)
+        Lesson.objects.update(updated_at=cls.yesterday)
+        Enrollment.objects.update(created_at=cls.yesterday, status_changed_at=cls.yesterday)
+        Attendance.objects.update(recorded_at=cls.yesterday)
+        Order.objects.update(created_at=cls.yesterday)
+
+    def test_full_refresh(self):
+        result = rollups.refresh_rollups(full=True)
+        self.assertEqual(result['lessons'], 2)
+        spin = DailyLessonRollup.objects.get(lesson_id=self.spin.id, day=self.today)
+        self.assertEqual((spin.sessions, spin.seats_offered, spin.attended), (1, 4, 1))
+        self.assertEqual(spin.fill_rate, 0.25)
+        self.assertEqual(DailyLessonRollup.objects.filter(lesson_id=self.yoga.id, sessions=1).count(), 2)
+        teacher = WeeklyTeacherRollup.objects.get(week_start=rollups.week_start(self.today), teacher=self.teacher)
+        self.assertGreaterEqual(teacher.sessions, 2)
+        total = WeeklyRollup.objects.get(week_start=rollups.week_start(timezone.localdate(self.yesterday)))
+        self.assertEqual((total.orders, str(total.revenue)), (1, '40.00'))
+
+    def test_full_refresh_keeps_deleted_lesson_history(self):
+        rollups.refresh_rollups(full=True)
+        past_day = timezone.localdate(self.yesterday)
+        # Model silme testapp tablosuna cascade eder; bağlı satırlar ve ders doğrudan silinir
+        Attendance.objects.filter(lesson=self.spin).delete()
+        Enrollment.objects.filter(lesson=self.spin).delete()
+        LessonDay.objects.filter(lesson=self.spin).delete()
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM dashboards_lesson WHERE id = %s', [self.spin.id])
+        Order.objects.all().delete()
+
+        rollups.refresh_rollups(full=True)
+        spin_days = DailyLessonRollup.objects.filter(lesson_id=self.spin.id)
+        self.assertEqual(list(spin_days.values_list('day', 'approvals')), [(past_day, 2)])
+        total = WeeklyRollup.objects.get(week_start=rollups.week_start(past_day))
+        self.assertEqual((total.approvals, total.orders), (2, 0))
+        self.assertFalse(DailyRevenueRollup.objects.exists())
+
+    def test_incremental_refresh_only_reprocesses_changes(self):
+        rollups.refresh_rollups(full=True)
+        self.assertEqual(
+            rollups.refresh_rollups(), {'lessons': 0, 'lesson_days': 0, 'revenue_days': 0, 'weeks': 0},
+        )
+        untouched = set(DailyLessonRollup.objects.exclude(day=self.today).values_list('id', flat=True))
+
+        enrollments.change_enrollment_status(Enrollment.objects.get(lesson=self.yoga), 'approved')
+        result = rollups.refresh_rollups()
+        self.assertEqual((result['lessons'], result['lesson_days'], result['revenue_days']), (0, 1, 0))
+        approved = DailyLessonRollup.objects.get(lesson_id=self.yoga.id, day=self.today)
+        self.assertEqual((approved.approvals, approved.sessions), (1, 1))
+        # Dersin diğer günleri yeniden yazılmaz
+        self.assertEqual(set(DailyLessonRollup.objects.exclude(day=self.today).values_list('id', flat=True)), untouched)
+        self.assertEqual(rollups.refresh_rollups()['lesson_days'], 1)  # OVERLAP penceresi içinde tekrar okunur
+
+    def test_incremental_refresh_recounts_revoked_approvals(self):
+        rollups.refresh_rollups(full=True)
+        approved_day = timezone.localdate(self.yesterday)
+        self.assertEqual(DailyLessonRollup.objects.get(lesson_id=self.spin.id, day=approved_day).approvals, 2)
+
+        enrollments.change_enrollment_status(Enrollment.objects.get(lesson=self.spin, student=self.members[1]), 'rejected')
+        result = rollups.refresh_rollups()
+        self.assertEqual((result['lessons'], result['lesson_days']), (0, 2))
+        self.assertEqual(DailyLessonRollup.objects.get(lesson_id=self.spin.id, day=approved_day).approvals, 1)
+
+    def test_reports_read_only_rollups(self):
+        rollups.refresh_rollups(full=True)
+        self.client.force_login(self.manager)
+
+        def grow():
+            for index in range(3):
+                Enrollment.objects.create(lesson=self.yoga, student=User.objects.create(username=f'extra{index}'))
+            rollups.refresh_rollups()
+
+        self.assertConstantQueries('/reports/?weeks=4', grow)
+        response, recorder = self.record_request('/reports/?weeks=4')
+        self.assertContains(response, 'coach')
+        for sql in recorder.queries:
+            for table in ('"dashboards_lesson"', '"dashboards_enrollment"', '"dashboards_attendance"', '"sales_order"'):
+                self.assertNotIn(table, sql)
+        self.client.force_login(self.teacher)
+        self.assertEqual(self.client.get('/reports/').status_code, 403)
+
+
+class LessonImportTests(TestCase):
+    columns = ['title', 'description', 'lesson_type', 'teacher', 'max_students', 'duration_weeks', 'duration_hours',
+               'start_date', 'schedule_mode']
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user(username='coach', password='pass', role='teacher')
+        Lesson.objects.create(
+            title='Existing', description='Cardio', lesson_type='group', teacher=cls.teacher, max_students=5,
+            duration_weeks=2, duration_hours=1, start_date=datetime(2030, 1, 7, 9, tzinfo=dt_timezone.utc),
+        )
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'lessons.csv')
+
+    def write_csv(self, count, extra=()):
+        with open(self.path, 'w', newline='') as handle:
+            writer = csv.writer(handle)
+            writer.writerow(self.columns)
+            for index in range(count):
+                start = datetime(2030, 2, 4, 6) + timedelta(hours=2 * index)
+                mode = Lesson.RECURRING if index % 2 else ''
+                writer.writerow([f'Imported {index}', 'Mobility', 'group', 'coach', 8, 2, 1, f'{start:%Y-%m-%d %H:%M}', mode])
+            writer.writerows(extra)
+
+    def run_import(self, **kwargs):
+        with CaptureQueriesContext(connection) as context:
+            result = imports.run_import(imports.LessonImporter(), self.path, **kwargs)
+        return result, len(context.captured_queries)
+
+    def test_validation_queries_do_not_grow_with_rows(self):
+        self.write_csv(5)
+        _, few = self.run_import(dry_run=True)
+        self.write_csv(40)
+        result, many = self.run_import(dry_run=True)
+        self.assertEqual(result['created'], 40)
+        self.assertEqual(few, many)
+        self.assertFalse(Lesson.objects.filter(title__startswith='Imported').exists())
+
+    def test_import_reports_row_errors(self):
+        self.write_csv(3, extra=[
+            ['Existing', 'Cardio', 'group', 'coach', 8, 1, 1, '2031-01-01 10:00', ''],
+            ['Imported 0', 'Cardio', 'group', 'coach', 8, 1, 1, '2031-01-02 10:00', ''],
+            ['Clash', 'Cardio', 'group', 'coach', 8, 1, 1, '2030-01-07 09:30', ''],
+            ['Nobody', 'Cardio', 'group', 'ghost', 8, 1, 1, '2031-01-03 10:00', ''],
+            ['Tiny', 'Cardio', 'group', 'coach', 1, 1, 1, '2031-01-04 10:00', ''],
+        ])
+        result, _ = self.run_import(batch_size=4)
+        self.assertEqual(result['created'], 3)
+        self.assertEqual(sorted(result['errors']), [4, 5, 6, 7, 8])
+        self.assertIn('already exists', result['errors'][4])
+        self.assertIn('Duplicate title', result['errors'][5])
+        self.assertIn('Overlaps', result['errors'][6])
+        imported = Lesson.objects.filter(title__startswith='Imported')
+        self.assertEqual(LessonDay.objects.filter(lesson__in=imported).count(), 4)
+        self.assertEqual(imported.filter(schedule_mode=Lesson.RECURRING).count(), 1)
+        self.assertFalse(os.path.exists(f'{self.path}.checkpoint'))
+
+    def test_resumes_from_checkpoint(self):
+        self.write_csv(6)
+        imports.save_checkpoint(f'{self.path}.checkpoint', {
+            'source': os.path.abspath(self.path), 'row': 4, 'created': 4, 'rejected': 0,
+        })
+        result, _ = self.run_import(batch_size=2)
+        self.assertEqual((result['resumed_from'], result['created']), (4, 6))
+        self.assertEqual(list(Lesson.objects.filter(title__startswith='Imported').values_list('title', flat=True)),
+                         ['Imported 4', 'Imported 5'])
+
+
+class BenchmarkTests(TestCase):
+    def test_every_url_has_a_scenario(self):
+        # Yeni bir URL eklendiğinde ya senaryosu yazılmalı ya da atlanma nedeni belirtilmelidir
+        names = {name for name, _, _ in benchmarks.iter_endpoints()}
+        self.assertEqual(names - set(benchmarks.SCENARIOS) - set(benchmarks.SKIPPED), set())
+
+    def test_generate_data_and_benchmark(self):
+        out = StringIO()
+        options = {'scale': 0.05, 'students': 200, 'seed': 7, 'stdout': out}
+        call_command('generate_data', **options)
+        self.assertIn('(seed 7)', out.getvalue())
+        statuses = set(Enrollment.objects.values_list('status', flat=True))
+        self.assertEqual(statuses, {'approved', 'requested', 'rejected', 'waitlisted'})
+        self.assertTrue(Attendance.objects.exists())
+
+        result = benchmarks.run_benchmarks(repeat=2, only={'student_dashboard', 'teacher_dashboard', 'manager_reports'})
+        self.assertEqual(set(result['views']), {'student_dashboard', 'teacher_dashboard', 'manager_reports'})
+        for view in result['views'].values():
+            self.assertEqual(view['status'], 200)
+            self.assertGreater(view['queries'], 0)
+            self.assertLessEqual(view['p50_ms'], view['p99_ms'])
+
+        slower = {'views': {name: {**view, 'p95_ms': view['p95_ms'] * 2, 'queries': view['queries'] + 1}
+                            for name, view in result['views'].items()}}
+        self.assertEqual(benchmarks.compare(result, result), [])
+        self.assertEqual(len(benchmarks.compare(result, slower)), 6)
+
+
+class CheckInLoadTests(TransactionTestCase):
+    @skipUnless(connection.vendor == 'sqlite', 'transaction modes are SQLite specific')
+    def test_requires_immediate_transactions(self):
+        with mock.patch.dict(connection.settings_dict['OPTIONS'], {'transaction_mode': None}):
+            with self.assertRaisesMessage(CommandError, 'settings_loadtest'):
+                call_command('loadtest_check_in', members=1)
+        self.assertFalse(User.objects.exists())
+
+    @concurrent_writes
+    def test_concurrent_check_ins_write_one_row_per_member(self):
+        out = StringIO()
+        call_command('loadtest_check_in', members=40, scans=2, keep=True, stdout=out)
+        self.assertIn('201=40', out.getvalue())
+        self.assertIn('200=40', out.getvalue())
+        self.assertEqual(Attendance.objects.count(), 40)
@@ -3,9 +3,15 @@ from . import views
 
 urlpatterns = [
     path('lessons/', views.lesson_list, name='lesson_list'),
+    path('lessons/calendar/feed/', views.lesson_calendar_feed, name='lesson_calendar_feed'),
+    path('calendar/schedule.ics', views.user_calendar_feed, name='user_calendar_feed'),
+    path('lessons/<int:lesson_id>/calendar.ics', views.lesson_calendar_ics, name='lesson_calendar_ics'),
+    path('calendar/reset/', views.reset_calendar_feed, name='reset_calendar_feed'),
     path('lessons/<int:lesson_id>/', views.lesson_detail, name='lesson_detail'),
     path('lessons/create/', views.create_lesson, name='create_lesson'),
+    path('lessons/conflicts/', views.lesson_schedule_conflicts, name='lesson_schedule_conflicts'),
     path('lessons/<int:lesson_id>/enroll/', views.enroll_in_lesson, name='enroll_in_lesson'),
+    path('enrollment/bulk/', views.bulk_manage_enrollments, name='bulk_manage_enrollments'),
     path('enrollment/<int:enrollment_id>/<str:action>/', views.manage_enrollment, name='manage_enrollment'),
 
     path('student_dashboard/', views.student_dashboard, name='student_dashboard'),
@@ -13,7 +19,14 @@ urlpatterns = [
     path('teacher_dashboard/', views.teacher_dashboard, name='teacher_dashboard'),
 
     path('all_lessons/', views.all_lessons, name='all_lessons'),
+    path('lessons/cache/stats/', views.catalogue_cache_stats, name='catalogue_cache_stats'),
     path('lessons/<int:lesson_id>/request/', views.request_enrollment, name='request_enrollment'),
+    path('lessons/<int:lesson_id>/waitlist/', views.join_waitlist, name='join_waitlist'),
+    path('lessons/<int:lesson_id>/leave/', views.leave_lesson, name='leave_lesson'),
+    path('lessons/<int:lesson_id>/check-in/', views.check_in, name='check_in'),
+    path('lessons/<int:lesson_id>/attendance/', views.lesson_attendance, name='lesson_attendance'),
+    path('attendance/scans/', views.upload_attendance_scans, name='upload_attendance_scans'),
     
     path('available_lessons/', views.available_lessons, name='available_lessons'),
+    path('reports/', views.manager_reports, name='manager_reports'),
 ]
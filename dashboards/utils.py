@@ -0,0 +1,27 @@
+from datetime import datetime, time, timedelta
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+
+def parse_day(value):
+    # Geçersiz tarih metinleri filtre uygulanmamış gibi yok sayılır
+    try:
+        return parse_date((value or '').strip())
+    except ValueError:
+        return None
+
+
+def day_range(day):
+    """Verilen günün aktif saat dilimindeki [başlangıç, bitiş) aralığını döndürür.
+
+    ``start_date__date=day`` sorgusu kolonu bir fonksiyonla sardığı için index
+    kullanamaz; bu aralık ile yapılan ``__gte`` / ``__lt`` filtreleri kullanabilir.
+    """
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+    return start, end
+
+
+def filter_by_day(queryset, day, field='start_date'):
+    start, end = day_range(day)
+    return queryset.filter(**{f'{field}__gte': start, f'{field}__lt': end})
@@ -1,41 +1,188 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from .models import Lesson, Enrollment, LessonDay
+from .models import Lesson, Enrollment
+from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse
+from django.views.decorators.http import require_POST
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from .forms import LessonForm
+from . import attendance, catalogue, enrollments, ics, rollups
+from .recurrence import iter_sessions
+from .search import search_lessons, search_ordering
+from .pagination import KeysetPage, KeysetPaginator
+from .utils import filter_by_day, parse_day
+from .querybudget import query_budget
 from django.contrib import messages
-from django.db.models import Q, Count, F
-from collections import defaultdict
+from django.db.models import Q, Count, Exists, OuterRef
+from collections import Counter
 from django.shortcuts import HttpResponseRedirect
 from django.urls import reverse
-from django.core.paginator import Paginator
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, set_response_etag
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.http import http_date
+from urllib.parse import urlencode
+import json
+from datetime import timedelta
+
+# Takvim beslemesinin tek istekte döndürebileceği en geniş tarih aralığı
+CALENDAR_MAX_WINDOW = timedelta(days=62)
 
 @login_required
+@query_budget(4)
 def lesson_list(request):
-    lessons = Lesson.objects.all()
-    lesson_days = LessonDay.objects.filter(lesson__in=lessons).order_by('date', 'start_time')
-    return render(request, 'dashboards/lesson_list.html', {'lessons': lessons, 'lesson_days': lesson_days})
+    # Ders günleri takvim tarafından görünen aralık için lesson_calendar_feed'den çekilir
+    return render(request, 'dashboards/lesson_list.html')
+
+def parse_calendar_date(value):
+    # FullCalendar start/end değerlerini ISO datetime olarak gönderir, sadece tarih kısmı kullanılır
+    value = (value or '').strip()
+    # Biçimi doğru ama var olmayan tarihler (ör. 2024-02-30) ValueError fırlatır
+    try:
+        parsed = parse_datetime(value.replace(' ', '+'))
+        return parsed.date() if parsed is not None else parse_date(value)
+    except ValueError:
+        return None
+
+@login_required
+@query_budget(6)
+def lesson_calendar_feed(request):
+    start = parse_calendar_date(request.GET.get('start'))
+    end = parse_calendar_date(request.GET.get('end'))
+    if start is None or end is None or end <= start:
+        return JsonResponse({'error': "Valid 'start' and 'end' dates are required."}, status=400)
+    if end - start > CALENDAR_MAX_WINDOW:
+        return JsonResponse({'error': "The requested date range is too large."}, status=400)
+
+    # Materialize edilmiş oturumlar tek bir index'li aralık sorgusuyla, kurallı dersler pencere için açılarak gelir
+    lesson_filters = {}
+    teacher_id = request.GET.get('teacher', '').strip()
+    lesson_id = request.GET.get('lesson', '').strip()
+    if teacher_id:
+        if not teacher_id.isdigit():
+            return JsonResponse({'error': "Invalid teacher id."}, status=400)
+        lesson_filters['teacher_id'] = teacher_id
+    if lesson_id:
+        if not lesson_id.isdigit():
+            return JsonResponse({'error': "Invalid lesson id."}, status=400)
+        lesson_filters['id'] = lesson_id
+
+    events = []
+    for session in iter_sessions(start, end, **lesson_filters):
+        # Gece yarısını geçen derslerin bitişi bir sonraki güne düşer
+        end_date = session.date + timedelta(days=1) if session.end_time <= session.start_time else session.date
+        events.append({
+            # Kurala göre üretilen oturumların satırı yoktur; kimlik ders ve tarihten türetilir
+            'id': session.lesson_day_id or f'{session.lesson_id}-{session.date.isoformat()}',
+            'title': session.title,
+            'start': f"{session.date.isoformat()}T{session.start_time.isoformat()}",
+            'end': f"{end_date.isoformat()}T{session.end_time.isoformat()}",
+            'url': reverse('lesson_detail', args=[session.lesson_id]),
+            'extendedProps': {
+                'lesson_id': session.lesson_id,
+                'teacher': session.teacher,
+            },
+        })
+
+    # İçerik değişmediyse takvim uygulaması 304 alır
+    response = JsonResponse(events, safe=False)
+    set_response_etag(response)
+    return get_conditional_response(request, etag=response['ETag'], response=response)
+
+def calendar_feed_url(request):
+    # Takvim uygulamasına eklenecek, kullanıcıya özel besleme adresi
+    url = f"{reverse('user_calendar_feed')}?{urlencode({'token': ics.feed_token(request.user)})}"
+    return request.build_absolute_uri(url)
+
+def calendar_feed_user(request):
+    # Oturum açmış kullanıcı veya besleme adresindeki imzalı token'ın sahibi
+    token = request.GET.get('token')
+    if token:
+        payload = ics.read_feed_token(token)
+        if payload is None:
+            return None
+        user_id, version = payload
+        # Sıfırlanmış (sürümü artırılmış) beslemelerin eski token'ları kabul edilmez
+        return get_user_model().objects.filter(id=user_id, is_active=True, calendar_feed_version=version).first()
+    return request.user if request.user.is_authenticated else None
+
+def stream_calendar(request, name, lesson_filters):
+    # Programı değişmeyen beslemeler için takvim uygulamaları 304 alır; oturumlar hiç okunmaz
+    lesson_rows = Lesson.objects.filter(**lesson_filters).values_list('id', 'updated_at')
+    etag, last_modified = ics.feed_validators(lesson_rows)
+    last_modified = int(last_modified.timestamp()) if last_modified else None
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    sessions = iter_sessions(chunk_size=ics.EVENTS_PER_CHUNK, **lesson_filters)
+    events = ics.render_calendar(sessions, name, request.get_host().split(':')[0])
+    response = StreamingHttpResponse(events, content_type='text/calendar; charset=utf-8')
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    response['Content-Disposition'] = 'inline; filename="schedule.ics"'
+    return response
+
+@query_budget(5)
+def user_calendar_feed(request):
+    user = calendar_feed_user(request)
+    if user is None:
+        return HttpResponse("A valid calendar token is required.", status=403)
+    # Öğretmenler verdikleri dersleri, diğer kullanıcılar onaylanmış kayıtlarını görür
+    if user.is_teacher():
+        lesson_filters = {'teacher_id': user.id}
+    else:
+        lesson_filters = {'enrollments__student_id': user.id, 'enrollments__status': 'approved'}
+    return stream_calendar(request, f'{user.username} - Gym Schedule', lesson_filters)
+
+@query_budget(5)
+def lesson_calendar_ics(request, lesson_id):
+    user = calendar_feed_user(request)
+    if user is None:
+        return HttpResponse("A valid calendar token is required.", status=403)
+    # Sadece kullanıcının verdiği veya onaylı kaydı olduğu dersler; diğerleri yokmuş gibi 404 döner
+    lessons = Lesson.objects.filter(
+        Q(teacher_id=user.id)
+        | Exists(Enrollment.objects.filter(lesson=OuterRef('pk'), student_id=user.id, status='approved'))
+    )
+    lesson = get_object_or_404(lessons.only('id', 'title'), id=lesson_id)
+    return stream_calendar(request, lesson.title, {'id': lesson.id})
 
 @login_required
+@require_POST
+@query_budget(6)
+def reset_calendar_feed(request):
+    # Sürüm artırılınca daha önce paylaşılan besleme adresleri çalışmaz; panoda yeni adres gösterilir
+    request.user.calendar_feed_version += 1
+    request.user.save(update_fields=['calendar_feed_version'])
+    messages.info(request, "Your calendar link was reset. Subscribe again with the new link.")
+    return redirect('teacher_dashboard' if request.user.is_teacher() else 'student_dashboard')
+
+@login_required
+@query_budget(7)
 def lesson_detail(request, lesson_id):
-    lesson = get_object_or_404(Lesson, id=lesson_id)
-    enrollments = Enrollment.objects.filter(lesson=lesson, status='approved')
-    approved_count = enrollments.count()
-    max_students = lesson.max_students
-    lesson_days = LessonDay.objects.filter(lesson=lesson).order_by('date', 'start_time')
-    return render(request, 'dashboards/lesson_detail.html', {
-        'lesson': lesson,
-        'enrollments': enrollments,
-        'approved_count': approved_count,
-        'max_students': max_students,
-        'lesson_days': lesson_days
-    })
+    def build():
+        lesson = get_object_or_404(Lesson.objects.select_related('teacher'), id=lesson_id)
+        enrollments = Enrollment.objects.filter(lesson=lesson, status='approved').select_related('student')
+        return {
+            'lesson': lesson,
+            'enrollments': list(enrollments),
+            'approved_count': lesson.approved_count,
+            'max_students': lesson.max_students,
+            'lesson_days': list(lesson.iter_sessions()),
+        }
+
+    # Ders, kayıtları veya oturumları yazılana kadar sayfa verisi önbellekten okunur
+    context = catalogue.cached_lesson(lesson_id, 'lesson_detail', build)
+    return render(request, 'dashboards/lesson_detail.html', context)
 
 @login_required
+@query_budget(13)
 def create_lesson(request):
     if request.user.is_teacher():
         if request.method == 'POST':
-            form = LessonForm(request.POST)
+            # Çakışma kontrolü form doğrulamasında yapılabilsin diye öğretmen önceden atanır
+            form = LessonForm(request.POST, instance=Lesson(teacher=request.user))
             if form.is_valid():
                 lesson = form.save(commit=False)
                 lesson.teacher = request.user
@@ -47,13 +194,48 @@ def create_lesson(request):
     return HttpResponse("Only teachers can create lessons.")
 
 @login_required
+@query_budget(6)
+def lesson_schedule_conflicts(request):
+    # Verilen program için öğretmenin çakışan oturumlarını JSON olarak döndürür
+    teacher_id = request.user.id
+    if request.user.is_manager() and request.GET.get('teacher', '').isdigit():
+        teacher_id = int(request.GET['teacher'])
+
+    try:
+        start_date = parse_datetime(request.GET.get('start_date', '').strip().replace(' ', '+'))
+    except ValueError:
+        # Biçimi doğru ama var olmayan tarih (ör. 13. ay)
+        return JsonResponse({'error': "'start_date' is not a valid date."}, status=400)
+    try:
+        duration_weeks = int(request.GET.get('duration_weeks', ''))
+        duration_hours = int(request.GET.get('duration_hours', ''))
+    except ValueError:
+        duration_weeks = duration_hours = None
+    if start_date is None or duration_weeks is None or duration_hours is None:
+        return JsonResponse(
+            {'error': "'start_date', 'duration_weeks' and 'duration_hours' are required."}, status=400
+        )
+    if timezone.is_naive(start_date):
+        start_date = timezone.make_aware(start_date)
+    # Çok büyük süreler her hafta için bir oturum üretip isteği kilitlemesin diye model sınırlarına sıkıştırılır
+    duration_weeks = min(max(duration_weeks, 1), Lesson.MAX_DURATION_WEEKS)
+    duration_hours = min(max(duration_hours, 1), Lesson.MAX_DURATION_HOURS)
+
+    lesson_id = request.GET.get('lesson', '').strip()
+    lesson = Lesson(
+        id=int(lesson_id) if lesson_id.isdigit() else None, teacher_id=teacher_id,
+        start_date=start_date, duration_weeks=duration_weeks, duration_hours=duration_hours,
+    )
+    conflicts = lesson.find_schedule_conflicts()
+    return JsonResponse({'conflicts': conflicts, 'count': len(conflicts)})
+
+@login_required
+@query_budget(9)
 def enroll_in_lesson(request, lesson_id):
     lesson = get_object_or_404(Lesson, id=lesson_id)
     if request.user.is_student():
-        enrollment, created = Enrollment.objects.get_or_create(lesson=lesson, student=request.user)
+        enrollment, created = enrollments.request_enrollment(lesson, request.user)
         if created:
-            enrollment.status = 'requested'
-            enrollment.save()
             messages.success(request, "Your request to join the lesson has been sent.")
         else:
             messages.info(request, "You have already requested to join this lesson.")
@@ -61,21 +243,154 @@ def enroll_in_lesson(request, lesson_id):
     return HttpResponse("Only students can enroll in lessons.")
 
 @login_required
+@query_budget(11)
 def manage_enrollment(request, enrollment_id, action):
-    enrollment = get_object_or_404(Enrollment, id=enrollment_id)
-    if request.user == enrollment.lesson.teacher:
+    enrollment = get_object_or_404(Enrollment.objects.select_related('lesson', 'student'), id=enrollment_id)
+    if request.user.id == enrollment.lesson.teacher_id:
         if action == 'approve':
-            enrollment.status = 'approved'
-            enrollment.save()
-            messages.success(request, f"{enrollment.student.username}'s request to join '{enrollment.lesson.title}' has been approved.")
+            try:
+                enrollments.approve_enrollment(enrollment)
+            except enrollments.LessonFullError:
+                messages.error(request, f"'{enrollment.lesson.title}' is full, {enrollment.student.username}'s request could not be approved.")
+            else:
+                messages.success(request, f"{enrollment.student.username}'s request to join '{enrollment.lesson.title}' has been approved.")
         elif action == 'reject':
-            enrollment.status = 'rejected'
-            enrollment.save()
+            enrollments.reject_enrollment(enrollment)
             messages.error(request, f"{enrollment.student.username}'s request to join '{enrollment.lesson.title}' has been rejected.")
         return redirect('teacher_dashboard')
     return HttpResponse("You are not authorized to manage this enrollment.")
 
 @login_required
+@require_POST
+@query_budget(11)
+def bulk_manage_enrollments(request):
+    # Seçilen kayıtları tek seferde onaylar veya reddeder; JSON isteyenlere kayıt bazında sonuç döner
+    action = request.POST.get('action')
+    statuses = {'approve': 'approved', 'reject': 'rejected'}
+    enrollment_ids = [int(value) for value in request.POST.getlist('enrollment_ids') if value.isdigit()]
+    wants_json = 'application/json' in request.headers.get('Accept', '')
+    if not request.user.is_teacher() or action not in statuses:
+        if wants_json:
+            return JsonResponse({'error': 'Invalid action.'}, status=400)
+        return HttpResponse("You are not authorized to manage these enrollments.")
+
+    results = enrollments.bulk_change_enrollment_status(request.user, enrollment_ids, statuses[action])
+    if wants_json:
+        return JsonResponse({'action': action, 'results': {str(key): value for key, value in results.items()}})
+
+    outcomes = Counter(results.values())
+    if outcomes[enrollments.CHANGED]:
+        messages.success(request, f"{outcomes[enrollments.CHANGED]} enrollment(s) {statuses[action]}.")
+    if outcomes[enrollments.FULL]:
+        messages.error(request, f"{outcomes[enrollments.FULL]} enrollment(s) could not be approved because the lesson is full.")
+    if outcomes[enrollments.NOT_FOUND]:
+        messages.error(request, f"{outcomes[enrollments.NOT_FOUND]} enrollment(s) were not found.")
+    return redirect('teacher_dashboard')
+
+def can_record_attendance(user, lesson_ids):
+    # Yoklamayı sadece dersin öğretmeni veya yöneticiler kaydedebilir
+    if user.is_manager():
+        return True
+    if not user.is_teacher():
+        return False
+    return not Lesson.objects.filter(id__in=lesson_ids).exclude(teacher=user).exists()
+
+@login_required
+@require_POST
+@query_budget(8)
+def check_in(request, lesson_id):
+    # Kapı kioskları: dersin öğretmeni veya yönetici student_id ile öğrenciyi kaydeder
+    if not can_record_attendance(request.user, [lesson_id]):
+        return JsonResponse({'error': "Only the lesson's teacher or a manager can record attendance."}, status=403)
+    student_id = request.POST.get('student_id', '').strip()
+    if not student_id.isdigit():
+        return JsonResponse({'error': "'student_id' is required."}, status=400)
+    try:
+        record, created = attendance.check_in(lesson_id, int(student_id))
+    except attendance.NotEnrolledError as error:
+        return JsonResponse({'error': str(error)}, status=404)
+    except attendance.NoSessionError as error:
+        return JsonResponse({'error': str(error)}, status=409)
+    return JsonResponse({
+        'status': 'checked_in' if created else 'already_checked_in',
+        'session_date': record.session_date,
+        'checked_in_at': record.checked_in_at,
+    }, status=201 if created else 200)
+
+@login_required
+@require_POST
+@query_budget(9)
+def upload_attendance_scans(request):
+    # Çevrimdışı kalan kioskun okutmaları: {"scans": [{"lesson_id", "student_id", "scanned_at"}, ...]}
+    if not (request.user.is_manager() or request.user.is_teacher()):
+        return JsonResponse({'error': "Only staff kiosks can upload scans."}, status=403)
+    try:
+        scans = json.loads(request.body)['scans']
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': "A JSON body with a 'scans' list is required."}, status=400)
+    if not isinstance(scans, list):
+        return JsonResponse({'error': "A JSON body with a 'scans' list is required."}, status=400)
+
+    valid, invalid = [], []
+    for index, scan in enumerate(scans):
+        try:
+            scanned_at = parse_datetime(str(scan['scanned_at']))
+            lesson_id, student_id = int(scan['lesson_id']), int(scan['student_id'])
+        except (KeyError, TypeError, ValueError):
+            scanned_at = None
+        if scanned_at is None:
+            invalid.append(index)
+            continue
+        if timezone.is_naive(scanned_at):
+            scanned_at = timezone.make_aware(scanned_at)
+        valid.append((index, (lesson_id, student_id, scanned_at)))
+
+    # Öğretmen kiosku sadece kendi derslerinin okutmalarını yükleyebilir
+    if not can_record_attendance(request.user, {scan[0] for _, scan in valid}):
+        return JsonResponse({'error': "Scans include lessons taught by another teacher."}, status=403)
+    accepted, rejected = attendance.record_scans(scan for _, scan in valid)
+    # Servisin sıra numaraları geçerli okutmalar listesine göredir, istekteki sıraya çevrilir
+    reasons = {valid[index][0]: reason for index, reason in rejected.items()}
+    reasons.update((index, attendance.INVALID) for index in invalid)
+    return JsonResponse({'accepted': accepted, 'rejected': {str(index): reasons[index] for index in sorted(reasons)}})
+
+@login_required
+@query_budget(7)
+def lesson_attendance(request, lesson_id):
+    # Oturum bazında katılım özeti; dersin öğretmeni ve yöneticiler görebilir
+    lesson = get_object_or_404(Lesson, id=lesson_id)
+    if lesson.teacher_id != request.user.id and not request.user.is_manager():
+        return JsonResponse({'error': "You are not allowed to view this lesson's attendance."}, status=403)
+    start = parse_calendar_date(request.GET.get('start'))
+    end = parse_calendar_date(request.GET.get('end'))
+    return JsonResponse({
+        'lesson': lesson.id,
+        'sessions': attendance.session_summaries(lesson, start, end),
+    })
+
+def summarize_enrollments(lessons):
+    # Sayfadaki dersler için tek bir gruplanmış sorguyla durum bazında kayıt sayılarını ekler
+    summary = {
+        row['lesson_id']: row
+        for row in Enrollment.objects.filter(lesson__in=[lesson.id for lesson in lessons])
+        .values('lesson_id')
+        .annotate(
+            requested=Count('id', filter=Q(status='requested')),
+            approved=Count('id', filter=Q(status='approved')),
+            rejected=Count('id', filter=Q(status='rejected')),
+        )
+        .order_by()
+    }
+    for lesson in lessons:
+        row = summary.get(lesson.id, {})
+        lesson.requested_total = row.get('requested', 0)
+        lesson.approved_total = row.get('approved', 0)
+        lesson.rejected_total = row.get('rejected', 0)
+        lesson.seats_left = max(lesson.max_students - lesson.approved_total, 0)
+    return lessons
+
+@login_required
+@query_budget(8)
 def teacher_dashboard(request):
     # Öğretmenin verdiği tüm dersleri alıyoruz
     lessons = Lesson.objects.filter(teacher=request.user)
@@ -87,35 +402,69 @@ def teacher_dashboard(request):
 
     # Ders başlığı, öğretmen adı veya açıklamaya göre arama yapıyoruz
     if query:
-        lessons = lessons.filter(
-            Q(title__icontains=query) | 
-            Q(description__icontains=query)
-        )
+        lessons = search_lessons(lessons, query, columns=['title', 'description'])
     # Başlangıç tarihine göre arama
-    if date_query:
-        lessons = lessons.filter(start_date__date=date_query)
+    start_day = parse_day(date_query)
+    if start_day:
+        lessons = filter_by_day(lessons, start_day)
 
-    # Duruma göre filtreleme
+    # Duruma göre filtreleme; join yerine EXISTS kullanıldığı için dersler tekrar etmez
     if status_query:
-        lessons = lessons.filter(enrollments__status=status_query)
-
-    # Onay bekleyen ders başvurularını alıyoruz
-    pending_enrollments = Enrollment.objects.filter(lesson__in=lessons, status='requested')
+        lessons = lessons.filter(
+            Exists(Enrollment.objects.filter(lesson=OuterRef('pk'), status=status_query))
+        )
 
     # Sayfalama
-    paginator = Paginator(lessons, 5)  # Sayfa başına 5 ders
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = KeysetPaginator(lessons, 5, ordering=search_ordering(lessons))
+    page_obj = paginator.get_page(request.GET.get('page'))
+    summarize_enrollments(page_obj.object_list)
+
+    # Onay bekleyen ders başvuruları kendi imleciyle sınırlı sayıda listelenir
+    pending_enrollments = Enrollment.objects.filter(
+        lesson__in=lessons.order_by().values('id'), status='requested'
+    ).select_related('lesson', 'student')
+    pending_paginator = KeysetPaginator(pending_enrollments, 10, ordering=('id',))
+    pending_page = pending_paginator.get_page(request.GET.get('pending'))
 
     return render(request, 'dashboards/teacher_dashboard.html', {
         'page_obj': page_obj,
-        'pending_enrollments': pending_enrollments,
+        'pending_enrollments': pending_page,
         'query': query,
         'date_query': date_query,
         'status_query': status_query,
+        'calendar_feed_url': calendar_feed_url(request),
     })
 
+def get_cached_page(paginator, cursor, name, *params):
+    # Sayfanın dersleri ve imleçleri saklanır; QuerySet pickle edilirse tüm sonuç okunurdu
+    def build():
+        page = paginator.get_page(cursor)
+        return list(page.object_list), page.number, page.next_cursor, page.previous_cursor
+
+    object_list, number, next_cursor, previous_cursor = catalogue.cached_listing(name, (*params, cursor), build)
+    return KeysetPage(catalogue.attach_versions(object_list), paginator, number, next_cursor, previous_cursor)
+
+@login_required
+@query_budget(4)
+def catalogue_cache_stats(request):
+    if not request.user.is_manager():
+        return HttpResponse("Only managers can view cache statistics.", status=403)
+    return JsonResponse(catalogue.get_stats())
+
 @login_required
+@query_budget(9)
+def manager_reports(request):
+    # Sadece özet tablolarını okur; güncellik refresh_rollups komutuna bağlıdır
+    if not request.user.is_manager():
+        return HttpResponse("Only managers can view reports.", status=403)
+    weeks = request.GET.get('weeks', '').strip()
+    weeks = min(max(int(weeks), 1), 52) if weeks.isdigit() else 12
+    context = rollups.weekly_report(weeks)
+    context['week_count'] = weeks
+    return render(request, 'dashboards/manager_reports.html', context)
+
+@login_required
+@query_budget(5)
 def all_lessons(request):
     lessons = Lesson.objects.none()  # İlk başta boş bir sorgu seti döndür
 
@@ -125,22 +474,18 @@ def all_lessons(request):
 
     # Eğer filtreleme parametrelerinden biri doluysa arama yap
     if query or date_query:
-        lessons = Lesson.objects.all()  # Filtreleme yapacağımız tüm dersleri al
+        lessons = Lesson.objects.select_related('teacher')  # Filtreleme yapacağımız tüm dersleri al
 
         if query:
-            lessons = lessons.filter(
-                Q(title__icontains=query) |
-                Q(description__icontains=query) |
-                Q(teacher__username__icontains=query)
-            )
+            lessons = search_lessons(lessons, query)
 
-        if date_query:
-            lessons = lessons.filter(start_date__date=date_query)
+        start_day = parse_day(date_query)
+        if start_day:
+            lessons = filter_by_day(lessons, start_day)
 
     # Sayfalama
-    paginator = Paginator(lessons, 5)  # Sayfa başına 5 ders
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = KeysetPaginator(lessons, 5, ordering=search_ordering(lessons))
+    page_obj = get_cached_page(paginator, request.GET.get('page'), 'all_lessons', query, date_query)
 
     return render(request, 'dashboards/all_lessons.html', {
         'page_obj': page_obj,
@@ -149,56 +494,48 @@ def all_lessons(request):
     })
 
 @login_required
+@query_budget(7)
 def student_dashboard(request):
-    # Öğrencinin etkileşime geçtiği tüm ders kayıtlarını alıyoruz
-    enrollments = Enrollment.objects.filter(student=request.user)
-    lessons = Lesson.objects.filter(id__in=[enrollment.lesson_id for enrollment in enrollments])
-
-    # Öğrencinin her ders için durumunu saklayan bir sözlük oluşturuyoruz
-    lesson_status = {enrollment.lesson_id: enrollment.status for enrollment in enrollments}
-
     # Arama parametrelerini alıyoruz
     query = request.GET.get('query', '').strip()
     date_query = request.GET.get('date', '').strip()
     status_query = request.GET.get('status', '').strip()
 
+    # Öğrencinin kayıtları dersi ve öğretmeniyle tek bir JOIN sorgusunda okunur;
+    # tüm filtreler SQL'de uygulanır, ders id listesi Python'a taşınmaz
+    student_enrollments = Enrollment.objects.filter(student=request.user).select_related('lesson__teacher')
+    if status_query:
+        student_enrollments = student_enrollments.filter(status=status_query)
     # Ders başlığı, öğretmen adı veya açıklamaya göre arama yapıyoruz
     if query:
-        lessons = lessons.filter(
-            Q(teacher__username__icontains=query) | 
-            Q(title__icontains=query) | 
-            Q(description__icontains=query)
-        )
+        student_enrollments = search_lessons(student_enrollments, query, prefix='lesson__')
     # Başlangıç tarihine göre arama
-    if date_query:
-        lessons = lessons.filter(start_date__date=date_query)
+    start_day = parse_day(date_query)
+    if start_day:
+        student_enrollments = filter_by_day(student_enrollments, start_day, field='lesson__start_date')
 
-    # Duruma göre filtreleme
-    if status_query:
-        enrollments = enrollments.filter(status=status_query)
-        lessons = Lesson.objects.filter(id__in=[enrollment.lesson_id for enrollment in enrollments])
-
-    # Sayfalama
-    paginator = Paginator(lessons, 5)  # Sayfa başına 5 ders
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Sayfalama aynı sorgu üzerinde, aramada alaka, yoksa (ders başlangıcı, kayıt id) sırasıyla yapılır
+    ordering = search_ordering(student_enrollments, ('lesson__start_date', 'id'))
+    paginator = KeysetPaginator(student_enrollments, 5, ordering=ordering)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    waitlisted = any(enrollment.status == 'waitlisted' for enrollment in page_obj)
 
     return render(request, 'dashboards/student_dashboard.html', {
         'page_obj': page_obj,
         'query': query,
         'date_query': date_query,
         'status_query': status_query,
-        'lesson_status': lesson_status  # Derslerin durumları
+        'waitlist_positions': enrollments.waitlist_positions(request.user) if waitlisted else {},
+        'calendar_feed_url': calendar_feed_url(request),
     })
 
 @login_required
+@query_budget(9)
 def request_enrollment(request, lesson_id):
     lesson = get_object_or_404(Lesson, id=lesson_id)
     if request.user.is_student():
-        enrollment, created = Enrollment.objects.get_or_create(lesson=lesson, student=request.user)
+        enrollment, created = enrollments.request_enrollment(lesson, request.user)
         if created:
-            enrollment.status = 'requested'
-            enrollment.save()
             messages.success(request, f"You have requested to join '{lesson.title}'.")
         else:
             messages.info(request, "You have already requested to join this lesson.")
@@ -208,8 +545,37 @@ def request_enrollment(request, lesson_id):
     else:
         return HttpResponse("Only students can request enrollment.")
 
+@login_required
+@query_budget(9)
+def join_waitlist(request, lesson_id):
+    lesson = get_object_or_404(Lesson, id=lesson_id)
+    if not request.user.is_student():
+        return HttpResponse("Only students can join a waitlist.")
+
+    # Bu arada yer açıldıysa normal katılım isteği oluşturulur
+    if lesson.approved_count < lesson.max_students:
+        return request_enrollment(request, lesson_id)
+
+    enrollment, created = enrollments.join_waitlist(lesson, request.user)
+    if created:
+        position = enrollments.waitlist_position(enrollment)
+        messages.success(request, f"You are number {position} on the waitlist for '{lesson.title}'.")
+    else:
+        messages.info(request, "You have already requested to join this lesson.")
+    return HttpResponseRedirect(reverse('available_lessons'))
+
+@login_required
+@require_POST
+@query_budget(12)
+def leave_lesson(request, lesson_id):
+    enrollment = get_object_or_404(Enrollment, lesson_id=lesson_id, student=request.user)
+    enrollments.leave_lesson(enrollment)
+    messages.info(request, "You have left the lesson.")
+    return redirect('student_dashboard')
+
 
 @login_required
+@query_budget(5)
 def available_lessons(request):
     if not request.user.is_student():
         return HttpResponse("Only students can view available lessons.")
@@ -220,33 +586,32 @@ def available_lessons(request):
     # Arama sorgusu ve tarih filtresi
     query = request.GET.get('query', '').strip()
     date_query = request.GET.get('date', '').strip()
+    free_only = request.GET.get('free') == '1'
 
-    # Öğrencinin daha önce başvurmadığı ve kapasitesi dolmamış dersleri filtreliyoruz
+    # Öğrencinin daha önce başvurmadığı dersleri filtreliyoruz; dolu dersler bekleme listesi için listelenir
     student_enrollments = Enrollment.objects.filter(student=request.user).values_list('lesson_id', flat=True)
-    lessons = Lesson.objects.exclude(id__in=student_enrollments) \
-        .annotate(approved_count=Count('enrollments', filter=Q(enrollments__status='approved'))) \
-        .filter(approved_count__lt=F('max_students'))
+    lessons = Lesson.objects.exclude(id__in=student_enrollments).select_related('teacher')
+    # İstenirse sadece boş yeri olan dersler (lesson_seats_left_idx)
+    if free_only:
+        lessons = lessons.with_free_seats()
 
     # Ders başlığı, öğretmen veya açıklamaya göre arama
     if query:
-        lessons = lessons.filter(
-            Q(title__icontains=query) | 
-            Q(teacher__username__icontains=query) | 
-            Q(description__icontains=query)
-        )
+        lessons = search_lessons(lessons, query)
     # Tarih filtresi
-    if date_query:
-        lessons = lessons.filter(start_date__date=date_query)
+    start_day = parse_day(date_query)
+    if start_day:
+        lessons = filter_by_day(lessons, start_day)
 
-    lessons = lessons.order_by('start_date')
-
-    # Sayfalama
-    paginator = Paginator(lessons, 5)  # Sayfa başına 5 ders
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Sayfalama; sonuç öğrencinin kayıtlarına bağlı olduğu için anahtara öğrenci de eklenir
+    paginator = KeysetPaginator(lessons, 5, ordering=search_ordering(lessons))
+    page_obj = get_cached_page(
+        paginator, request.GET.get('page'), 'available_lessons', request.user.id, query, date_query, free_only,
+    )
 
     return render(request, 'dashboards/available_lessons.html', {
         'page_obj': page_obj,
         'query': query,
-        'date_query': date_query
+        'date_query': date_query,
+        'free_only': free_only,
     })
\ No newline at end of file
@@ -24,6 +24,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'dashboards.middleware.QueryBudgetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -60,6 +61,61 @@ DATABASES = {
     }
 }
 
+# Ders kataloğu önbelleği (dashboards.catalogue). Geliştirmede yerel bellek yeterlidir;
+# birden fazla worker süreci çalışıyorsa CATALOGUE_CACHE_BACKEND=file veya db ile
+# süreçler arası paylaşılan bir önbellek seçilir (db için: manage.py createcachetable).
+# Her önbellek kendi konumunu kullanır; birinin clear() çağrısı diğerini silmez.
+def cache_backend(kind, name):
+    return {
+        'locmem': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': name,
+        },
+        'file': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': BASE_DIR / 'cache' / name,
+        },
+        'db': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': f'{name}_cache',
+        },
+    }[kind]
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'catalogue': {
+        **cache_backend(os.environ.get('CATALOGUE_CACHE_BACKEND', 'locmem'), 'catalogue'),
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+    # cached_db oturumları; çıkış yapılan oturum diğer worker'larda da düşsün diye çok süreçte paylaşımlı olmalıdır
+    'sessions': {
+        **cache_backend(os.environ.get('SESSION_CACHE_BACKEND', 'locmem'), 'sessions'),
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+}
+
+CATALOGUE_CACHE_ALIAS = 'catalogue'
+CATALOGUE_CACHE_TIMEOUT = 60 * 60
+CATALOGUE_CACHE_STATS = True
+
+# Oturum ve mesaj saklama modları (bkz. users.sessions, dashboards.benchmarks). Varsayılan cached_db oturumlar
+# okumaları önbellekten yapar, yazmaları hem veritabanına hem önbelleğe yazar (write-through).
+# İmzalı çerez mesajları yönlendirme mesajları için oturumu hiç değiştirmez.
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+}
+MESSAGE_STORAGES = {
+    'session': 'django.contrib.messages.storage.session.SessionStorage',
+    'cookie': 'django.contrib.messages.storage.cookie.CookieStorage',
+    'fallback': 'django.contrib.messages.storage.fallback.FallbackStorage',
+}
+SESSION_ENGINE = SESSION_ENGINES[os.environ.get('SESSION_STORAGE', 'cached_db')]
+SESSION_CACHE_ALIAS = 'sessions'
+MESSAGE_STORAGE = MESSAGE_STORAGES[os.environ.get('MESSAGE_STORAGE', 'cookie')]
+
 AUTH_PASSWORD_VALIDATORS = []
 
 LANGUAGE_CODE = 'en-us'
@@ -88,4 +144,7 @@ STRIPE_SECRET_KEY = 'your_secret_key_here'
 STRIPE_PUBLISHABLE_KEY = 'your_publishable_key_here'
 
 MEDIA_URL = '/media/'
-MEDIA_ROOT = BASE_DIR / 'media'
\ No newline at end of file
+MEDIA_ROOT = BASE_DIR / 'media'
+# İstek başına SQL sorgularını kaydeden QueryBudgetMiddleware ayarları
+QUERY_BUDGET_ENABLED = DEBUG
+QUERY_REPEAT_THRESHOLD = 3
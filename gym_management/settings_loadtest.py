@@ -0,0 +1,27 @@
+"""Eşzamanlı yazma yükü (kapı girişleri, toplu onaylar) için SQLite ayarları.
+
+``manage.py loadtest_check_in --settings=gym_management.settings_loadtest``
+ve eşzamanlılık testleri (``manage.py test --settings=...``) bu modülle
+çalışır. Ayarlar paylaşılan settings'e konmaz: WAL kipi veritabanı dosyasının
+başlığına yazılır ve depodaki db.sqlite3'ü her bağlantıda değiştirirdi.
+"""
+import tempfile
+from pathlib import Path
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES
+
+DATABASES['default'] = {
+    **DATABASES['default'],
+    'OPTIONS': {
+        # Yazma kilidi transaction başında alınır; eşzamanlı yazıcılar "database is locked" yerine sırayla bekler
+        'transaction_mode': 'IMMEDIATE',
+        'timeout': 20,
+        # WAL: okuyucular yazıcıyı beklemez (yoğun kapı girişleri); NORMAL senkronizasyon WAL'da güvenlidir
+        'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+    },
+    # Paylaşımlı bellek veritabanında kilit beklenmez, "database table is locked" hatası alınır;
+    # dosya tabanlı test veritabanı depo dışında tutulur
+    'TEST': {
+        'NAME': Path(tempfile.gettempdir()) / 'gym_management_test.sqlite3',
+    },
+}
@@ -16,7 +16,8 @@ class Cart(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     def get_total_items(self):
-        return sum(item.quantity for item in self.items.all())
+        # Sepetteki toplam ürün adedi tek bir SUM sorgusuyla hesaplanır
+        return self.items.aggregate(total=models.Sum('quantity'))['total'] or 0
 
 class CartItem(models.Model):
     cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name='items')
@@ -37,5 +38,11 @@ class Order(models.Model):
     postal_code = models.CharField(max_length=20)
     country = models.CharField(max_length=50)
 
+    class Meta:
+        indexes = [
+            # Gelir özetleri son çalışmadan beri verilen siparişleri bu index ile bulur
+            models.Index(fields=['created_at'], name='order_created_at_idx'),
+        ]
+
     def __str__(self):
         return f"Order #{self.id} by {self.user.username}"
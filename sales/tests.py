@@ -1,3 +1,47 @@
+from decimal import Decimal
 from django.test import TestCase
+from dashboards.querybudget import QueryBudgetTestMixin
+from users.models import User
+from .models import Product, Cart, CartItem
 
-# Create your tests here.
+
+class SalesViewsQueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(username='manager', password='pass', role='manager')
+        cls.member = User.objects.create_user(username='member', password='pass', role='student')
+        cls.cart = Cart.objects.create(user=cls.member)
+        cls.product = cls.create_products(1)[0]
+        cls.item = CartItem.objects.create(cart=cls.cart, product=cls.product, quantity=2)
+
+    @classmethod
+    def create_products(cls, count):
+        offset = Product.objects.count()
+        return [
+            Product.objects.create(
+                name=f'Product {offset + index}', description='Protein bar', price=Decimal('4.50'),
+                image='products/character_2.png', stock=100,
+            )
+            for index in range(count)
+        ]
+
+    def grow(self):
+        # Sepete ve kataloğa sayfa boyutunu aşacak kadar ürün eklenir
+        for product in self.create_products(20):
+            CartItem.objects.create(cart=self.cart, product=product, quantity=1)
+
+    def test_store_views(self):
+        self.client.force_login(self.member)
+        for url in ['/products/', f'/product/{self.product.id}/', '/cart/', '/checkout/']:
+            with self.subTest(url=url):
+                self.assertConstantQueries(url, self.grow)
+
+    def test_manager_views(self):
+        self.client.force_login(self.manager)
+        self.assertConstantQueries('/add_product/', self.grow)
+
+    def test_cart_updates(self):
+        self.client.force_login(self.member)
+        self.grow()
+        self.assertWithinQueryBudget(f'/add_to_cart/{self.product.id}/', method='post')
+        self.assertWithinQueryBudget(f'/remove_from_cart/{self.item.id}/')
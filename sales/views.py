@@ -7,14 +7,17 @@ from django.conf import settings
 from django.views.decorators.csrf import csrf_exempt
 from .forms import ProductForm
 from django.http import JsonResponse
+from dashboards.pagination import KeysetPaginator
+from dashboards.querybudget import query_budget
 
 stripe.api_key = settings.STRIPE_SECRET_KEY
 
 @login_required
 @csrf_exempt
+@query_budget(8)
 def checkout(request):
     cart = Cart.objects.get(user=request.user)
-    items = cart.items.all()
+    items = cart.items.select_related('product')
     total_price = sum(item.get_total_price() for item in items)
     
     if request.method == 'POST':
@@ -51,11 +54,15 @@ def checkout(request):
 
 
 @login_required
+@query_budget(5)
 def product_list(request):
     products = Product.objects.all()
-    return render(request, 'sales/product_list.html', {'products': products})
+    paginator = KeysetPaginator(products, 12, ordering=('name', 'id'))
+    page_obj = paginator.get_page(request.GET.get('page'))
+    return render(request, 'sales/product_list.html', {'page_obj': page_obj})
 
 @login_required
+@query_budget(5)
 def add_product(request):
     # Sadece manager kullanıcılar bu görünümü kullanabilir
     if not request.user.is_manager():
@@ -74,11 +81,13 @@ def add_product(request):
     return render(request, 'sales/add_product.html', {'form': form})
 
 @login_required
+@query_budget(5)
 def product_detail(request, product_id):
     product = get_object_or_404(Product, id=product_id)
     return render(request, 'sales/product_detail.html', {'product': product})
 
 @login_required
+@query_budget(8)
 def add_to_cart(request, product_id):
     product = get_object_or_404(Product, id=product_id)
     cart, created = Cart.objects.get_or_create(user=request.user)
@@ -93,13 +102,15 @@ def add_to_cart(request, product_id):
     return JsonResponse({'message': f"{product.name} added to cart.", 'cart_items_count': cart_items_count})
 
 @login_required
+@query_budget(6)
 def cart_detail(request):
     cart, created = Cart.objects.get_or_create(user=request.user)
-    items = cart.items.all()
+    items = cart.items.select_related('product')
     total_price = sum(item.get_total_price() for item in items)
     return render(request, 'sales/cart_detail.html', {'cart': cart, 'items': items, 'total_price': total_price})
 
 @login_required
+@query_budget(6)
 def remove_from_cart(request, item_id):
     cart_item = get_object_or_404(CartItem, id=item_id, cart__user=request.user)
     cart_item.delete()
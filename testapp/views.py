@@ -1,5 +1,7 @@
 from django.shortcuts import render
+from dashboards.querybudget import query_budget
 
+@query_budget(0)
 def test_page(request):
     return render(request, 'testapp/test_page.html')
 
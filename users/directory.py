@@ -0,0 +1,53 @@
+"""Yönetici kullanıcı dizini (user_management) için sorgular.
+
+Varsayılan arama kullanıcı adının başından, büyük/küçük harf duyarsız
+yapılır ve ``LOWER(username)`` ifade index'i üzerinde bir aralık taramasına
+dönüşür. ``icontains`` her satırı okumak zorunda olduğu için alt metin
+araması ayrı ve açıkça seçilen (daha yavaş) bir moddur.
+"""
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Concat, Lower
+from dashboards.models import Enrollment, Lesson
+from .models import User
+
+PREFIX = 'prefix'
+CONTAINS = 'contains'
+MATCH_MODES = (
+    (PREFIX, 'Starts with'),
+    (CONTAINS, 'Contains (slower)'),
+)
+# Önek aralığının üst sınırı: her karakterden büyük olan en yüksek Unicode kod noktası
+PREFIX_UPPER_BOUND = '\U0010ffff'
+ORDERING = ('username_lower', 'id')
+
+
+def count_subquery(queryset, field):
+    # Sayılar sadece sayfadaki satırlar için, kullanıcı başına bir alt sorguyla hesaplanır
+    counts = queryset.filter(**{field: OuterRef('pk')}).values(field).annotate(total=Count('id')).values('total')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def search_users(query='', role='', match=PREFIX):
+    """Dizin sorgu setini döndürür; ``ORDERING`` ile sayfalanmak üzere hazırlanmıştır.
+
+    Önek aramasında filtre ve sıralama aynı ``LOWER(username)`` ifadesini
+    kullanır; rol seçildiğinde (role, LOWER(username), id) index'i okunur.
+    """
+    users = User.objects.annotate(
+        username_lower=Lower('username'),
+        lesson_count=count_subquery(Lesson.objects.all(), 'teacher'),
+        enrollment_count=count_subquery(Enrollment.objects.all(), 'student'),
+    ).prefetch_related('skills')
+
+    if role in dict(User.ROLE_CHOICES):
+        users = users.filter(role=role)
+    if query and match == CONTAINS:
+        users = users.filter(username__icontains=query)
+    elif query:
+        # LIKE index kullanamaz; önek [q, q + U+10FFFF) aralığı olarak yazılır, küçültme veritabanında yapılır
+        lowered = Lower(Value(query))
+        users = users.filter(
+            username_lower__gte=lowered,
+            username_lower__lt=Concat(lowered, Value(PREFIX_UPPER_BOUND)),
+        )
+    return users
@@ -0,0 +1,98 @@
+"""Yöneticiler için akışlı (streaming) CSV dışa aktarımları.
+
+Satırlar model örneği oluşturulmadan ``values_list`` ile, sunucu tarafında
+``iterator(chunk_size=...)`` ile parça parça okunur ve her parça tek bir
+yield ile gönderilir. Başlık satırı sorgu çalışmadan önce gönderildiği için
+ilk bayt hemen ulaşır; bellek kullanımı tablo boyutundan bağımsızdır.
+"""
+import csv
+from io import StringIO
+from itertools import islice
+from django.http import StreamingHttpResponse
+from dashboards.models import Enrollment
+from sales.models import Order
+from .models import User
+
+# Veritabanından her seferde okunan ve tek yield ile gönderilen satır sayısı
+CHUNK_SIZE = 2000
+# Hesap tablosu programlarında formül olarak yorumlanan hücre başlangıçları
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+USER_HEADER = ['id', 'username', 'first_name', 'last_name', 'email', 'role', 'skills', 'is_active', 'date_joined']
+ENROLLMENT_HEADER = [
+    'id', 'lesson_id', 'lesson_title', 'teacher', 'student', 'status', 'created_at', 'status_changed_at',
+]
+ORDER_HEADER = ['id', 'username', 'total_amount', 'created_at', 'city', 'postal_code', 'country', 'stripe_payment_id']
+
+
+def clean_cell(value):
+    # Kullanıcı girdisi (ör. "=HYPERLINK(...)") Excel'de formül olarak çalışmasın diye tırnakla başlatılır
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def iter_chunks(queryset, chunk_size=CHUNK_SIZE):
+    rows = iter(queryset.iterator(chunk_size=chunk_size))
+    while chunk := list(islice(rows, chunk_size)):
+        yield chunk
+
+
+def render_csv(header, chunks):
+    """Başlığı hemen, ardından her satır parçasını tek bir metin olarak üretir."""
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return value
+
+    writer.writerow(header)
+    yield flush()
+    for chunk in chunks:
+        writer.writerows([clean_cell(value) for value in row] for row in chunk)
+        yield flush()
+
+
+def user_chunks(chunk_size=CHUNK_SIZE):
+    users = User.objects.order_by('id').values_list(
+        'id', 'username', 'first_name', 'last_name', 'email', 'role', 'is_active', 'date_joined',
+    )
+    for chunk in iter_chunks(users, chunk_size):
+        # Beceriler parça başına tek sorguyla ara tablodan okunur
+        skills = {}
+        for user_id, name in (
+            User.skills.through.objects.filter(user_id__in=[row[0] for row in chunk])
+            .order_by('skill__name').values_list('user_id', 'skill__name')
+        ):
+            skills.setdefault(user_id, []).append(name)
+        yield [(*row[:6], '; '.join(skills.get(row[0], ())), *row[6:]) for row in chunk]
+
+
+def enrollment_chunks(chunk_size=CHUNK_SIZE):
+    return iter_chunks(
+        Enrollment.objects.order_by('id').values_list(
+            'id', 'lesson_id', 'lesson__title', 'lesson__teacher__username', 'student__username', 'status',
+            'created_at', 'status_changed_at',
+        ),
+        chunk_size,
+    )
+
+
+def order_chunks(chunk_size=CHUNK_SIZE):
+    return iter_chunks(
+        Order.objects.order_by('id').values_list(
+            'id', 'user__username', 'total_amount', 'created_at', 'city', 'postal_code', 'country', 'stripe_payment_id',
+        ),
+        chunk_size,
+    )
+
+
+def csv_response(filename, header, chunks):
+    response = StreamingHttpResponse(render_csv(header, chunks), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    # Ara sunucuların (ör. nginx) yanıtı tamponlayıp ilk baytı geciktirmesi engellenir
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -81,4 +81,33 @@ class SkillForm(forms.ModelForm):
         fields = ['name']
         widgets = {
             'name': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Enter skill name'}),
-        }
\ No newline at end of file
+        }
+
+class TeacherSearchForm(forms.Form):
+    WEEKDAY_CHOICES = [('', 'Any day')] + [
+        (str(index), name) for index, name in enumerate(
+            ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+        )
+    ]
+
+    skills = forms.ModelMultipleChoiceField(
+        queryset=Skill.objects.order_by('name'),
+        widget=forms.CheckboxSelectMultiple,
+        required=False,
+        label="Required skills",
+    )
+    weekday = forms.TypedChoiceField(choices=WEEKDAY_CHOICES, coerce=int, empty_value=None, required=False,
+                                     label="Free on")
+    start_time = forms.TimeField(required=False, widget=forms.TimeInput(attrs={'type': 'time', 'class': 'form-control'}))
+    end_time = forms.TimeField(required=False, widget=forms.TimeInput(attrs={'type': 'time', 'class': 'form-control'}))
+
+    def clean(self):
+        cleaned_data = super().clean()
+        # Müsaitlik sadece gün ve saat aralığı birlikte verildiğinde aranır; biri eksikse sessizce yok sayılmaz
+        has_window = cleaned_data.get('start_time') and cleaned_data.get('end_time')
+        has_time = cleaned_data.get('start_time') or cleaned_data.get('end_time')
+        if cleaned_data.get('weekday') is not None and not has_window:
+            raise forms.ValidationError("Choose a start and end time to search by availability.")
+        if cleaned_data.get('weekday') is None and has_time:
+            raise forms.ValidationError("Choose a day to search by availability.")
+        return cleaned_data
@@ -0,0 +1,79 @@
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from dashboards.imports import error_messages
+from .models import Skill, User
+from .skill_index import invalidate_index
+
+# Formlarda olduğu gibi yönetici hesapları içe aktarmayla oluşturulamaz
+IMPORT_ROLES = ('teacher', 'student')
+
+
+class UserImporter:
+    """Öğretmen ve öğrencileri toplu doğrular ve yazar (bkz. dashboards.imports.run_import).
+
+    Kullanıcı adları ve beceri adları parti başına birer sorguyla kontrol
+    edilir; kullanıcılar ve beceri ilişkileri ``bulk_create`` ile yazılır.
+    Şifresi boş bırakılan satırlar kullanılamaz şifreyle oluşturulur (kullanıcı
+    şifre sıfırlama ile belirler); şifre hash'i bilerek yavaş olduğu için
+    büyük aktarımlarda şifre kolonu boş bırakılmalıdır.
+    """
+
+    columns = ('username', 'role')
+    fields = ('username', 'email', 'first_name', 'last_name', 'role')
+
+    def __init__(self):
+        self.seen_usernames = set()
+
+    def build(self, row):
+        user = User(**{field: row.get(field, '') for field in self.fields})
+        user.clean_fields(exclude=['password'])
+        if user.role not in IMPORT_ROLES:
+            raise ValidationError({'role': f"Role must be one of: {', '.join(IMPORT_ROLES)}."})
+        skills = [name.strip() for name in row.get('skills', '').split(';') if name.strip()]
+        if skills and user.role != 'teacher':
+            raise ValidationError({'skills': "Only teachers can have skills."})
+        user.password = make_password(row.get('password') or None)
+        return user, skills
+
+    def validate_batch(self, rows):
+        errors, candidates = {}, []
+        for number, row in rows:
+            try:
+                user, skills = self.build(row)
+            except ValidationError as error:
+                errors[number] = error_messages(error)
+                continue
+            if user.username in self.seen_usernames:
+                errors[number] = "username: Duplicate username in the import file."
+                continue
+            self.seen_usernames.add(user.username)
+            candidates.append((number, user, skills))
+
+        taken = set(User.objects.filter(username__in=[user.username for _, user, _ in candidates])
+                    .values_list('username', flat=True))
+        skill_ids = dict(
+            Skill.objects.filter(name__in={name for _, _, skills in candidates for name in skills})
+            .values_list('name', 'id')
+        )
+        valid = []
+        for number, user, skills in candidates:
+            unknown = [name for name in skills if name not in skill_ids]
+            if user.username in taken:
+                errors[number] = "username: A user with that username already exists."
+            elif unknown:
+                errors[number] = f"skills: Unknown skill(s): {', '.join(unknown)}."
+            else:
+                user.import_skill_ids = {skill_ids[name] for name in skills}
+                valid.append(user)
+        return valid, errors
+
+    def create(self, users):
+        if not users:
+            return
+        User.objects.bulk_create(users)
+        User.skills.through.objects.bulk_create([
+            User.skills.through(user_id=user.id, skill_id=skill_id)
+            for user in users for skill_id in user.import_skill_ids
+        ])
+        # bulk_create sinyal göndermez; öğretmen beceri index'i parti başına bir kez yenilenir
+        invalidate_index()
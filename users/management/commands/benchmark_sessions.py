@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from dashboards import benchmarks
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs the main flows (login, dashboards, enrollment request and approval with flash messages, "
+        "logout) under every session/message storage mode and reports session-table writes and reads "
+        "per request. Everything the flows write is rolled back."
+    )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                results = benchmarks.benchmark_session_modes()
+                raise Rollback
+        except Rollback:
+            pass
+
+        modes = list(results)
+        steps = list(results[modes[0]])
+        self.stdout.write(self.style.MIGRATE_HEADING("Session table writes (reads) per request"))
+        self.stdout.write(f"  {'step':<30}" + ''.join(f'{mode:>20}' for mode in modes))
+        for step in steps:
+            cells = ''.join(
+                f"{results[mode][step]['writes']:>14} ({results[mode][step]['reads']:>2})" + ' ' * 2 for mode in modes
+            )
+            self.stdout.write(f'  {step:<30}{cells}')
+        totals = {mode: {key: sum(step[key] for step in results[mode].values()) for key in ('writes', 'reads')}
+                  for mode in modes}
+        self.stdout.write(f"  {'total':<30}" + ''.join(
+            f"{totals[mode]['writes']:>14} ({totals[mode]['reads']:>2})  " for mode in modes
+        ))
+        baseline = modes[0]
+        for mode in modes[1:]:
+            self.stdout.write(
+                f"  {mode}: {totals[baseline]['writes'] - totals[mode]['writes']} of "
+                f"{totals[baseline]['writes']} writes and {totals[baseline]['reads'] - totals[mode]['reads']} of "
+                f"{totals[baseline]['reads']} reads removed compared with {baseline}."
+            )
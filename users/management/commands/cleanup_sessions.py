@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+from users import sessions
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes expired rows from the session table in small batches so concurrent writers are not "
+        "blocked for the whole cleanup. Sessions are written through to the database in every storage "
+        "mode, so run it from cron (e.g. hourly)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=sessions.DELETE_BATCH_SIZE,
+                            help="Sessions deleted per transaction.")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be positive.")
+        deleted = sessions.clear_expired_sessions(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired session(s)."))
@@ -0,0 +1,12 @@
+from dashboards.management.commands._import import ImportCommand
+from users import imports
+
+
+class Command(ImportCommand):
+    help = (
+        "Imports teachers and students from a CSV file with the columns username, role and optionally "
+        "email, first_name, last_name, password and skills (names separated by ';'). Rows without a "
+        "password get an unusable password. Rows are validated and inserted in batches."
+    )
+
+    importer_class = imports.UserImporter
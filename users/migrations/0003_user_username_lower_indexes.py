@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-18 20:50
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0002_skill_user_skills'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Lower('username'), models.F('id'), name='user_username_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(models.F('role'), django.db.models.functions.text.Lower('username'), models.F('id'), name='user_role_username_lower_idx'),
+        ),
+    ]
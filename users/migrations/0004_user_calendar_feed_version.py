@@ -0,0 +1,21 @@
+# Generated by Django 5.1.15 on 2026-10-18 21:22
+
+from django.db import migrations, models
+from dashboards.search import without_search_triggers
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_username_lower_indexes'),
+        ('dashboards', '0013_remove_lesson_seats_left_idx'),
+    ]
+
+    # Yeni kolon SQLite'ta users_user tablosunu yeniden oluşturur; arama trigger'ları bu sırada kaldırılır
+    operations = without_search_triggers(
+        migrations.AddField(
+            model_name='user',
+            name='calendar_feed_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    )
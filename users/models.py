@@ -1,5 +1,7 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Lower
 from django.core.exceptions import ValidationError
 
 class Skill(models.Model):
@@ -16,6 +18,29 @@ class User(AbstractUser):
     )
     role = models.CharField(max_length=10, choices=ROLE_CHOICES)
     skills = models.ManyToManyField(Skill, blank=True)  # Yalnızca öğretmenler için beceri alanı
+    # Takvim besleme token'larına gömülür; artırılınca paylaşılmış tüm besleme adresleri geçersiz olur
+    calendar_feed_version = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Kullanıcı dizini büyük/küçük harf duyarsız önek araması ve sıralaması için ifade index'leri
+            models.Index(Lower('username'), F('id'), name='user_username_lower_idx'),
+            models.Index(F('role'), Lower('username'), F('id'), name='user_role_username_lower_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Kullanıcı adının gerçekten değişip değişmediği post_save'de buna bakılarak anlaşılır
+        instance._loaded_username = instance.__dict__.get('username')
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_username = self.username
+
+    def username_has_changed(self):
+        return getattr(self, '_loaded_username', None) != self.username
 
     def is_manager(self):
         return self.role == 'manager'
@@ -0,0 +1,90 @@
+"""Kullanıcı profili (user_detail ve öğretmen ders sayfası) derleme ve önbelleği.
+
+Profil kullanıcıyı, becerilerini, verdiği dersleri ve kayıtlarını sabit
+sayıda sorguyla (kullanıcı + üç prefetch) okur ve şablonların ihtiyaç
+duyduğu düz veriye çevirir. Sonuç kullanıcı başına önbellekte tutulur;
+kullanıcı, beceri, ders veya kayıt yazıldığında ilgili profiller silinir
+(bkz. users.signals).
+"""
+from django.db import transaction
+from django.db.models import Prefetch
+from dashboards import catalogue
+from dashboards.models import Enrollment, Lesson
+from .models import Skill, User
+
+KEY_PREFIX = 'profile'
+TIMEOUT = 15 * 60
+
+
+def profile_key(user_id):
+    return f'{KEY_PREFIX}:{user_id}'
+
+
+def build_profile(user_id):
+    """Profili veritabanından derler; kullanıcı yoksa ``None`` döner."""
+    user = (
+        User.objects.filter(id=user_id)
+        .prefetch_related(
+            Prefetch('skills', queryset=Skill.objects.order_by('name')),
+            Prefetch('lessons', queryset=Lesson.objects.order_by('start_date', 'id')),
+            Prefetch('enrollments', queryset=Enrollment.objects.select_related('lesson__teacher')
+                     .order_by('lesson__start_date', 'id')),
+        )
+        .first()
+    )
+    if user is None:
+        return None
+    return {
+        'id': user.id,
+        'username': user.username,
+        'full_name': user.get_full_name(),
+        'email': user.email,
+        'role': user.role,
+        'role_display': user.get_role_display(),
+        'date_joined': user.date_joined,
+        'skills': [skill.name for skill in user.skills.all()],
+        'lessons_given': [
+            {'id': lesson.id, 'title': lesson.title, 'start_date': lesson.start_date, 'end_date': lesson.end_date}
+            for lesson in user.lessons.all()
+        ],
+        'enrollments': [
+            {
+                'lesson_id': enrollment.lesson_id,
+                'title': enrollment.lesson.title,
+                'teacher': enrollment.lesson.teacher.username,
+                'status': enrollment.status,
+                'start_date': enrollment.lesson.start_date,
+                'end_date': enrollment.lesson.end_date,
+            }
+            for enrollment in user.enrollments.all()
+        ],
+    }
+
+
+def get_profile(user_id):
+    """Önbellekteki profili, yoksa derleyip saklayarak döndürür."""
+    # Profiller katalogla aynı (süreçler arası paylaşılabilen) önbellekte tutulur
+    cache = catalogue.get_cache()
+    profile = cache.get(profile_key(user_id))
+    if profile is None:
+        profile = build_profile(user_id)
+        if profile is not None:
+            cache.set(profile_key(user_id), profile, TIMEOUT)
+    return profile
+
+
+def delete_profiles(user_ids):
+    catalogue.get_cache().delete_many([profile_key(user_id) for user_id in user_ids])
+
+
+def invalidate_profiles(user_ids):
+    """Profilleri hemen ve transaction commit edildikten sonra tekrar siler.
+
+    Commit'ten önce eski veriyi okuyup saklayan bir istek, ikinci silmeyle
+    temizlenir (bkz. dashboards.catalogue.invalidate_lessons).
+    """
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return
+    delete_profiles(user_ids)
+    transaction.on_commit(lambda: delete_profiles(user_ids))
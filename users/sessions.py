@@ -0,0 +1,38 @@
+"""Oturum tablosu bakımı.
+
+Mod ``SESSION_STORAGE`` (db, cached_db) ve ``MESSAGE_STORAGE`` (session,
+cookie, fallback) ortam değişkenleriyle seçilir (bkz. settings). cached_db
+oturumu önbellekten okur ve her yazmayı hem veritabanına hem önbelleğe
+yazar; bu yüzden süresi dolan satırlar yine tablodan temizlenmelidir.
+Modların karşılaştırması için bkz. dashboards.benchmarks.benchmark_session_modes.
+"""
+from importlib import import_module
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+DELETE_BATCH_SIZE = 1000
+
+
+def session_model():
+    return import_module(settings.SESSION_ENGINE).SessionStore.get_model_class()
+
+
+def clear_expired_sessions(batch_size=DELETE_BATCH_SIZE, now=None):
+    """Süresi dolmuş oturum satırlarını partiler halinde siler; silinen satır sayısını döndürür.
+
+    ``clearsessions`` tüm satırları tek bir DELETE ile siler ve yazma kilidini
+    silme bitene kadar tutar. Burada her parti kendi kısa transaction'ında
+    silinir; kapı girişleri gibi eşzamanlı yazıcılar araya girebilir. Önbellekteki
+    kopyalar oturumla aynı sürede zaten düşer.
+    """
+    model = session_model()
+    now = now or timezone.now()
+    deleted = 0
+    while True:
+        keys = list(model.objects.filter(expire_date__lt=now).values_list('session_key', flat=True)[:batch_size])
+        if not keys:
+            return deleted
+        with transaction.atomic():
+            model.objects.filter(session_key__in=keys).delete()
+        deleted += len(keys)
@@ -0,0 +1,74 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from dashboards.models import Enrollment, Lesson
+from .models import Skill, User
+from .profiles import invalidate_profiles
+from .skill_index import invalidate_index
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_profile(sender, instance, created, update_fields=None, **kwargs):
+    # Profil last_login gibi alanları göstermez; sadece onlar yazıldıysa atlanır
+    if created or (update_fields is not None and not {'username', 'role', 'email', 'first_name',
+                                                      'last_name'} & set(update_fields)):
+        return
+    user_ids = {instance.id}
+    if instance.is_teacher():
+        # Öğrenci profilleri derslerin öğretmen adını gösterir
+        user_ids.update(Enrollment.objects.filter(lesson__teacher=instance).values_list('student_id', flat=True))
+    invalidate_profiles(user_ids)
+
+
+@receiver(post_save, sender=Lesson)
+def invalidate_lesson_profiles(sender, instance, created, **kwargs):
+    user_ids = {instance.teacher_id}
+    if not created:
+        user_ids.update(instance.enrollments.values_list('student_id', flat=True))
+    invalidate_profiles(user_ids)
+
+
+# Ders silinirken kayıtlar cascade ile tek tek silinir ve aşağıdaki Enrollment sinyali öğrencileri kapsar
+@receiver(post_delete, sender=Lesson)
+def invalidate_deleted_lesson_profile(sender, instance, **kwargs):
+    invalidate_profiles([instance.teacher_id])
+
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def invalidate_enrollment_profile(sender, instance, **kwargs):
+    invalidate_profiles([instance.student_id])
+
+
+@receiver(post_save, sender=Skill)
+@receiver(pre_delete, sender=Skill)
+def invalidate_skill_profiles(sender, instance, **kwargs):
+    # Silmede ilişki satırları henüz duruyorken (pre_delete) sahipleri okunur
+    invalidate_profiles(instance.user_set.values_list('id', flat=True))
+
+
+@receiver(m2m_changed, sender=User.skills.through)
+def invalidate_user_skill_profiles(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action.startswith('post_'):
+            invalidate_profiles([instance.id])
+    elif action == 'pre_clear':
+        # skill.user_set.clear() kullanıcıları vermez; ilişkiler silinmeden önce okunur
+        invalidate_profiles(instance.user_set.values_list('id', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        invalidate_profiles(pk_set)
+
+
+@receiver(post_save, sender=User)
+def invalidate_teacher_skill_index(sender, instance, update_fields=None, **kwargs):
+    # Öğretmen eklenmesi, rol veya kullanıcı adı değişikliği index'in sırasını ve kapsamını değiştirir
+    if update_fields is None or {'role', 'username'} & set(update_fields):
+        invalidate_index()
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Skill)
+@receiver(m2m_changed, sender=User.skills.through)
+def invalidate_skill_index(sender, **kwargs):
+    # Beceri silmede ilişki satırları cascade ile silinir ve m2m_changed gönderilmez
+    if kwargs.get('action', 'post_').startswith('post_'):
+        invalidate_index()
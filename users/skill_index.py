@@ -0,0 +1,126 @@
+"""Beceri ve müsaitliğe göre öğretmen arama için bellek içi bit kümesi index'i.
+
+Öğretmenler kullanıcı adı sırasıyla numaralanır; her beceri için o beceriye
+sahip öğretmenlerin bitlerinin açık olduğu bir tam sayı tutulur. "Yoga VE
+Pilates" araması M2M tablosunda beceri başına bir JOIN yerine birkaç tam
+sayının AND'i olur ve sonuç zaten kullanıcı adı sırasındadır.
+
+Index süreç başına bellekte tutulur ve paylaşılan önbellekteki bir sürümle
+doğrulanır: beceri atamaları, öğretmenler veya beceriler değiştiğinde sürüm
+yenilenir (bkz. users.signals) ve her süreç bir sonraki aramada index'i iki
+sorguyla yeniden kurar.
+"""
+from datetime import timedelta
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+from dashboards import catalogue
+from dashboards.recurrence import iter_sessions
+from dashboards.schedule import session_interval
+from .models import User
+
+VERSION_KEY = 'skill_index:version'
+# Müsaitlik varsayılan olarak önümüzdeki bu kadar haftanın aynı günü için kontrol edilir
+DEFAULT_WEEKS = 4
+# Daha fazla aday varsa oturumlar öğretmen filtresi olmadan okunup bellekte süzülür (uzun IN listesi yerine)
+MAX_TEACHER_FILTER = 500
+
+_cached = None  # (sürüm, SkillIndex)
+
+
+class SkillIndex:
+    def __init__(self, teacher_ids, memberships):
+        # teacher_ids: kullanıcı adı sırasıyla öğretmen id'leri; memberships: (öğretmen id, beceri id)
+        self.teacher_ids = list(teacher_ids)
+        positions = {teacher_id: position for position, teacher_id in enumerate(self.teacher_ids)}
+        self.all_bits = (1 << len(self.teacher_ids)) - 1
+        self.skill_bits = {}
+        for teacher_id, skill_id in memberships:
+            if teacher_id in positions:
+                self.skill_bits[skill_id] = self.skill_bits.get(skill_id, 0) | 1 << positions[teacher_id]
+
+    def match(self, skill_ids):
+        """Verilen becerilerin hepsine sahip öğretmenlerin id'lerini kullanıcı adı sırasıyla döndürür."""
+        bits = self.all_bits
+        for skill_id in set(skill_ids):
+            bits &= self.skill_bits.get(skill_id, 0)
+            if not bits:
+                return []
+        if bits == self.all_bits:
+            return list(self.teacher_ids)
+        teacher_ids = []
+        while bits:
+            lowest = bits & -bits
+            teacher_ids.append(self.teacher_ids[lowest.bit_length() - 1])
+            bits ^= lowest
+        return teacher_ids
+
+
+def build_index():
+    # (role, LOWER(username), id) index'i sıralı okunur
+    teacher_ids = User.objects.filter(role='teacher').order_by(Lower('username'), 'id').values_list('id', flat=True)
+    memberships = User.skills.through.objects.filter(user__role='teacher').values_list('user_id', 'skill_id')
+    return SkillIndex(teacher_ids, memberships)
+
+
+def get_version():
+    cache = catalogue.get_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = catalogue.new_version()
+        version = version if cache.add(VERSION_KEY, version, None) else cache.get(VERSION_KEY, version)
+    return version
+
+
+def get_index():
+    global _cached
+    version = get_version()
+    if _cached is None or _cached[0] != version:
+        _cached = (version, build_index())
+    return _cached[1]
+
+
+def bump_version():
+    catalogue.get_cache().set(VERSION_KEY, catalogue.new_version(), None)
+
+
+def invalidate_index():
+    # Commit'ten önce eski veriyle kurulan index'ler ikinci yenilemeyle geçersiz kalır
+    bump_version()
+    transaction.on_commit(bump_version)
+
+
+def week_dates(weekday, weeks=DEFAULT_WEEKS, today=None):
+    today = today or timezone.localdate()
+    first = today + timedelta(days=(weekday - today.weekday()) % 7)
+    return {first + timedelta(weeks=week) for week in range(weeks)}
+
+
+def busy_teacher_ids(teacher_ids, dates, start_time, end_time):
+    """Verilen günlerde saat aralığıyla çakışan oturumu olan öğretmenlerin id'leri."""
+    filters = {'teacher_id__in': teacher_ids} if len(teacher_ids) <= MAX_TEACHER_FILTER else {}
+    candidates = set(teacher_ids)
+    busy = set()
+    for session in iter_sessions(dates=dates, **filters):
+        if session.teacher_id in busy or session.teacher_id not in candidates:
+            continue
+        start, end = session_interval(session.date, session.start_time, session.end_time)
+        window_start, window_end = session_interval(session.date, start_time, end_time)
+        if start < window_end and window_start < end:
+            busy.add(session.teacher_id)
+    return busy
+
+
+def find_teachers(skill_ids=(), weekday=None, start_time=None, end_time=None, weeks=DEFAULT_WEEKS, today=None):
+    """Becerilerin hepsine sahip, istenirse haftanın bir günü saat aralığında boş öğretmenler.
+
+    ``weekday`` (0 = Pazartesi) verilirse önümüzdeki ``weeks`` haftanın o
+    günlerinin hiçbirinde aralıkla çakışan oturumu olmayanlar kalır. Öğretmen
+    id'leri kullanıcı adı sırasıyla döner.
+    """
+    index = get_index()
+    teacher_ids = index.match(skill_ids)
+    if weekday is None or not teacher_ids:
+        return teacher_ids
+    busy = busy_teacher_ids(teacher_ids, week_dates(weekday, weeks, today), start_time, end_time)
+    return [teacher_id for teacher_id in teacher_ids if teacher_id not in busy]
@@ -1,3 +1,357 @@
+import csv
+import os
+import tempfile
+from importlib import import_module
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from dashboards.models import Lesson, Enrollment
+from dashboards.querybudget import QueryBudgetTestMixin
+from sales.models import Order
+from dashboards.imports import run_import
+from dashboards import benchmarks, catalogue, enrollments
+from . import directory, exports, profiles, sessions, skill_index
+from .imports import UserImporter
+from .models import User, Skill
 
-# Create your tests here.
+
+class UserViewsQueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(username='manager', password='pass', role='manager')
+        cls.teacher = User.objects.create_user(username='teacher', password='pass', role='teacher')
+        cls.student = User.objects.create_user(username='student', password='pass', role='student')
+        cls.skill = Skill.objects.create(name='Yoga')
+        cls.teacher.skills.add(cls.skill)
+        Enrollment.objects.create(lesson=cls.create_lesson(cls.teacher), student=cls.student)
+
+    @classmethod
+    def create_lesson(cls, teacher):
+        index = Lesson.objects.count()
+        return Lesson.objects.create(
+            title=f'Lesson {index}', description='Mobility', lesson_type='group', teacher=teacher,
+            max_students=50, duration_weeks=2, duration_hours=1,
+            # Aynı öğretmenin haftalık oturumları çakışmasın diye her hafta bir saat kaydırılır
+            start_date=datetime(2024, 1, 1, 10, tzinfo=dt_timezone.utc) + timedelta(days=index, hours=index // 7 % 12),
+        )
+
+    def grow(self):
+        # Her öğretmene beceri ve ders, öğrenciye yeni ders etkileşimleri eklenir
+        skills = [Skill.objects.create(name=f'Skill {index}') for index in range(5)]
+        offset = User.objects.count()
+        for index in range(offset, offset + 15):
+            teacher = User.objects.create(username=f'coach{index}', role='teacher')
+            teacher.skills.set(skills)
+            lesson = self.create_lesson(teacher)
+            Enrollment.objects.create(lesson=lesson, student=self.student, status='approved')
+            User.objects.create(username=f'member{index}', role='student')
+        self.teacher.skills.add(*skills)
+        for _ in range(10):
+            self.create_lesson(self.teacher)
+
+    def test_manager_views(self):
+        self.client.force_login(self.manager)
+        for url in [
+            '/user_management/',
+            '/user_management/?query=coach',
+            '/user_management/?query=oac&match=contains',
+            '/user_management/?role=teacher',
+            '/user/create/',
+            f'/user/edit/{self.teacher.id}/',
+            '/skill/create/',
+            f'/skill/edit/{self.skill.id}/',
+            '/teacher/lessons/',
+            '/teacher/lessons/?query=lesson&date=2024-01-01',
+            f'/teacher/{self.teacher.id}/lessons/',
+            f'/user/{self.teacher.id}/',
+            f'/user/{self.student.id}/',
+            f'/teachers/find/?skills={self.skill.id}&weekday=0&start_time=09:00&end_time=12:00',
+        ]:
+            with self.subTest(url=url):
+                self.assertConstantQueries(url, self.grow)
+
+    def test_public_views(self):
+        for url in ['/', '/register/', '/login/', '/test-page/']:
+            with self.subTest(url=url):
+                self.assertConstantQueries(url, self.grow)
+
+    def test_account_views(self):
+        self.assertWithinQueryBudget('/login/', method='post', data={'username': 'student', 'password': 'pass'})
+        self.assertWithinQueryBudget('/')
+        self.assertWithinQueryBudget('/logout/')
+
+
+class UserDirectoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(username='manager', password='pass', role='manager')
+        for index in range(30):
+            User.objects.create(username=f'Coach{index:02}', role='teacher')
+            User.objects.create(username=f'member{index:02}', role='student')
+
+    def usernames(self, **params):
+        return [user.username for user in directory.search_users(**params).order_by(*directory.ORDERING)]
+
+    def test_prefix_search_is_case_insensitive(self):
+        self.assertEqual(self.usernames(query='COACH0'), [f'Coach{index:02}' for index in range(10)])
+        self.assertEqual(self.usernames(query='oach'), [])
+        self.assertEqual(len(self.usernames(query='oach', match=directory.CONTAINS)), 30)
+
+    def test_role_filter_and_counts(self):
+        teacher = User.objects.get(username='Coach00')
+        student = User.objects.get(username='member00')
+        lesson = Lesson.objects.create(
+            title='Yoga', description='Mobility', lesson_type='group', teacher=teacher, max_students=5,
+            duration_weeks=1, duration_hours=1, start_date=datetime(2024, 1, 1, 10, tzinfo=dt_timezone.utc),
+        )
+        Enrollment.objects.create(lesson=lesson, student=student)
+        users = {user.username: user for user in directory.search_users(role='teacher')}
+        self.assertEqual(len(users), 30)
+        self.assertEqual(users['Coach00'].lesson_count, 1)
+        self.assertEqual(directory.search_users(query='member00').get().enrollment_count, 1)
+
+    def test_prefix_search_uses_index(self):
+        for role, index in [('', 'user_username_lower_idx'), ('teacher', 'user_role_username_lower_idx')]:
+            users = directory.search_users(query='coach', role=role).order_by(*directory.ORDERING)
+            with self.subTest(role=role):
+                self.assertIn(index, users.explain())
+
+    def test_pages_follow_filters(self):
+        self.client.force_login(self.manager)
+        response = self.client.get('/user_management/', {'query': 'coach', 'role': 'teacher'})
+        self.assertEqual([user.username for user in response.context['page_obj']][:2], ['Coach00', 'Coach01'])
+        cursor = response.context['page_obj'].next_page_number()
+        response = self.client.get('/user_management/', {'query': 'coach', 'role': 'teacher', 'page': cursor})
+        self.assertEqual([user.username for user in response.context['page_obj']], ['Coach25', 'Coach26', 'Coach27',
+                                                                                  'Coach28', 'Coach29'])
+        self.assertFalse(response.context['page_obj'].has_next())
+
+
+class UserProfileTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create(username='teacher', role='teacher')
+        cls.student = User.objects.create(username='student', role='student')
+        cls.skill = Skill.objects.create(name='Yoga')
+        cls.teacher.skills.add(cls.skill)
+        cls.lesson = Lesson.objects.create(
+            title='Morning Yoga', description='Mobility', lesson_type='group', teacher=cls.teacher, max_students=5,
+            duration_weeks=1, duration_hours=1, start_date=datetime(2024, 1, 1, 10, tzinfo=dt_timezone.utc),
+        )
+        cls.enrollment = Enrollment.objects.create(lesson=cls.lesson, student=cls.student)
+
+    def setUp(self):
+        profiles.delete_profiles([self.teacher.id, self.student.id])
+
+    def test_profile_is_built_in_fixed_queries_and_cached(self):
+        with self.assertNumQueries(4):
+            profile = profiles.get_profile(self.student.id)
+        self.assertEqual(profile['enrollments'][0]['teacher'], 'teacher')
+        with self.assertNumQueries(0):
+            profiles.get_profile(self.student.id)
+        self.assertIsNone(profiles.get_profile(0))
+
+    def test_writes_invalidate_profiles(self):
+        enrollments.approve_enrollment(self.enrollment)
+        self.assertEqual(profiles.get_profile(self.student.id)['enrollments'][0]['status'], 'approved')
+
+        self.lesson.refresh_from_db()
+        self.lesson.title = 'Evening Yoga'
+        self.lesson.save()
+        self.assertEqual(profiles.get_profile(self.teacher.id)['lessons_given'][0]['title'], 'Evening Yoga')
+        self.assertEqual(profiles.get_profile(self.student.id)['enrollments'][0]['title'], 'Evening Yoga')
+
+        self.teacher.username = 'coach'
+        self.teacher.save()
+        self.assertEqual(profiles.get_profile(self.student.id)['enrollments'][0]['teacher'], 'coach')
+
+        self.skill.name = 'Hatha Yoga'
+        self.skill.save()
+        self.assertEqual(profiles.get_profile(self.teacher.id)['skills'], ['Hatha Yoga'])
+        self.teacher.skills.clear()
+        self.assertEqual(profiles.get_profile(self.teacher.id)['skills'], [])
+
+        self.enrollment.delete()
+        self.assertEqual(profiles.get_profile(self.student.id)['enrollments'], [])
+
+    def test_teacher_lessons_page_reuses_profile(self):
+        manager = User.objects.create_user(username='manager', password='pass', role='manager')
+        self.client.force_login(manager)
+        self.client.get(f'/user/{self.teacher.id}/')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/teacher/{self.teacher.id}/lessons/')
+        self.assertContains(response, 'Morning Yoga')
+        self.assertFalse([query for query in queries if 'dashboards_lesson' in query['sql']])
+        self.assertEqual(self.client.get(f'/teacher/{self.student.id}/lessons/').status_code, 404)
+
+
+class SessionStorageTests(TestCase):
+    def test_clear_expired_sessions_in_batches(self):
+        model = sessions.session_model()
+        now = timezone.now()
+        for index in range(5):
+            store = import_module(settings.SESSION_ENGINE).SessionStore()
+            store['index'] = index
+            store.set_expiry(-3600 if index < 3 else 3600)
+            store.save()
+        self.assertEqual(sessions.clear_expired_sessions(batch_size=2, now=now), 3)
+        self.assertEqual(model.objects.count(), 2)
+
+    def test_cookie_messages_and_cached_sessions_remove_session_queries(self):
+        results = benchmarks.benchmark_session_modes()
+        for step in ('enroll_in_lesson', 'all_lessons (message)', 'manage_enrollment', 'teacher_dashboard (message)'):
+            with self.subTest(step=step):
+                self.assertEqual(results['db+session'][step]['writes'], 1)
+                self.assertEqual(results['cached_db+cookie'][step]['writes'], 0)
+                self.assertEqual(results['cached_db+cookie'][step]['reads'], 0)
+        # Giriş ve çıkış her modda oturumu yazar
+        self.assertEqual(results['cached_db+cookie']['login (student)']['writes'], 2)
+
+    def test_flash_message_is_shown_after_redirect(self):
+        teacher, lesson, students = benchmarks.create_session_benchmark_data()
+        self.client.force_login(students[0])
+        response = self.client.post(f'/lessons/{lesson.id}/enroll/', follow=True)
+        self.assertContains(response, "Your request to join the lesson has been sent.")
+        self.assertNotContains(self.client.get('/all_lessons/'), "Your request to join the lesson has been sent.")
+
+
+class SkillIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.yoga = Skill.objects.create(name='Yoga')
+        cls.pilates = Skill.objects.create(name='Pilates')
+        cls.ana = User.objects.create(username='ana', role='teacher')
+        cls.bora = User.objects.create(username='Bora', role='teacher')
+        cls.cem = User.objects.create(username='cem', role='teacher')
+        cls.ana.skills.add(cls.yoga, cls.pilates)
+        cls.bora.skills.add(cls.yoga, cls.pilates)
+        cls.cem.skills.add(cls.yoga)
+        # 2024-01-02 bir salı; Bora o gün 18:00-19:00 ders veriyor
+        Lesson.objects.create(
+            title='Evening Pilates', description='Core', lesson_type='group', teacher=cls.bora, max_students=10,
+            duration_weeks=8, duration_hours=1, start_date=datetime(2024, 1, 2, 18, tzinfo=dt_timezone.utc),
+        )
+
+    def setUp(self):
+        # Geri alınan testler sürümü yenilemez; her test yeni bir index sürümüyle başlar
+        catalogue.clear()
+
+    def test_required_skills_are_intersected_in_username_order(self):
+        self.assertEqual(skill_index.find_teachers([self.yoga.id, self.pilates.id]), [self.ana.id, self.bora.id])
+        self.assertEqual(skill_index.find_teachers([self.yoga.id]), [self.ana.id, self.bora.id, self.cem.id])
+        self.assertEqual(skill_index.find_teachers([self.pilates.id, 0]), [])
+
+    def test_availability_filters_busy_teachers(self):
+        today = datetime(2024, 1, 1).date()
+        find = lambda weekday, start, end: skill_index.find_teachers(
+            [self.pilates.id], weekday, datetime.strptime(start, '%H:%M').time(),
+            datetime.strptime(end, '%H:%M').time(), today=today,
+        )
+        self.assertEqual(find(1, '17:30', '20:00'), [self.ana.id])
+        self.assertEqual(find(1, '19:00', '21:00'), [self.ana.id, self.bora.id])
+        self.assertEqual(find(0, '17:30', '20:00'), [self.ana.id, self.bora.id])
+
+        # Oturumlar öğretmen id'siyle eşleşir; index yenilenmeden kullanıcı adı değişse de meşgul öğretmen elenir
+        User.objects.filter(id=self.bora.id).update(username='zeynep')
+        self.assertEqual(find(1, '17:30', '20:00'), [self.ana.id])
+
+    def test_index_is_reused_until_skills_change(self):
+        skill_index.get_index()
+        with self.assertNumQueries(0):
+            skill_index.find_teachers([self.yoga.id])
+        self.cem.skills.add(self.pilates)
+        self.assertIn(self.cem.id, skill_index.find_teachers([self.pilates.id]))
+        self.bora.role = 'student'
+        self.bora.save()
+        self.assertNotIn(self.bora.id, skill_index.find_teachers([self.pilates.id]))
+
+    def test_find_teachers_page(self):
+        tuesday = min(skill_index.week_dates(1))
+        Lesson.objects.create(
+            title='Next Pilates', description='Core', lesson_type='group', teacher=self.bora, max_students=10,
+            duration_weeks=1, duration_hours=1,
+            start_date=datetime(tuesday.year, tuesday.month, tuesday.day, 18, tzinfo=dt_timezone.utc),
+        )
+        self.client.force_login(User.objects.create_user(username='member', password='pass', role='student'))
+        response = self.client.get('/teachers/find/', {
+            'skills': [self.yoga.id, self.pilates.id], 'weekday': 1, 'start_time': '18:00', 'end_time': '18:30',
+        })
+        self.assertEqual([teacher.username for teacher in response.context['page_obj']], ['ana'])
+        response = self.client.get('/teachers/find/', {'weekday': 1})
+        self.assertContains(response, 'Choose a start and end time')
+        response = self.client.get('/teachers/find/', {'start_time': '18:00', 'end_time': '18:30'})
+        self.assertContains(response, 'Choose a day')
+
+
+class CsvExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user(username='manager', password='pass', role='manager')
+        cls.teacher = User.objects.create_user(username='teacher', password='pass', role='teacher')
+        cls.teacher.skills.add(Skill.objects.create(name='Yoga'), Skill.objects.create(name='Boxing'))
+        cls.student = User.objects.create_user(username='=cmd|calc', password='pass', role='student')
+        lesson = UserViewsQueryBudgetTests.create_lesson(cls.teacher)
+        Enrollment.objects.create(lesson=lesson, student=cls.student, status='approved')
+        Order.objects.create(user=cls.student, total_amount='12.50', address='-', city='Izmir', postal_code='35000', country='TR')
+
+    def export(self, url):
+        self.client.force_login(self.manager)
+        response = self.client.get(url)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode().splitlines()
+
+    def test_exports(self):
+        users = self.export('/export/users.csv')
+        self.assertEqual(users[0], ','.join(exports.USER_HEADER))
+        self.assertIn('teacher,,,,teacher,Boxing; Yoga,True', users[2])
+        self.assertTrue(users[3].startswith(f"{self.student.id},'=cmd|calc,"))
+        enrollments = self.export('/export/enrollments.csv')
+        self.assertIn('Lesson 0,teacher,\'=cmd|calc,approved', enrollments[1])
+        orders = self.export('/export/orders.csv')
+        self.assertIn(",12.50,", orders[1])
+        self.client.force_login(self.teacher)
+        self.assertEqual(self.client.get('/export/orders.csv').status_code, 403)
+
+    def test_header_is_sent_before_any_query(self):
+        rows = exports.render_csv(exports.USER_HEADER, exports.user_chunks(chunk_size=2))
+        with CaptureQueriesContext(connection) as context:
+            next(rows)
+        self.assertEqual(len(context.captured_queries), 0)
+
+    def test_queries_grow_per_chunk_not_per_row(self):
+        User.objects.bulk_create(User(username=f'member{index}', role='student') for index in range(7))
+        with CaptureQueriesContext(connection) as context:
+            chunks = list(exports.user_chunks(chunk_size=4))
+        self.assertEqual([len(chunk) for chunk in chunks], [4, 4, 2])
+        # Kullanıcılar tek sunucu taraflı imleçle, beceriler parça başına bir sorguyla okunur
+        self.assertLessEqual(len(context.captured_queries), 1 + len(chunks))
+
+
+class UserImportTests(TestCase):
+    def test_import_users(self):
+        Skill.objects.create(name='Yoga')
+        User.objects.create_user(username='taken', password='pass', role='student')
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'users.csv')
+        with open(path, 'w', newline='') as handle:
+            csv.writer(handle).writerows([
+                ['username', 'role', 'email', 'skills', 'password'],
+                ['coach', 'teacher', 'coach@example.com', 'Yoga', 's3cret-pass'],
+                ['member', 'student', '', '', ''],
+                ['taken', 'student', '', '', ''],
+                ['boss', 'manager', '', '', ''],
+                ['pupil', 'student', '', 'Yoga', ''],
+                ['bad name!', 'student', '', '', ''],
+                ['coach2', 'teacher', '', 'Boxing', ''],
+            ])
+        result = run_import(UserImporter(), path, batch_size=3)
+        self.assertEqual(result['created'], 2)
+        self.assertEqual(sorted(result['errors']), [3, 4, 5, 6, 7])
+        coach = User.objects.get(username='coach')
+        self.assertTrue(coach.check_password('s3cret-pass'))
+        self.assertEqual(list(coach.skills.values_list('name', flat=True)), ['Yoga'])
+        self.assertFalse(User.objects.get(username='member').has_usable_password())
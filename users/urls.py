@@ -7,6 +7,9 @@ urlpatterns = [
     path('logout/', views.logout_view, name='logout'),
     
     path('user_management/', views.user_management, name='user_management'),
+    path('export/users.csv', views.export_users, name='export_users'),
+    path('export/enrollments.csv', views.export_enrollments, name='export_enrollments'),
+    path('export/orders.csv', views.export_orders, name='export_orders'),
     path('user/create/', views.create_user, name='create_user'),
     path('user/edit/<int:user_id>/', views.edit_user, name='edit_user'),
     path('skill/create/', views.create_skill, name='create_skill'),
@@ -18,4 +21,5 @@ urlpatterns = [
     path('teacher/<int:teacher_id>/lessons/', views.view_teacher_lessons, name='view_specific_teacher_lessons'),
 
     path('user/<int:user_id>/', views.user_detail, name='user_detail'),
+    path('teachers/find/', views.find_teachers, name='find_teachers'),
 ]
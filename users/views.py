@@ -2,16 +2,24 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required
 from .models import User, Skill
-from .forms import UserRegisterForm, UserUpdateForm, SkillForm
+from .forms import UserRegisterForm, UserUpdateForm, SkillForm, TeacherSearchForm
+from . import directory, exports, profiles, skill_index
 from django.contrib import messages
-from dashboards.models import Lesson, Enrollment
-from django.db.models import Q
+from django.http import Http404, HttpResponse
+from dashboards.models import Lesson
+from dashboards.search import search_lessons
+from dashboards.pagination import KeysetPaginator
+from dashboards.utils import filter_by_day
+from dashboards.querybudget import query_budget
+from django.core.paginator import Paginator
 from datetime import datetime
 
 
+@query_budget(5)
 def home(request):
     return render(request, 'home.html')
 
+@query_budget(6)
 def register(request):
     if request.method == 'POST':
         form = UserRegisterForm(request.POST)
@@ -23,6 +31,7 @@ def register(request):
         form = UserRegisterForm()
     return render(request, 'users/register.html', {'form': form})
 
+@query_budget(5)
 def login_view(request):
     if request.method == 'POST':
         username = request.POST.get('username')
@@ -42,25 +51,58 @@ def login_view(request):
     return render(request, 'users/login.html')
 
 @login_required
+@query_budget(6)
 def logout_view(request):
     logout(request)
     return redirect('login')
 
 @login_required
+@query_budget(7)
 def user_management(request):
     query = request.GET.get('query', '').strip()  # Arama sorgusunu alıyoruz
-    users = User.objects.all()
+    role = request.GET.get('role', '')
+    match = request.GET.get('match', directory.PREFIX)
 
-    # Eğer bir arama sorgusu varsa, isme göre filtreleme yapıyoruz
-    if query:
-        users = users.filter(username__icontains=query)
+    # Varsayılan arama kullanıcı adı önekiyle yapılır ve index kullanır; alt metin araması ayrı moddur
+    users = directory.search_users(query, role, match)
+
+    # Sayfalama
+    paginator = KeysetPaginator(users, 25, ordering=directory.ORDERING)
+    page_obj = paginator.get_page(request.GET.get('page'))
 
     return render(request, 'users/user_management.html', {
-        'users': users,
-        'query': query
+        'page_obj': page_obj,
+        'query': query,
+        'role': role,
+        'match': match,
+        'roles': User.ROLE_CHOICES,
+        'match_modes': directory.MATCH_MODES,
     })
 
 @login_required
+@query_budget(4)
+def export_users(request):
+    # Sorgular yanıt akarken çalışır; bütçe sadece yetki kontrolünü kapsar
+    if not request.user.is_manager():
+        return HttpResponse("Only managers can export data.", status=403)
+    return exports.csv_response('users.csv', exports.USER_HEADER, exports.user_chunks())
+
+@login_required
+@query_budget(4)
+def export_enrollments(request):
+    if not request.user.is_manager():
+        return HttpResponse("Only managers can export data.", status=403)
+    return exports.csv_response('enrollments.csv', exports.ENROLLMENT_HEADER, exports.enrollment_chunks())
+
+@login_required
+@query_budget(4)
+def export_orders(request):
+    if not request.user.is_manager():
+        return HttpResponse("Only managers can export data.", status=403)
+    return exports.csv_response('orders.csv', exports.ORDER_HEADER, exports.order_chunks())
+
+@login_required
+@query_budget(10)
 def create_user(request):
     if request.user.is_manager():
         if request.method == 'POST':
@@ -78,6 +120,7 @@ def create_user(request):
         return redirect('user_management')
 
 @login_required
+@query_budget(12)
 def edit_user(request, user_id):
     if request.user.is_manager():
         user = get_object_or_404(User, id=user_id)
@@ -96,6 +139,7 @@ def edit_user(request, user_id):
         return redirect('home')
 
 @login_required
+@query_budget(5)
 def create_skill(request):
     if request.user.is_manager():
         if request.method == 'POST':
@@ -110,6 +154,7 @@ def create_skill(request):
         return redirect('home')
 
 @login_required
+@query_budget(6)
 def edit_skill(request, skill_id):
     if request.user.is_manager():
         skill = get_object_or_404(Skill, id=skill_id)
@@ -125,6 +170,7 @@ def edit_skill(request, skill_id):
         return redirect('home')
 
 @login_required
+@query_budget(5)
 def view_all_teacher_lessons(request):
     if request.user.is_manager():
         # Filtreleme parametrelerini al
@@ -132,19 +178,16 @@ def view_all_teacher_lessons(request):
         date_query = request.GET.get('date', '').strip()
 
         # Tüm dersleri filtrele
-        lessons = Lesson.objects.all()
+        lessons = Lesson.objects.select_related('teacher')
 
         # Öğretmen adına ve derse göre arama
         if query:
-            lessons = lessons.filter(
-                Q(teacher__username__icontains=query) | 
-                Q(title__icontains=query)
-            )
+            lessons = search_lessons(lessons, query, columns=['teacher', 'title'])
         # Tarihe göre arama
         if date_query:
             try:
                 date = datetime.strptime(date_query, "%Y-%m-%d").date()
-                lessons = lessons.filter(start_date__date=date)
+                lessons = filter_by_day(lessons, date)
             except ValueError:
                 messages.error(request, "Invalid date format. Please use YYYY-MM-DD.")
         
@@ -159,38 +202,46 @@ def view_all_teacher_lessons(request):
 
 
 @login_required
+@query_budget(8)
 def view_teacher_lessons(request, teacher_id):
     if request.user.is_manager():
-        teacher = get_object_or_404(User, id=teacher_id, role='teacher')
-        lessons = Lesson.objects.filter(teacher=teacher)
+        # Öğretmen özeti kullanıcı profiliyle aynı önbellekten okunur
+        teacher = profiles.get_profile(teacher_id)
+        if teacher is None or teacher['role'] != 'teacher':
+            raise Http404("No teacher matches the given query.")
 
         return render(request, 'users/view_teacher_lessons.html', {
             'teacher': teacher,
-            'lessons': lessons,
+            'lessons': teacher['lessons_given'],
         })
     else:
         messages.error(request, "You are not authorized to view teacher lessons.")
         return redirect('home')
 
 @login_required
+@query_budget(8)
 def user_detail(request, user_id):
-    user = get_object_or_404(User, id=user_id)
-
-    # Kullanıcı öğretmense, yeteneklerini getiriyoruz
-    skills = user.skills.all() if user.is_teacher() else None
-
-    # Kullanıcı öğrenci ise tüm ders etkileşimlerini getiriyoruz
-    lessons_interactions = None
-    if user.is_student():
-        enrollments = Enrollment.objects.filter(student=user)
-        lessons_interactions = [(enrollment.lesson, enrollment.status) for enrollment in enrollments]
-
-    # Kullanıcı öğretmense tüm verdiği dersleri getiriyoruz
-    lessons_given = Lesson.objects.filter(teacher=user) if user.is_teacher() else None
-
-    return render(request, 'users/user_detail.html', {
-        'user_detail': user,
-        'skills': skills,
-        'lessons_interactions': lessons_interactions,
-        'lessons_given': lessons_given,
-    })
\ No newline at end of file
+    # Profil sabit sayıda sorguyla derlenir ve kullanıcı başına önbellekte tutulur
+    profile = profiles.get_profile(user_id)
+    if profile is None:
+        raise Http404("No user matches the given query.")
+    return render(request, 'users/user_detail.html', {'profile': profile})
+
+@login_required
+@query_budget(12)
+def find_teachers(request):
+    form = TeacherSearchForm(request.GET or None)
+    teacher_ids = []
+    if form.is_valid():
+        # Beceri eşleşmesi bellekteki bit kümesi index'inden, müsaitlik ders oturumlarından bulunur
+        teacher_ids = skill_index.find_teachers(
+            [skill.id for skill in form.cleaned_data['skills']], form.cleaned_data['weekday'],
+            form.cleaned_data['start_time'], form.cleaned_data['end_time'],
+        )
+
+    # Sonuçlar zaten kullanıcı adı sırasında; sadece sayfadaki öğretmenler okunur
+    page_obj = Paginator(teacher_ids, 25).get_page(request.GET.get('page'))
+    teachers = User.objects.filter(id__in=list(page_obj)).prefetch_related('skills').in_bulk()
+    page_obj.object_list = [teachers[teacher_id] for teacher_id in page_obj if teacher_id in teachers]
+
+    return render(request, 'users/find_teachers.html', {'form': form, 'page_obj': page_obj})